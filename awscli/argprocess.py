@@ -13,6 +13,7 @@
 """Module for processing CLI args."""
 import os
 import logging
+import weakref
 from awscli.compat import six
 
 from botocore import xform_name
@@ -99,15 +100,31 @@ def uri_param(event_name, param, value, **kwargs):
 def _check_for_uri_param(param, value):
     if isinstance(value, list) and len(value) == 1:
         value = value[0]
+    blob_shape = None
+    argument_model = getattr(param, 'argument_model', None)
+    if argument_model is not None and argument_model.type_name == 'blob':
+        blob_shape = argument_model
     try:
-        return get_paramfile(value)
+        return get_paramfile(value, blob_shape=blob_shape)
     except ResourceLoadingError as e:
         raise ParamError(param.cli_name, six.text_type(e))
 
 
+# Shape objects are immutable once created, so the classification of a
+# shape (and the name -> member mapping used when parsing shorthand) is
+# computed once per shape object.  Weak references are used so these
+# caches don't keep service models alive.
+_SHAPE_STRUCTURE_CACHE = weakref.WeakKeyDictionary()
+_NAME_TO_PARAMS_CACHE = weakref.WeakKeyDictionary()
+
+
 def detect_shape_structure(param):
-    stack = []
-    return _detect_shape_structure(param, stack)
+    try:
+        return _SHAPE_STRUCTURE_CACHE[param]
+    except KeyError:
+        structure = _detect_shape_structure(param, [])
+        _SHAPE_STRUCTURE_CACHE[param] = structure
+        return structure
 
 
 def _detect_shape_structure(param, stack):
@@ -219,6 +236,9 @@ def unpack_scalar_cli_arg(argument_model, value, cli_name=''):
         return float(value)
     elif argument_model.type_name == 'blob' and \
             argument_model.serialization.get('streaming'):
+        if hasattr(value, 'read'):
+            # Already opened from a fileb:// reference.
+            return value
         file_path = os.path.expandvars(value)
         file_path = os.path.expanduser(file_path)
         if not os.path.isfile(file_path):
@@ -359,12 +379,8 @@ class ParamShorthand(object):
         return parsed
 
     def _struct_scalar_list_parse(self, param, value):
-        # Create a mapping of argument name -> argument object
-        args = {}
-        for member_name, arg in param.members.items():
-            # Arg name -> arg object lookup
-            args[member_name] = arg
-
+        # Arg name -> arg object lookup
+        args = self._create_name_to_params(param)
         parts = self._split_on_commas(value)
         current_parsed = {}
         current_key = None
@@ -464,6 +480,14 @@ class ParamShorthand(object):
         return parsed
 
     def _create_name_to_params(self, param):
+        try:
+            return _NAME_TO_PARAMS_CACHE[param]
+        except KeyError:
+            name_to_params = self._build_name_to_params(param)
+            _NAME_TO_PARAMS_CACHE[param] = name_to_params
+            return name_to_params
+
+    def _build_name_to_params(self, param):
         if param.type_name == 'structure':
             return dict([(member_name, p) for member_name, p
                          in param.members.items()])
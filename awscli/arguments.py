@@ -162,6 +162,17 @@ class BaseCLIArgument(object):
     def synopsis(self):
         return ''
 
+    @property
+    def changes_response(self):
+        """Whether specifying this argument changes the response.
+
+        This is True for arguments that modify or act on the parsed
+        response after the call, e.g. with an ``after-call`` handler.
+        Responses are not cached for calls that specify such an argument.
+
+        """
+        return False
+
     @property
     def positional_arg(self):
         return False
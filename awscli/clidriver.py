@@ -11,6 +11,7 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import sys
+import copy
 import logging
 
 import botocore.session
@@ -37,6 +38,21 @@ from awscli.arguments import BooleanArgument
 from awscli.arguments import CLIArgument
 from awscli.arguments import UnknownArgumentError
 from awscli.argprocess import unpack_argument
+from awscli.configcache import CachedConfigSession
+from awscli.configcache import get_config_snapshot_cache
+from awscli.utils import PrefetchingPageIterator
+from awscli.utils import concurrent_map
+from awscli.utils import is_read_only_operation
+from awscli.responsecache import CACHE_TTL_CONFIG_VAR
+from awscli.responsecache import compute_cache_key
+from awscli.responsecache import get_response_cache
+from awscli.responsecache import is_cacheable_operation
+from awscli.responsecache import parse_cache_ttl
+from awscli.responsecache import record_pages
+from awscli.responsecache import replay_pages
+from awscli.tracing import create_tracer
+from awscli.tracing import phase
+from awscli.tracing import TracingEmitter
 
 
 LOG = logging.getLogger('awscli.clidriver')
@@ -44,19 +60,33 @@ LOG_FORMAT = (
     '%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s')
 
 
-
 def main():
-    driver = create_clidriver()
-    return driver.main()
-
-
-def create_clidriver():
-    emitter = HierarchicalEmitter()
-    session = botocore.session.Session(EnvironmentVariables, emitter)
-    _set_user_agent_for_session(session)
-    load_plugins(session.full_config.get('plugins', {}),
-                 event_hooks=emitter)
-    driver = CLIDriver(session=session)
+    tracer = create_tracer(sys.argv[1:])
+    if tracer is None:
+        driver = create_clidriver()
+        return driver.main()
+    tracer.install_import_hook()
+    try:
+        driver = create_clidriver(tracer=tracer)
+        return driver.main()
+    finally:
+        tracer.finish()
+
+
+def create_clidriver(tracer=None):
+    if tracer is not None:
+        emitter = TracingEmitter(tracer)
+    else:
+        emitter = HierarchicalEmitter()
+    with phase(tracer, 'create-session'):
+        session = CachedConfigSession(
+            EnvironmentVariables, emitter,
+            config_snapshot_cache=get_config_snapshot_cache())
+        _set_user_agent_for_session(session)
+    with phase(tracer, 'load-plugins'):
+        load_plugins(session.full_config.get('plugins', {}),
+                     event_hooks=emitter)
+    driver = CLIDriver(session=session, tracer=tracer)
     return driver
 
 
@@ -67,12 +97,13 @@ def _set_user_agent_for_session(session):
 
 class CLIDriver(object):
 
-    def __init__(self, session=None):
+    def __init__(self, session=None, tracer=None):
         if session is None:
             self.session = botocore.session.get_session(EnvironmentVariables)
             _set_user_agent_for_session(self.session)
         else:
             self.session = session
+        self._tracer = tracer
         self._cli_data = None
         self._command_table = None
         self._argument_table = None
@@ -184,17 +215,21 @@ class CLIDriver(object):
         """
         if args is None:
             args = sys.argv[1:]
-        parser = self._create_parser()
-        command_table = self._get_command_table()
-        parsed_args, remaining = parser.parse_known_args(args)
+        with phase(self._tracer, 'parse-global-args'):
+            parser = self._create_parser()
+            command_table = self._get_command_table()
+            parsed_args, remaining = parser.parse_known_args(args)
         try:
             # Because _handle_top_level_args emits events, it's possible
             # that exceptions can be raised, which should have the same
             # general exception handling logic as calling into the
             # command table.  This is why it's in the try/except clause.
-            self._handle_top_level_args(parsed_args)
-            self._emit_session_event()
-            return command_table[parsed_args.command](remaining, parsed_args)
+            with phase(self._tracer, 'handle-global-args'):
+                self._handle_top_level_args(parsed_args)
+                self._emit_session_event()
+            with phase(self._tracer, 'run-command'):
+                return command_table[parsed_args.command](remaining,
+                                                          parsed_args)
         except UnknownArgumentError as e:
             sys.stderr.write("\n")
             sys.stderr.write(str(e) + '\n')
@@ -537,8 +572,14 @@ class ServiceOperation(object):
                 return override
         else:
             # No override value was supplied.
+            # Arguments that change the response after the call, e.g.
+            # with an ``after-call`` handler, aren't covered by the
+            # response cache key, so these calls aren't cached.
+            cacheable = not self._changes_response(parsed_args,
+                                                   self.arg_table)
             return self._operation_caller.invoke(
-                self._operation_object, call_parameters, parsed_globals)
+                self._operation_object, call_parameters, parsed_globals,
+                cacheable=cacheable)
 
     def create_help_command(self):
         return OperationHelpCommand(
@@ -563,10 +604,23 @@ class ServiceOperation(object):
             py_name = arg_object.py_name
             if py_name in parsed_args:
                 value = parsed_args[py_name]
-                value = self._unpack_arg(arg_object, value)
+                if value is not None:
+                    # Arguments that weren't specified on the command
+                    # line have nothing to unpack, so we don't fire
+                    # load-cli-arg events for them.
+                    value = self._unpack_arg(arg_object, value)
                 arg_object.add_to_params(service_params, value)
         return service_params
 
+    def _changes_response(self, args, arg_table):
+        parsed_args = vars(args)
+        for arg_object in arg_table.values():
+            if not getattr(arg_object, 'changes_response', False):
+                continue
+            if parsed_args.get(arg_object.py_name) not in (None, False):
+                return True
+        return False
+
     def _unpack_arg(self, cli_argument, value):
         # Unpacks a commandline argument into a Python value by firing the
         # load-cli-arg.service-name.operation-name event.
@@ -626,21 +680,42 @@ class CLIOperationCaller(object):
 
     def __init__(self, session):
         self._session = session
+        self._response_cache = None
 
-    def invoke(self, operation_object, parameters, parsed_globals):
+    def invoke(self, operation_object, parameters, parsed_globals,
+               cacheable=True):
         # We could get an error from get_endpoint() about not having
         # a region configured.  Before this happens we want to check
         # for credentials so we can give a good error message.
         if not self._session.get_credentials():
             raise NoCredentialsError()
+        regions = getattr(parsed_globals, 'regions', None)
+        if regions:
+            return self._invoke_in_regions(operation_object, parameters,
+                                           parsed_globals, regions,
+                                           cacheable)
         endpoint = operation_object.service.get_endpoint(
             region_name=parsed_globals.region,
             endpoint_url=parsed_globals.endpoint_url,
             verify=parsed_globals.verify_ssl)
+        cache_ttl = self._get_cache_ttl(operation_object, parsed_globals,
+                                        cacheable)
         if operation_object.can_paginate and parsed_globals.paginate:
-            pages = operation_object.paginate(endpoint, **parameters)
+            if cache_ttl is not None:
+                pages = self._get_pages(operation_object, endpoint,
+                                        parameters, parsed_globals,
+                                        cache_ttl)
+            else:
+                pages = PrefetchingPageIterator(
+                    operation_object.paginate(endpoint, **parameters))
             self._display_response(operation_object, pages,
                                    parsed_globals)
+        elif cache_ttl is not None:
+            response_data = self._get_full_response(
+                operation_object, endpoint, parameters, parsed_globals,
+                cache_ttl)
+            self._display_response(operation_object, response_data,
+                                   parsed_globals)
         else:
             http_response, response_data = operation_object.call(endpoint,
                                                                  **parameters)
@@ -648,6 +723,126 @@ class CLIOperationCaller(object):
                                    parsed_globals)
         return 0
 
+    def _invoke_in_regions(self, operation_object, parameters,
+                           parsed_globals, regions, cacheable=True):
+        # Run the same operation in each region concurrently and
+        # display the results as a single document keyed by region.
+        if not is_read_only_operation(operation_object):
+            raise ValueError(
+                "%s is not a read-only operation and can't be used with "
+                "--regions or --all-regions." %
+                xform_name(operation_object.name, '-'))
+        # Endpoints are created up front, on this thread, so that
+        # only the operation calls happen in the worker threads.
+        endpoints = []
+        for region in regions:
+            endpoints.append((region, operation_object.service.get_endpoint(
+                region_name=region,
+                endpoint_url=parsed_globals.endpoint_url,
+                verify=parsed_globals.verify_ssl)))
+        cache_ttl = self._get_cache_ttl(operation_object, parsed_globals,
+                                        cacheable)
+
+        def call_in_region(region_endpoint):
+            region, endpoint = region_endpoint
+            try:
+                response_data = self._get_full_response(
+                    operation_object, endpoint, dict(parameters),
+                    parsed_globals, cache_ttl)
+                return region, response_data, None
+            except Exception as e:
+                LOG.debug("Error calling %s in region %s",
+                          operation_object.name, region, exc_info=True)
+                return region, None, e
+
+        results = concurrent_map(call_in_region, endpoints)
+        merged = OrderedDict()
+        failed = []
+        for region, response_data, error in results:
+            if error is None:
+                merged[region] = response_data
+            else:
+                failed.append((region, error))
+        # The merged document is no longer a paginated response, so it
+        # needs to be displayed like any other non paginated response.
+        # This means --query and --output text are applied to the whole
+        # document keyed by region, not to the pages of each region, as
+        # documented for --regions.
+        display_globals = copy.copy(parsed_globals)
+        display_globals.paginate = False
+        self._display_response(operation_object, merged, display_globals)
+        if failed:
+            for region, error in failed:
+                sys.stderr.write("\nError in region %s: %s\n" %
+                                 (region, error))
+            return 255
+        return 0
+
+    def _get_cache_ttl(self, operation_object, parsed_globals,
+                       cacheable=True):
+        # Returns the number of seconds responses can be cached for, or
+        # None if the response cache isn't used for this call.
+        if not cacheable or getattr(parsed_globals, 'no_cache', False) or \
+                not is_cacheable_operation(operation_object):
+            return None
+        cache_ttl = getattr(parsed_globals, 'cache_ttl', None)
+        if cache_ttl is None:
+            config_value = self._session.get_scoped_config().get(
+                CACHE_TTL_CONFIG_VAR)
+            if config_value is not None:
+                cache_ttl = parse_cache_ttl(config_value,
+                                            CACHE_TTL_CONFIG_VAR)
+        if not cache_ttl:
+            return None
+        if self._response_cache is None:
+            self._response_cache = get_response_cache()
+        return cache_ttl
+
+    def _get_full_response(self, operation_object, endpoint, parameters,
+                           parsed_globals, cache_ttl=None):
+        if cache_ttl is None:
+            return self._call_for_full_response(
+                operation_object, endpoint, parameters, parsed_globals)
+        if operation_object.can_paginate and parsed_globals.paginate:
+            return self._get_pages(
+                operation_object, endpoint, parameters, parsed_globals,
+                cache_ttl).build_full_result()
+        key = compute_cache_key(
+            operation_object, endpoint, parameters, self._session.profile,
+            self._session.get_credentials(), parsed_globals.paginate)
+        response_data = self._response_cache.get(key, cache_ttl)
+        if response_data is None:
+            response_data = self._call_for_full_response(
+                operation_object, endpoint, parameters, parsed_globals)
+            self._response_cache.set(key, response_data)
+        return response_data
+
+    def _get_pages(self, operation_object, endpoint, parameters,
+                   parsed_globals, cache_ttl):
+        # Returns a page iterator over the cached pages of a paginated
+        # operation, retrieving and caching the pages first if needed.
+        key = compute_cache_key(
+            operation_object, endpoint, parameters, self._session.profile,
+            self._session.get_credentials(), parsed_globals.paginate)
+        pages = self._response_cache.get(key, cache_ttl)
+        if pages is None:
+            pages = record_pages(
+                operation_object.paginate(endpoint, **parameters))
+            self._response_cache.set(key, pages)
+        return replay_pages(
+            operation_object.paginate(endpoint, **parameters), pages)
+
+    def _call_for_full_response(self, operation_object, endpoint,
+                                parameters, parsed_globals):
+        if operation_object.can_paginate and parsed_globals.paginate:
+            pages = operation_object.paginate(endpoint, **parameters)
+            response_data = pages.build_full_result()
+        else:
+            response_data = operation_object.call(endpoint, **parameters)[1]
+        if isinstance(response_data, dict):
+            response_data.pop('ResponseMetadata', None)
+        return response_data
+
     def _display_response(self, operation, response, args):
         output = args.output
         if output is None:
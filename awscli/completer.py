@@ -9,39 +9,184 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-import awscli.clidriver
+import os
 import sys
+import json
 import logging
 import copy
 
+from botocore import __version__ as botocore_version
+
+from awscli import EnvironmentVariables, __version__
+from awscli.configcache import CachedConfigSession
+from awscli.configcache import get_config_snapshot_cache
+from awscli.utils import write_file_atomically
+
 LOG = logging.getLogger(__name__)
+COMPLETION_INDEX_FILENAME = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'completion-index.json'))
+
+
+class CompletionIndex(object):
+    """Names of commands, options and option choices used for completion.
+
+    Building the command and argument tables needed to complete a command
+    line requires a fully initialized CLI driver, which is too slow to do
+    on every key press.  The index records what the completer needs from
+    each level of the command hierarchy the first time that level is
+    completed.  If a ``filename`` is given the index is also saved to disk,
+    so later invocations answer from a lookup and only create a driver
+    when they reach a command that has not been indexed yet.
+
+    The index is discarded whenever the CLI version, the botocore version,
+    the data path or the configured plugins change.
+
+    """
+    def __init__(self, session, filename=None, driver_factory=None):
+        self._session = session
+        self._filename = filename
+        self._driver_factory = driver_factory
+        self._driver = None
+        self._key = self._compute_key()
+        self._root = None
+
+    def _compute_key(self):
+        return {
+            'aws-cli': __version__,
+            'botocore': botocore_version,
+            'data_path': self._session.get_config_variable('data_path'),
+            'plugins': self._session.full_config.get('plugins', {}),
+        }
+
+    def commands(self, path):
+        """Return the names of all commands below ``path``.
+
+        The returned dict maps each command name to whether or not
+        the command is documented.
+
+        """
+        return self._get_node(path)['commands']
+
+    def options(self, path):
+        """Return the documented option names of the command at ``path``."""
+        return self._get_node(path)['options']
+
+    def choices(self, path, option_name):
+        """Return the known values of an option of the command at ``path``."""
+        return self._get_node(path)['choices'].get(option_name, [])
+
+    def _get_node(self, path):
+        if self._root is None:
+            self._root = self._load()
+        # Every command along the path is indexed on the way down, since
+        # its command table is needed to look up the next name.
+        node = self._root
+        needs_save = False
+        for depth in range(len(path) + 1):
+            if depth > 0:
+                node = node['commands'][path[depth - 1]]
+            if 'options' not in node:
+                self._expand(node, path[:depth])
+                needs_save = True
+        if needs_save:
+            self._save()
+        return node
+
+    def _load(self):
+        if self._filename is not None:
+            try:
+                with open(self._filename) as f:
+                    data = json.load(f)
+            except (IOError, OSError, ValueError):
+                LOG.debug("Unable to load completion index from %s",
+                          self._filename, exc_info=True)
+            else:
+                if data.get('key') == self._key:
+                    return data['root']
+                LOG.debug("Discarding stale completion index %s",
+                          self._filename)
+        return {}
+
+    def _save(self):
+        if self._filename is None:
+            return
+        content = json.dumps({'key': self._key, 'root': self._root},
+                             separators=(',', ':'))
+        try:
+            write_file_atomically(self._filename, content.encode('utf-8'))
+        except (IOError, OSError):
+            LOG.debug("Unable to save completion index to %s",
+                      self._filename, exc_info=True)
+
+    def _expand(self, node, path):
+        help_command = self._get_help_command(path)
+        node['commands'] = dict(
+            (name, {'documented': self._is_documented(command)})
+            for name, command in help_command.command_table.items())
+        node['options'] = []
+        node['choices'] = {}
+        for name, argument in help_command.arg_table.items():
+            if not self._is_documented(argument):
+                continue
+            node['options'].append(name)
+            choices = self._get_choices(argument)
+            if choices:
+                node['choices']['--' + name] = choices
+
+    def _get_help_command(self, path):
+        if self._driver is None:
+            if self._driver_factory is None:
+                # Importing the driver pulls in every command module, so
+                # it's deferred until a command actually needs indexing.
+                from awscli.clidriver import create_clidriver
+                self._driver_factory = create_clidriver
+            self._driver = self._driver_factory()
+        help_command = self._driver.create_help_command()
+        for name in path:
+            command = help_command.command_table[name]
+            help_command = command.create_help_command()
+        return help_command
+
+    def _is_documented(self, command):
+        return not (getattr(command, '_UNDOCUMENTED', False) or
+                    getattr(command, 'positional_arg', False))
+
+    def _get_choices(self, argument):
+        choices = argument.choices
+        if not choices:
+            model = getattr(argument, 'argument_model', None)
+            if model is not None:
+                choices = model.metadata.get('enum')
+        return list(choices or [])
 
 
 class Completer(object):
 
-    def __init__(self):
-        self.driver = awscli.clidriver.create_clidriver()
-        self.main_hc = self.driver.create_help_command()
-        self.main_options = self._documented(self.main_hc.arg_table)
+    def __init__(self, index_filename=None):
+        self.session = CachedConfigSession(
+            EnvironmentVariables,
+            config_snapshot_cache=get_config_snapshot_cache())
+        self.index = CompletionIndex(self.session, index_filename)
+        self.main_options = self.index.options([])
         self.cmdline = None
         self.point = None
-        self.command_hc = None
-        self.subcommand_hc = None
         self.command_name = None
         self.subcommand_name = None
         self.current_word = None
         self.previous_word = None
         self.non_options = None
 
+    def _command_path(self):
+        return [name for name in (self.command_name, self.subcommand_name)
+                if name is not None]
+
     def _complete_option(self, option_name):
-        if option_name == '--endpoint-url':
-            return []
-        if option_name == '--output':
-            cli_data = self.driver.session.get_data('cli')
-            return cli_data['options']['output']['choices']
         if option_name == '--profile':
-            return self.driver.session.available_profiles
-        return []
+            return self.session.available_profiles
+        choices = self.index.choices([], option_name)
+        if not choices and self.subcommand_name:
+            choices = self.index.choices(self._command_path(), option_name)
+        return choices
 
     def _complete_provider(self):
         retval = []
@@ -51,37 +196,33 @@ class Completer(object):
                  if n.startswith(cw)]
             retval = l
         elif self.current_word == 'aws':
-            retval = self._documented(self.main_hc.command_table)
+            retval = self._documented(self.index.commands([]))
         else:
             # Otherwise, see if they have entered a partial command name
-            retval = self._documented(self.main_hc.command_table,
+            retval = self._documented(self.index.commands([]),
                                       startswith=self.current_word)
         return retval
 
     def _complete_command(self):
         retval = []
+        commands = self.index.commands([self.command_name])
         if self.current_word == self.command_name:
-            if self.command_hc:
-                retval = self._documented(self.command_hc.command_table)
+            retval = self._documented(commands)
         elif self.current_word.startswith('-'):
             retval = self._find_possible_options()
         else:
             # See if they have entered a partial command name
-            if self.command_hc:
-                retval = self._documented(self.command_hc.command_table,
-                                          startswith=self.current_word)
+            retval = self._documented(commands, startswith=self.current_word)
         return retval
 
-    def _documented(self, table, startswith=None):
+    def _documented(self, commands, startswith=None):
         names = []
-        for key, command in table.items():
-            if getattr(command, '_UNDOCUMENTED', False):
+        for key, command in commands.items():
+            if not command['documented']:
                 # Don't tab complete undocumented commands/params
                 continue
             if startswith is not None and not key.startswith(startswith):
                 continue
-            if getattr(command, 'positional_arg', False):
-                continue
             names.append(key)
         return names
 
@@ -95,8 +236,9 @@ class Completer(object):
 
     def _find_possible_options(self):
         all_options = copy.copy(self.main_options)
-        if self.subcommand_hc:
-            all_options = all_options + self._documented(self.subcommand_hc.arg_table)
+        if self.subcommand_name:
+            all_options = all_options + self.index.options(
+                self._command_path())
         for opt in self.options:
             # Look thru list of options on cmdline. If there are
             # options that have already been specified and they are
@@ -131,24 +273,22 @@ class Completer(object):
         self.non_options = [w for w in self.words if not w.startswith('-')]
         self.options = [w for w in self.words if w.startswith('-')]
         # Look for a command name in the non_options
+        commands = self.index.commands([])
         for w in self.non_options:
-            if w in self.main_hc.command_table:
+            if w in commands:
                 self.command_name = w
-                cmd_obj = self.main_hc.command_table[self.command_name]
-                self.command_hc = cmd_obj.create_help_command()
-                if self.command_hc and self.command_hc.command_table:
-                    # Look for subcommand name
-                    for w in self.non_options:
-                        if w in self.command_hc.command_table:
-                            self.subcommand_name = w
-                            cmd_obj = self.command_hc.command_table[self.subcommand_name]
-                            self.subcommand_hc = cmd_obj.create_help_command()
-                            break
+                subcommands = self.index.commands([self.command_name])
+                # Look for subcommand name
+                for w in self.non_options:
+                    if w in subcommands:
+                        self.subcommand_name = w
+                        break
                 break
 
     def complete(self, cmdline, point):
         self.cmdline = cmdline
         self.command_name = None
+        self.subcommand_name = None
         if point is None:
             point = len(cmdline)
         self.point = point
@@ -163,7 +303,7 @@ class Completer(object):
 
 
 def complete(cmdline, point):
-    choices = Completer().complete(cmdline, point)
+    choices = Completer(COMPLETION_INDEX_FILENAME).complete(cmdline, point)
     print(' \n'.join(choices))
 
 
@@ -0,0 +1,251 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""Snapshots of parsed config files.
+
+Parsing the INI formatted config and credentials files is repeated on
+every invocation of the CLI.  A ``ConfigSnapshotCache`` stores the
+parsed result in a pickle, along with the modification time, size and
+inode of each file it was parsed from, and returns it for as long as
+none of the files have changed.  Since snapshots of the credentials file
+contain secret keys, whenever a snapshot is written any other snapshot
+whose files no longer exist or have changed is removed.
+
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import botocore.config
+import botocore.session
+from botocore import __version__ as botocore_version
+from botocore.credentials import SharedCredentialProvider
+
+from awscli import __version__
+from awscli.compat import six
+from awscli.utils import write_file_atomically
+
+
+LOG = logging.getLogger(__name__)
+CONFIG_SNAPSHOT_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'config-cache'))
+# The pickle protocol used for snapshots, which can be read by python 2
+# and python 3.
+PICKLE_PROTOCOL = 2
+# Files modified less than this many seconds ago aren't snapshotted.  A
+# file can be rewritten in place within the resolution of its
+# modification time (a second on some file systems) without changing
+# its size or inode, so a snapshot taken in that window could outlive
+# the contents it was parsed from.
+MIN_FILE_AGE = 2
+
+
+def get_config_snapshot_cache():
+    """
+    Return the ConfigSnapshotCache used to store parsed config files.
+    """
+    return ConfigSnapshotCache()
+
+
+def _expand_path(filename):
+    # This is the same expansion botocore applies to config file paths.
+    return os.path.expandvars(os.path.expanduser(filename))
+
+
+class ConfigSnapshotCache(object):
+    """
+    On-disk cache of parsed config files.
+
+    :param cache_dir: The directory the snapshots are stored in.
+    """
+
+    def __init__(self, cache_dir=CONFIG_SNAPSHOT_DIR):
+        self._cache_dir = cache_dir
+
+    def load(self, filenames, parse):
+        """
+        Return the result of parsing ``filenames``.
+
+        :param filenames: The files the result depends on.
+        :param parse: A function that accepts no arguments and parses
+            the files.  It's only called if there is no snapshot for the
+            current version of the files.
+        """
+        filenames = [_expand_path(filename) for filename in filenames]
+        file_stats = self._stat_files(filenames)
+        if not any(file_stats):
+            # There is nothing to parse, so there's nothing to save.
+            return parse()
+        key = {
+            'aws-cli': __version__,
+            'botocore': botocore_version,
+            'filenames': filenames,
+            'files': file_stats,
+        }
+        snapshot_filename = self._convert_filenames(filenames)
+        parsed = self._read_snapshot(snapshot_filename, key)
+        if parsed is None:
+            parsed = parse()
+            self._remove_stale_snapshots()
+            if self._recently_modified(file_stats):
+                LOG.debug("Not saving config snapshot %s, config files "
+                          "were modified too recently.", snapshot_filename)
+            else:
+                self._write_snapshot(snapshot_filename, key, parsed)
+        return parsed
+
+    def clear(self):
+        """
+        Remove all snapshots.
+        """
+        try:
+            names = os.listdir(self._cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.pickle'):
+                continue
+            try:
+                os.remove(os.path.join(self._cache_dir, name))
+            except OSError:
+                LOG.debug("Unable to remove config snapshot %s", name,
+                          exc_info=True)
+
+    def _recently_modified(self, file_stats):
+        now = time.time()
+        return any(now - stat[0] < MIN_FILE_AGE
+                   for stat in file_stats if stat is not None)
+
+    def _stat_files(self, filenames):
+        file_stats = []
+        for filename in filenames:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                file_stats.append(None)
+                continue
+            file_stats.append((stat.st_mtime, stat.st_size, stat.st_ino))
+        return file_stats
+
+    def _read_snapshot(self, snapshot_filename, key):
+        # The key is pickled separately, ahead of the parsed config, so
+        # that it can be checked without loading the rest.
+        try:
+            with open(snapshot_filename, 'rb') as f:
+                snapshot_key = six.moves.cPickle.load(f)
+                if snapshot_key != key:
+                    LOG.debug("Config snapshot %s is out of date.",
+                              snapshot_filename)
+                    return None
+                return six.moves.cPickle.load(f)
+        except Exception:
+            # A missing, truncated or incompatible snapshot is replaced.
+            return None
+
+    def _remove_stale_snapshots(self):
+        # Snapshots of files that were moved, removed or changed would
+        # otherwise stay on disk, along with any secret keys in them.
+        try:
+            names = os.listdir(self._cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.pickle'):
+                continue
+            snapshot_filename = os.path.join(self._cache_dir, name)
+            try:
+                with open(snapshot_filename, 'rb') as f:
+                    snapshot_key = six.moves.cPickle.load(f)
+                filenames = snapshot_key['filenames']
+                file_stats = snapshot_key['files']
+            except Exception:
+                # Snapshots this version can't read are replaced by the
+                # version that wrote them.
+                continue
+            if self._stat_files(filenames) == file_stats:
+                continue
+            LOG.debug("Removing stale config snapshot %s", snapshot_filename)
+            try:
+                os.remove(snapshot_filename)
+            except OSError:
+                pass
+
+    def _write_snapshot(self, snapshot_filename, key, parsed):
+        try:
+            contents = (
+                six.moves.cPickle.dumps(key, PICKLE_PROTOCOL) +
+                six.moves.cPickle.dumps(parsed, PICKLE_PROTOCOL))
+            write_file_atomically(snapshot_filename, contents)
+        except (IOError, OSError):
+            LOG.debug("Unable to save config snapshot %s", snapshot_filename,
+                      exc_info=True)
+
+    def _convert_filenames(self, filenames):
+        # Snapshots of python 2 and python 3 strings aren't compatible,
+        # so each major version has its own snapshots.
+        name = json.dumps([sys.version_info[0]] + filenames)
+        return os.path.join(
+            self._cache_dir,
+            hashlib.sha1(name.encode('utf-8')).hexdigest() + '.pickle')
+
+
+class CachedConfigSession(botocore.session.Session):
+    """
+    A botocore Session that reads ``full_config`` from a snapshot.
+
+    :param config_snapshot_cache: The ``ConfigSnapshotCache`` to use.  If
+        it's None, the config files are parsed as usual.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.config_snapshot_cache = kwargs.pop('config_snapshot_cache', None)
+        super(CachedConfigSession, self).__init__(*args, **kwargs)
+
+    @property
+    def full_config(self):
+        if self._config is None and self.config_snapshot_cache is not None:
+            # The full config includes the profiles from the
+            # credentials file, so the snapshot depends on both files.
+            self._config = self.config_snapshot_cache.load(
+                [self.get_config_variable('config_file'),
+                 self.get_config_variable('credentials_file')],
+                lambda: super(CachedConfigSession, self).full_config)
+        return super(CachedConfigSession, self).full_config
+
+
+def register_config_snapshot(event_handlers):
+    event_handlers.register('session-initialized',
+                            inject_cached_credentials_file_provider,
+                            unique_id='inject_cached_shared_cred_provider')
+
+
+def inject_cached_credentials_file_provider(session, **kwargs):
+    # The shared-credentials-file provider parses the credentials file
+    # again itself, so it's given a parser that uses the snapshot cache.
+    cache = getattr(session, 'config_snapshot_cache', None)
+    if cache is None:
+        return
+    provider = SharedCredentialProvider(
+        creds_filename=session.get_config_variable('credentials_file'),
+        profile_name=session.get_config_variable('profile') or 'default',
+        ini_parser=lambda filename: cache.load(
+            [filename], lambda: botocore.config.raw_config_parse(filename)))
+    try:
+        cred_chain = session.get_component('credential_provider')
+        cred_chain.insert_after(provider.METHOD, provider)
+        cred_chain.remove(provider.METHOD)
+    except Exception:
+        LOG.debug("Not using config snapshots for the credentials file, "
+                  "credential provider from session could not be created.")
@@ -1,3 +1,4 @@
+import copy
 import os
 import time
 import json
@@ -12,8 +13,14 @@ from botocore import credentials
 from botocore.compat import total_seconds
 from botocore.exceptions import PartialCredentialsError
 
+from awscli.utils import FileLock
+from awscli.utils import write_file_atomically
+
 
 LOG = logging.getLogger(__name__)
+# How long to wait for another process to finish refreshing a cache entry
+# before refreshing it anyway.
+CACHE_LOCK_TIMEOUT = 10
 
 
 class InvalidConfigError(Exception):
@@ -92,24 +99,36 @@ class JSONFileCache(object):
     objects.
 
     The objects are serialized to JSON and stored in a file.  These
-    values can be retrieved at a later time.
+    values can be retrieved at a later time.  Values are also kept in
+    memory once they've been read or written, so looking up the same
+    key again doesn't read the file.  ``lock()`` is used to coordinate
+    updates to a key with other processes.
 
     """
     def __init__(self, working_dir):
         self._working_dir = working_dir
+        self._memory = {}
 
     def __contains__(self, cache_key):
+        if cache_key in self._memory:
+            return True
         actual_key = self._convert_cache_key(cache_key)
         return os.path.isfile(actual_key)
 
     def __getitem__(self, cache_key):
         """Retrieve value from a cache key."""
+        try:
+            return copy.deepcopy(self._memory[cache_key])
+        except KeyError:
+            pass
         actual_key = self._convert_cache_key(cache_key)
         try:
             with open(actual_key) as f:
-                return json.load(f)
+                value = json.load(f)
         except (OSError, ValueError, IOError):
             raise KeyError(cache_key)
+        self._memory[cache_key] = value
+        return copy.deepcopy(value)
 
     def __setitem__(self, cache_key, value):
         full_key = self._convert_cache_key(cache_key)
@@ -118,17 +137,55 @@ class JSONFileCache(object):
         except (TypeError, ValueError):
             raise ValueError("Value cannot be cached, must be "
                              "JSON serializable: %s" % value)
-        if not os.path.isdir(self._working_dir):
-            os.makedirs(self._working_dir)
-        with os.fdopen(os.open(full_key,
-                               os.O_WRONLY | os.O_CREAT, 0o600), 'w') as f:
-            f.write(file_content)
+        # The file is replaced atomically, so another process reading
+        # the cache never sees a partially written entry.  The temporary
+        # file is created with 0600 permissions.
+        write_file_atomically(full_key, file_content.encode('utf-8'))
+        self._memory[cache_key] = json.loads(file_content)
+
+    def lock(self, cache_key):
+        """Return a lock on ``cache_key`` shared with other processes.
+
+        The lock is used as a context manager around checking whether
+        an entry needs to be refreshed and refreshing it, so only one
+        process refreshes the entry at a time.  The in memory copy of
+        the entry is discarded when the lock is acquired, so the entry
+        is read again from the file in case another process updated it.
+
+        """
+        lock_filename = os.path.join(self._working_dir, cache_key + '.lock')
+        return _CacheEntryLock(self, cache_key, lock_filename)
+
+    def forget(self, cache_key):
+        """Discard the in memory copy of ``cache_key``."""
+        self._memory.pop(cache_key, None)
 
     def _convert_cache_key(self, cache_key):
         full_path = os.path.join(self._working_dir, cache_key + '.json')
         return full_path
 
 
+class _CacheEntryLock(FileLock):
+    def __init__(self, cache, cache_key, filename):
+        super(_CacheEntryLock, self).__init__(
+            filename, timeout=CACHE_LOCK_TIMEOUT)
+        self._cache = cache
+        self._cache_key = cache_key
+
+    def __enter__(self):
+        super(_CacheEntryLock, self).__enter__()
+        self._cache.forget(self._cache_key)
+        return self
+
+
+class _NullLock(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
 class AssumeRoleProvider(credentials.CredentialProvider):
 
     METHOD = 'assume-role'
@@ -201,14 +258,32 @@ class AssumeRoleProvider(credentials.CredentialProvider):
         if creds is not None:
             LOG.debug("Credentials for role retrieved from cache.")
             return creds
-        else:
+        cache_key = self._create_cache_key()
+        # Any MFA code is prompted for before taking the lock, so other
+        # processes aren't kept waiting on the user.
+        assume_role_kwargs = self._assume_role_base_kwargs(
+            self._get_role_config_values())
+        with self._lock_cache_entry(cache_key):
+            # Another process may have refreshed the credentials while
+            # we were waiting for the lock.
+            creds = self._load_creds_from_cache()
+            if creds is not None:
+                LOG.debug("Credentials for role retrieved from cache.")
+                return creds
             # We get the Credential used by botocore as well
             # as the original parsed response from the server.
-            creds, response = self._retrieve_temp_credentials()
-            cache_key = self._create_cache_key()
+            creds, response = self._retrieve_temp_credentials(
+                assume_role_kwargs)
             self._write_cached_credentials(response, cache_key)
             return creds
 
+    def _lock_cache_entry(self, cache_key):
+        # A cache that only lives in memory (e.g. a dict) doesn't need
+        # to coordinate with other processes.
+        if hasattr(self._cache, 'lock'):
+            return self._cache.lock(cache_key)
+        return _NullLock()
+
     def _load_creds_from_cache(self):
         cache_key = self._create_cache_key()
         try:
@@ -294,12 +369,11 @@ class AssumeRoleProvider(credentials.CredentialProvider):
         )
         return client
 
-    def _retrieve_temp_credentials(self):
+    def _retrieve_temp_credentials(self, assume_role_kwargs):
         LOG.debug("Retrieving credentials via AssumeRole.")
         config = self._get_role_config_values()
         client = self._create_client_from_config(config)
 
-        assume_role_kwargs = self._assume_role_base_kwargs(config)
         role_session_name = 'AWS-CLI-session-%s' % (int(time.time()))
         assume_role_kwargs['RoleSessionName'] = role_session_name
 
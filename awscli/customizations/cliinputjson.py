@@ -11,10 +11,21 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import json
+import logging
+import sys
 
+from botocore.exceptions import NoCredentialsError
+
+from awscli.compat import six
 from awscli.paramfile import get_paramfile
 from awscli.argprocess import ParamError
+from awscli.arguments import CustomArgument
 from awscli.customizations.arguments import OverrideRequiredArgsArgument
+from awscli.utils import concurrent_imap
+from awscli.utils import json_encoder
+
+
+LOG = logging.getLogger(__name__)
 
 
 def register_cli_input_json(cli):
@@ -27,6 +38,14 @@ def add_cli_input_json(operation, argument_table, **kwargs):
     if 'outfile' not in argument_table:
         cli_input_json_argument = CliInputJSONArgument(operation)
         cli_input_json_argument.add_to_arg_table(argument_table)
+        cli_input_json_lines_argument = CliInputJSONLinesArgument(operation)
+        cli_input_json_lines_argument.add_to_arg_table(argument_table)
+        unordered_argument = CustomArgument(
+            'cli-input-json-lines-unordered', action='store_true',
+            help_text='Write the results of ``--cli-input-json-lines`` as '
+                      'soon as each call completes instead of in the order '
+                      'of the input lines.')
+        unordered_argument.add_to_arg_table(argument_table)
 
 
 class CliInputJSONArgument(OverrideRequiredArgsArgument):
@@ -83,3 +102,134 @@ class CliInputJSONArgument(OverrideRequiredArgsArgument):
             # present.
             if input_key not in call_parameters:
                 call_parameters[input_key] = input_data[input_key]
+
+
+class CliInputJSONLinesArgument(OverrideRequiredArgsArgument):
+    """This argument performs the operation once per line of JSON input.
+
+    Each line of the input is a JSON document in the same format as
+    ``--cli-input-json``.  The operation is called for every line on a
+    pool of threads that all share a single endpoint, so connections
+    are reused across calls.  Each result is written to standard output
+    as a single line of JSON.
+    """
+    ARG_DATA = {
+        'name': 'cli-input-json-lines',
+        'help_text': 'Performs the service operation once for every line of '
+                     'the given file, or standard input if ``-`` is '
+                     'specified. Each line is a JSON string in the format '
+                     'provided by ``--generate-cli-skeleton``. If other '
+                     'arguments are provided on the command line, the CLI '
+                     'values will override the JSON-provided values for '
+                     'every line. The calls are made concurrently and each '
+                     'result is written as a line of JSON with the '
+                     '``Index`` of the input line and either the '
+                     '``Response`` or the ``Error`` for that line.',
+        'no_paramfile': True,
+    }
+    MAX_WORKERS = 10
+
+    def __init__(self, operation_object):
+        self._operation_object = operation_object
+        self._source = None
+        super(CliInputJSONLinesArgument, self).__init__(
+            self._operation_object.session)
+
+    def _register_argument_action(self):
+        self._operation_object.session.register(
+            'calling-command', self.call_for_each_line)
+        super(CliInputJSONLinesArgument, self)._register_argument_action()
+
+    def add_to_params(self, parameters, value):
+        # The value is not a parameter of the operation.  We only hold
+        # on to it so ``call_for_each_line`` knows the argument was
+        # specified for this particular operation.
+        self._source = value
+
+    def call_for_each_line(self, call_parameters, parsed_args,
+                           parsed_globals, stream=None, **kwargs):
+        if self._source is None:
+            return
+        if stream is None:
+            stream = sys.stdout
+        session = self._operation_object.session
+        if not session.get_credentials():
+            raise NoCredentialsError()
+        endpoint = self._operation_object.service.get_endpoint(
+            region_name=parsed_globals.region,
+            endpoint_url=parsed_globals.endpoint_url,
+            verify=parsed_globals.verify_ssl)
+        ordered = not getattr(parsed_args, 'cli_input_json_lines_unordered',
+                              False)
+
+        def call_line(indexed_line):
+            return self._call_line(endpoint, call_parameters, parsed_globals,
+                                   *indexed_line)
+
+        rc = 0
+        input_file = self._open_source(self._source)
+        try:
+            results = concurrent_imap(call_line,
+                                      self._indexed_lines(input_file),
+                                      max_workers=self.MAX_WORKERS,
+                                      ordered=ordered)
+            for result in results:
+                if 'Error' in result:
+                    rc = 255
+                stream.write(json.dumps(result, default=json_encoder))
+                stream.write('\n')
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            stream.flush()
+        return rc
+
+    def _open_source(self, source):
+        if source == '-':
+            return sys.stdin
+        if source.startswith('file://'):
+            source = source[len('file://'):]
+        try:
+            return open(source, 'r')
+        except IOError as e:
+            raise ParamError(self.name, "Unable to open %s: %s" % (source, e))
+
+    def _indexed_lines(self, input_file):
+        index = 0
+        for line in input_file:
+            if not line.strip():
+                continue
+            yield index, line
+            index += 1
+
+    def _call_line(self, endpoint, call_parameters, parsed_globals, index,
+                   line):
+        try:
+            input_data = json.loads(line)
+            if not isinstance(input_data, dict):
+                raise ValueError("Expected a JSON object, received: %s"
+                                 % line.strip())
+            # Values from the command line take precedence over the values
+            # from each line, same as with --cli-input-json.
+            parameters = dict(input_data)
+            parameters.update(call_parameters)
+            response = self._call_operation(endpoint, parameters,
+                                            parsed_globals)
+        except Exception as e:
+            LOG.debug("Error calling %s for input line %s",
+                      self._operation_object.name, index, exc_info=True)
+            return {'Index': index, 'Error': six.text_type(e)}
+        return {'Index': index, 'Response': response}
+
+    def _call_operation(self, endpoint, parameters, parsed_globals):
+        operation = self._operation_object
+        if operation.can_paginate and parsed_globals.paginate:
+            response = operation.paginate(
+                endpoint, **parameters).build_full_result()
+        else:
+            response = operation.call(endpoint, **parameters)[1]
+        if isinstance(response, dict):
+            response.pop('ResponseMetadata', None)
+        if parsed_globals.query is not None:
+            response = parsed_globals.query.search(response)
+        return response
@@ -15,6 +15,7 @@ import logging
 import sys
 
 from awscli.customizations.commands import BasicCommand
+from awscli.customizations.cloudtrailsearch import CloudTrailSearch
 from botocore.vendored import requests
 from botocore.exceptions import ClientError
 
@@ -43,6 +44,7 @@ def inject_commands(command_table, session, **kwargs):
     """
     command_table['create-subscription'] = CloudTrailSubscribe(session)
     command_table['update-subscription'] = CloudTrailUpdate(session)
+    command_table['search-logs'] = CloudTrailSearch(session)
 
 
 class CloudTrailSubscribe(BasicCommand):
@@ -0,0 +1,439 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""Search the log files a trail delivers to S3.
+
+CloudTrail writes a gzipped JSON file of records every few minutes for
+each account and region, under keys of the form::
+
+    <prefix>/AWSLogs/<account>/CloudTrail/<region>/<yyyy>/<mm>/<dd>/
+        <account>_CloudTrail_<region>_<yyyymmddThhmmZ>_<id>.json.gz
+
+``search-logs`` lists the days of a time window, downloads the files
+concurrently and decompresses and parses each one as a stream, so only
+a chunk of a file and the records that matched are held in memory at
+once.  Downloaded files are kept in a size bounded cache, so searching
+the same window again with different filters doesn't download them a
+second time.
+
+"""
+import codecs
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import zlib
+
+from dateutil.parser import parse
+from dateutil.tz import tzutc
+
+from awscli.customizations.commands import BasicCommand
+from awscli.utils import concurrent_imap
+from awscli.utils import prune_lru_files
+from awscli.utils import write_file_atomically
+
+
+LOG = logging.getLogger(__name__)
+LOG_FILE_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'cloudtrail-cache'))
+DEFAULT_MAX_LOG_FILE_CACHE_SIZE = 1024 * 1024 * 1024
+MAX_CONCURRENT_DOWNLOADS = 10
+READ_CHUNK_SIZE = 64 * 1024
+# A log file is named after the time it was delivered, which is
+# typically within 15 minutes of the calls it records.  Files delivered
+# up to this long after the end of the window are searched as well.
+LOG_DELIVERY_WINDOW = datetime.timedelta(minutes=30)
+EVENT_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+_LOG_FILE_TIME = re.compile(r'_(\d{8}T\d{4})Z_[^/]*$')
+_RECORDS_START = re.compile(r'\s*\{\s*"Records"\s*:\s*\[')
+_RECORD_SEPARATOR = re.compile(r'[\s,]*')
+# The most that's read looking for the start of the records array
+# before falling back to parsing the whole file.
+_MAX_RECORDS_START = 1024
+
+
+class CloudTrailSearch(BasicCommand):
+    NAME = 'search-logs'
+    DESCRIPTION = (
+        'Searches the log files a trail has delivered to S3 for the '
+        'records of calls made between ``--start-time`` and '
+        '``--end-time``, and prints each record that matches the '
+        'filters given as a line of JSON.  When more than one value is '
+        'given for a filter, records matching any of them are printed.  '
+        'Log files are downloaded concurrently, and are kept in a local '
+        'cache so later searches of the same time window do not '
+        'download them again.')
+    SYNOPSIS = ('aws cloudtrail search-logs (--name trail-name | '
+                '--s3-bucket bucket-name [--s3-prefix prefix]) '
+                '--start-time time [--end-time time] '
+                '[--event-name name ...] [--user user ...] '
+                '[--resource resource ...]')
+
+    ARG_TABLE = [
+        {'name': 'name',
+         'help_text': 'The name of the trail whose logs are searched.'},
+        {'name': 's3-bucket',
+         'help_text': ('The bucket the logs are in.  Used instead of '
+                       'looking up the bucket of ``--name``.')},
+        {'name': 's3-prefix',
+         'help_text': 'The S3 key prefix of the logs in ``--s3-bucket``.'},
+        {'name': 'start-time', 'required': True,
+         'help_text': ('The start of the time window.  Times without a '
+                       'timezone are in UTC.')},
+        {'name': 'end-time',
+         'help_text': 'The end of the time window.  Defaults to now.'},
+        {'name': 'event-name', 'nargs': '+',
+         'help_text': 'Only print records of these calls, e.g. RunInstances.'},
+        {'name': 'user', 'nargs': '+',
+         'help_text': ('Only print records of calls made by these users.  '
+                       'A user can be given as a user name, ARN, principal '
+                       'ID or access key ID.')},
+        {'name': 'resource', 'nargs': '+',
+         'help_text': ('Only print records of calls that name these '
+                       'resources, either as an ARN in the resources of '
+                       'the record or as a value of a request parameter.')},
+    ]
+
+    def _run_main(self, args, parsed_globals):
+        if (args.name is None) == (args.s3_bucket is None):
+            raise ValueError('Either --name or --s3-bucket must be '
+                             'specified, but not both.')
+        start_time = _parse_time(args.start_time)
+        if args.end_time is not None:
+            end_time = _parse_time(args.end_time)
+        else:
+            end_time = datetime.datetime.now(tzutc())
+        if start_time > end_time:
+            raise ValueError('--start-time must be before --end-time.')
+        self.setup_services(parsed_globals)
+        if args.name is not None:
+            bucket, prefix = self._get_trail_location(args.name)
+        else:
+            bucket, prefix = args.s3_bucket, args.s3_prefix
+        record_filter = RecordFilter(
+            start_time, end_time, event_names=args.event_name,
+            users=args.user, resources=args.resource)
+        cache = get_log_file_cache()
+        log_files = self._list_log_files(bucket, prefix, start_time,
+                                         end_time)
+        try:
+            matches = concurrent_imap(
+                lambda log_file: self._search_log_file(
+                    bucket, log_file, record_filter, cache),
+                log_files, max_workers=MAX_CONCURRENT_DOWNLOADS)
+            for records in matches:
+                for record in records:
+                    sys.stdout.write(json.dumps(record) + '\n')
+        finally:
+            cache.prune()
+        return 0
+
+    def setup_services(self, parsed_globals):
+        client_args = {
+            'region_name': parsed_globals.region,
+            'verify': parsed_globals.verify_ssl,
+        }
+        self.s3 = self._session.create_client('s3', **client_args)
+        # As with the subscription commands, the endpoint is designated
+        # for the cloudtrail service.
+        if parsed_globals.endpoint_url is not None:
+            client_args['endpoint_url'] = parsed_globals.endpoint_url
+        self.cloudtrail = self._session.create_client('cloudtrail',
+                                                      **client_args)
+
+    def _get_trail_location(self, name):
+        trails = self.cloudtrail.describe_trails(
+            trailNameList=[name])['trailList']
+        if not trails:
+            raise ValueError('Trail not found: %s' % name)
+        return trails[0]['S3BucketName'], trails[0].get('S3KeyPrefix')
+
+    def _list_log_files(self, bucket, prefix, start_time, end_time):
+        # The newest file that can hold records from the window.
+        last_time = end_time + LOG_DELIVERY_WINDOW
+        day_prefixes = []
+        for region_prefix in self._list_region_prefixes(bucket, prefix):
+            day = start_time.date()
+            while day <= last_time.date():
+                day_prefixes.append(
+                    region_prefix + day.strftime('%Y/%m/%d/'))
+                day += datetime.timedelta(days=1)
+        # A day holds a few hundred files per region, so each day is
+        # listed in full, several days at a time.
+        listings = concurrent_imap(
+            lambda day_prefix: list(self._list(bucket, day_prefix,
+                                               'Contents')),
+            day_prefixes)
+        for listing in listings:
+            for log_file in listing:
+                file_time = _get_log_file_time(log_file['Key'])
+                if file_time is None:
+                    continue
+                if start_time <= file_time <= last_time:
+                    yield log_file
+
+    def _list_region_prefixes(self, bucket, prefix):
+        logs_prefix = 'AWSLogs/'
+        if prefix:
+            logs_prefix = prefix.rstrip('/') + '/' + logs_prefix
+        for account in self._list(bucket, logs_prefix, 'CommonPrefixes',
+                                  delimiter='/'):
+            region_prefixes = self._list(
+                bucket, account['Prefix'] + 'CloudTrail/', 'CommonPrefixes',
+                delimiter='/')
+            for region in region_prefixes:
+                yield region['Prefix']
+
+    def _list(self, bucket, prefix, result_key, delimiter=None):
+        kwargs = {'Bucket': bucket, 'Prefix': prefix}
+        if delimiter is not None:
+            kwargs['Delimiter'] = delimiter
+        paginator = self.s3.get_paginator('list_objects')
+        for page in paginator.paginate(**kwargs):
+            for item in page.get(result_key, []):
+                yield item
+
+    def _search_log_file(self, bucket, log_file, record_filter, cache):
+        key = log_file['Key']
+
+        def download(fileobj):
+            LOG.debug('Downloading log file %s', key)
+            body = self.s3.get_object(Bucket=bucket, Key=key,
+                                      IfMatch=log_file['ETag'])['Body']
+            for chunk in iter(lambda: body.read(READ_CHUNK_SIZE), b''):
+                fileobj.write(chunk)
+
+        with cache.open(bucket, key, log_file['ETag'], download) as f:
+            records = iter_log_records(_iter_decompressed(f))
+            return [record for record in records if record_filter(record)]
+
+
+def _parse_time(value):
+    try:
+        parsed = parse(value)
+    except (ValueError, OverflowError):
+        raise ValueError('Invalid time: %s' % value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tzutc())
+    return parsed.astimezone(tzutc())
+
+
+def _get_log_file_time(key):
+    match = _LOG_FILE_TIME.search(key)
+    if match is None:
+        return None
+    return datetime.datetime.strptime(
+        match.group(1), '%Y%m%dT%H%M').replace(tzinfo=tzutc())
+
+
+def _iter_decompressed(fileobj):
+    # The window bits also accept a gzip header.
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for data in iter(lambda: fileobj.read(READ_CHUNK_SIZE), b''):
+        yield decoder.decode(decompressor.decompress(data))
+    yield decoder.decode(decompressor.flush(), final=True)
+
+
+def iter_log_records(chunks):
+    """Yield the records of a log file from chunks of its text.
+
+    Log files are a JSON object with a single ``Records`` array, whose
+    elements are decoded one at a time as the chunks arrive.  A file
+    that doesn't start with the ``Records`` array is parsed in full.
+
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        if not started:
+            match = _RECORDS_START.match(buffer)
+            if match is None:
+                if len(buffer) < _MAX_RECORDS_START:
+                    continue
+                break
+            started = True
+            buffer = buffer[match.end():]
+        pos = 0
+        while True:
+            pos = _RECORD_SEPARATOR.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # The record continues in the next chunk.
+                break
+            yield record
+        buffer = buffer[pos:]
+    if started:
+        raise ValueError('Log file ended before the end of its records.')
+    buffer += ''.join(chunks)
+    if buffer.strip():
+        for record in json.loads(buffer).get('Records', []):
+            yield record
+
+
+class RecordFilter(object):
+    """
+    Matches log records against the filters of ``search-logs``.
+
+    A record matches if it was made in the time window and matches one
+    of the values of each filter that was given.
+    """
+
+    def __init__(self, start_time, end_time, event_names=None, users=None,
+                 resources=None):
+        # Event times are all in the same format, so they can be
+        # compared as strings.
+        self._start_time = start_time.strftime(EVENT_TIME_FORMAT)
+        self._end_time = end_time.strftime(EVENT_TIME_FORMAT)
+        self._event_names = set(event_names) if event_names else None
+        self._users = set(users) if users else None
+        self._resources = set(resources) if resources else None
+
+    def __call__(self, record):
+        event_time = record.get('eventTime', '')
+        if not self._start_time <= event_time <= self._end_time:
+            return False
+        if self._event_names is not None and \
+                record.get('eventName') not in self._event_names:
+            return False
+        if self._users is not None and \
+                self._users.isdisjoint(self._get_users(record)):
+            return False
+        if self._resources is not None and \
+                self._resources.isdisjoint(self._get_resources(record)):
+            return False
+        return True
+
+    def _get_users(self, record):
+        identity = record.get('userIdentity') or {}
+        for name in ('userName', 'arn', 'principalId', 'accessKeyId'):
+            if identity.get(name):
+                yield identity[name]
+        issuer = (identity.get('sessionContext') or {}).get(
+            'sessionIssuer') or {}
+        for name in ('userName', 'arn'):
+            if issuer.get(name):
+                yield issuer[name]
+
+    def _get_resources(self, record):
+        for resource in record.get('resources') or []:
+            if resource.get('ARN'):
+                yield resource['ARN']
+        for value in _iter_values(record.get('requestParameters')):
+            yield value
+
+
+def _iter_values(value):
+    if isinstance(value, dict):
+        for child in value.values():
+            for item in _iter_values(child):
+                yield item
+    elif isinstance(value, list):
+        for child in value:
+            for item in _iter_values(child):
+                yield item
+    elif value is not None:
+        yield value
+
+
+def get_log_file_cache():
+    """
+    Return the LogFileCache used to store downloaded log files.
+    """
+    return LogFileCache()
+
+
+class LogFileCache(object):
+    """
+    Keeps downloaded log files on disk.
+
+    Log files are never modified once they're delivered, so each one is
+    stored under a key made from its bucket, key and ETag.  The least
+    recently used files are removed by ``prune``.  If the cache
+    directory can't be written to, files are downloaded to temporary
+    files instead.
+
+    :param cache_dir: The directory the files are stored in.
+    :param max_size: The total size in bytes of the files to keep.
+    """
+    _ENTRY_SUFFIX = '.json.gz'
+
+    def __init__(self, cache_dir=LOG_FILE_CACHE_DIR,
+                 max_size=DEFAULT_MAX_LOG_FILE_CACHE_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+
+    def open(self, bucket, key, etag, download):
+        """
+        Return an open binary file with the contents of a log file.
+
+        :param download: A function that accepts a file object and
+            writes the contents of the log file to it.  It's only called
+            if the log file isn't in the cache.
+        """
+        cache_filename = self._convert_key(self._cache_key(bucket, key, etag))
+        try:
+            f = open(cache_filename, 'rb')
+            # The modification time is used to find the least recently
+            # used files when the cache is pruned.
+            os.utime(cache_filename, None)
+            LOG.debug('Using cached log file %s', key)
+            return f
+        except (IOError, OSError):
+            pass
+        downloads = []
+
+        def download_to_cache(f):
+            downloads.append(f)
+            download(f)
+
+        try:
+            write_file_atomically(cache_filename, download_to_cache)
+        except (IOError, OSError):
+            if downloads:
+                # The download itself failed.
+                raise
+            LOG.debug('Unable to cache log file %s', key, exc_info=True)
+            f = tempfile.TemporaryFile()
+            download(f)
+            f.seek(0)
+            return f
+        return open(cache_filename, 'rb')
+
+    def prune(self):
+        """
+        Remove the least recently used files until the cache is no
+        larger than its maximum size.
+        """
+        prune_lru_files(self._cache_dir, self._max_size, self._ENTRY_SUFFIX)
+
+    def _cache_key(self, bucket, key, etag):
+        key = repr((bucket, key, etag))
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        return hashlib.sha1(key).hexdigest()
+
+    def _convert_key(self, key):
+        return os.path.join(self._cache_dir, key + self._ENTRY_SUFFIX)
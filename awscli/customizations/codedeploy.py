@@ -14,9 +14,18 @@
 import logging
 import re
 import os
+import sys
+import time
+import zlib
+import struct
+import hashlib
 import zipfile
 import tempfile
 import contextlib
+import functools
+import itertools
+import multiprocessing
+from collections import namedtuple
 from datetime import datetime
 
 from awscli.compat import six
@@ -27,11 +36,27 @@ from awscli.arguments import create_argument_model_from_schema
 from awscli.customizations.commands import BasicCommand
 from awscli.customizations.service import Service
 from awscli.customizations import utils
+from awscli.utils import concurrent_imap
+from awscli.utils import prune_lru_files
 
 
 LOG = logging.getLogger(__name__)
 ONE_MB = 1 << 20
 MULTIPART_LIMIT = 6 * ONE_MB
+# The number of parts uploaded at the same time.  Twice as many parts
+# can be held in memory while they wait for an upload thread.
+MAX_CONCURRENT_PARTS = 5
+# The number of times each part is attempted before the whole upload
+# is aborted.
+PART_UPLOAD_ATTEMPTS = 3
+BUNDLE_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'codedeploy-cache'))
+# The total size of the compressed entries kept in the bundle cache.  The
+# entries of the last bundle are kept even if they are larger than this.
+DEFAULT_MAX_BUNDLE_CACHE_SIZE = 512 * ONE_MB
+# Changing the compression level invalidates the cached entries.
+COMPRESSION_LEVEL = 6
+READ_CHUNK_SIZE = ONE_MB
 
 
 def initialize(cli):
@@ -244,9 +269,27 @@ class S3Client:
         bundle.seek(0)
         return size
 
-    def upload_to_s3(self, parsed_args, bundle):
+    def _iter_parts(self, bundle):
+        if isinstance(bundle, ZipBundle):
+            # Parts are uploaded while the rest of the bundle is still
+            # being compressed.
+            return bundle.iter_parts(MULTIPART_LIMIT)
+        return self._read_parts(bundle)
+
+    def _read_parts(self, bundle):
         size_remaining = self._bundle_size(bundle)
-        if size_remaining < MULTIPART_LIMIT:
+        while size_remaining > 0:
+            data = bundle.read(MULTIPART_LIMIT)
+            yield data
+            size_remaining -= len(data)
+
+    def upload_to_s3(self, parsed_args, bundle):
+        parts = self._iter_parts(bundle)
+        first_part = next(parts, b'')
+        if len(first_part) < MULTIPART_LIMIT:
+            # Every part but the last is MULTIPART_LIMIT bytes, so this
+            # is the whole bundle.
+            bundle.seek(0)
             return self.s3.PutObject(
                 bucket=parsed_args.bucket,
                 key=parsed_args.key,
@@ -255,35 +298,21 @@ class S3Client:
         else:
             return self._multipart_upload_to_s3(
                 parsed_args,
-                bundle,
-                size_remaining
+                itertools.chain([first_part], parts)
             )
 
-    def _multipart_upload_to_s3(self, parsed_args, bundle, size_remaining):
+    def _multipart_upload_to_s3(self, parsed_args, parts):
         create_response = self.s3.CreateMultipartUpload(
             bucket=parsed_args.bucket,
             key=parsed_args.key
         )
         upload_id = create_response['UploadId']
         try:
-            part_num = 1
-            multipart_list = []
-            bundle.seek(0)
-            while size_remaining > 0:
-                data = bundle.read(MULTIPART_LIMIT)
-                upload_response = self.s3.UploadPart(
-                    bucket=parsed_args.bucket,
-                    key=parsed_args.key,
-                    upload_id=upload_id,
-                    part_number=part_num,
-                    body=six.BytesIO(data)
-                )
-                multipart_list.append({
-                    'PartNumber': part_num,
-                    'ETag': upload_response['ETag']
-                })
-                part_num += 1
-                size_remaining -= len(data)
+            upload_part = functools.partial(
+                self._upload_part, parsed_args, upload_id)
+            multipart_list = list(concurrent_imap(
+                upload_part, enumerate(parts, 1),
+                max_workers=MAX_CONCURRENT_PARTS))
             return self.s3.CompleteMultipartUpload(
                 bucket=parsed_args.bucket,
                 key=parsed_args.key,
@@ -298,6 +327,392 @@ class S3Client:
             )
             raise e
 
+    def _upload_part(self, parsed_args, upload_id, numbered_part):
+        part_num, data = numbered_part
+        for attempt in range(1, PART_UPLOAD_ATTEMPTS + 1):
+            try:
+                upload_response = self.s3.UploadPart(
+                    bucket=parsed_args.bucket,
+                    key=parsed_args.key,
+                    upload_id=upload_id,
+                    part_number=part_num,
+                    body=six.BytesIO(data)
+                )
+                return {
+                    'PartNumber': part_num,
+                    'ETag': upload_response['ETag']
+                }
+            except Exception:
+                if attempt == PART_UPLOAD_ATTEMPTS:
+                    raise
+                LOG.debug('Retrying part %s of upload %s (attempt %s)',
+                          part_num, upload_id, attempt, exc_info=True)
+
+
+def get_bundle_cache():
+    """
+    Return the CompressedEntryCache used when building bundles.
+    """
+    return CompressedEntryCache()
+
+
+def _get_compression_workers():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+CompressedEntry = namedtuple('CompressedEntry', [
+    'filename', 'arcname', 'stat', 'crc', 'file_size', 'compress_size',
+    'data_filename', 'data_offset', 'temporary'])
+
+
+class CompressedEntryCache(object):
+    """
+    Deflates files for zip bundles and keeps the results on disk.
+
+    Each compressed file is stored under a key made from its path, size
+    and modification time, so pushing a tree that has mostly not changed
+    since the last push only compresses the files that did change.  The
+    least recently used entries are removed by ``prune``, which keeps at
+    least the entries of the bundle that was just built.  If the cache
+    directory can't be written to, files are compressed to temporary
+    files instead.
+
+    :param cache_dir: The directory the entries are stored in.
+    :param max_size: The total size in bytes of the entries to keep.
+    """
+    _ENTRY_SUFFIX = '.deflate'
+    # The CRC-32, uncompressed size and compressed size of an entry.
+    _HEADER = struct.Struct('<LQQ')
+
+    def __init__(self, cache_dir=BUNDLE_CACHE_DIR,
+                 max_size=DEFAULT_MAX_BUNDLE_CACHE_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+
+    def compress(self, member):
+        """
+        Return a CompressedEntry for a ``(filename, arcname)`` tuple.
+        """
+        filename, arcname = member
+        stat = os.stat(filename)
+        cache_filename = self._convert_key(self._cache_key(filename, stat))
+        header = self._read_header(cache_filename)
+        if header is not None:
+            return CompressedEntry(filename, arcname, stat, *header,
+                                   data_filename=cache_filename,
+                                   data_offset=self._HEADER.size,
+                                   temporary=False)
+        fd, temp_filename, temporary = self._create_temp_file()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                header = self._deflate(filename, f)
+            if not temporary:
+                if self._stat_key(os.stat(filename)) != self._stat_key(stat):
+                    # The file changed while it was being compressed.
+                    temporary = True
+                else:
+                    self._rename(temp_filename, cache_filename)
+                    temp_filename = cache_filename
+        except Exception:
+            os.remove(temp_filename)
+            raise
+        return CompressedEntry(filename, arcname, stat, *header,
+                               data_filename=temp_filename,
+                               data_offset=self._HEADER.size,
+                               temporary=temporary)
+
+    def prune(self, keep=()):
+        """
+        Remove the least recently used entries until the cache is no
+        larger than its maximum size.
+
+        :param keep: The data filenames of entries that must not be
+            removed, such as the entries of the bundle that was just
+            built.  The cache may be larger than its maximum size if
+            these entries alone are.
+        """
+        prune_lru_files(self._cache_dir, self._max_size,
+                        self._ENTRY_SUFFIX, keep)
+
+    def _cache_key(self, filename, stat):
+        key = repr((filename, COMPRESSION_LEVEL) + self._stat_key(stat))
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        return hashlib.sha1(key).hexdigest()
+
+    def _stat_key(self, stat):
+        return (stat.st_size, stat.st_mtime)
+
+    def _convert_key(self, key):
+        return os.path.join(self._cache_dir, key + self._ENTRY_SUFFIX)
+
+    def _read_header(self, cache_filename):
+        try:
+            with open(cache_filename, 'rb') as f:
+                header = self._HEADER.unpack(f.read(self._HEADER.size))
+                f.seek(0, 2)
+                if f.tell() != self._HEADER.size + header[2]:
+                    return None
+            # The modification time is used to find the least recently
+            # used entries when the cache is pruned.
+            os.utime(cache_filename, None)
+        except (IOError, OSError, struct.error):
+            return None
+        return header
+
+    def _create_temp_file(self):
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            fd, temp_filename = tempfile.mkstemp(dir=self._cache_dir)
+            return fd, temp_filename, False
+        except (IOError, OSError):
+            LOG.debug('Unable to use bundle cache %s', self._cache_dir,
+                      exc_info=True)
+            fd, temp_filename = tempfile.mkstemp()
+            return fd, temp_filename, True
+
+    def _deflate(self, filename, out):
+        out.write(b'\0' * self._HEADER.size)
+        compressor = zlib.compressobj(
+            COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                data = compressor.compress(chunk)
+                compress_size += len(data)
+                out.write(data)
+        data = compressor.flush()
+        compress_size += len(data)
+        out.write(data)
+        header = (crc & 0xffffffff, file_size, compress_size)
+        out.seek(0)
+        out.write(self._HEADER.pack(*header))
+        return header
+
+    def _rename(self, temp_filename, filename):
+        if sys.platform == 'win32' and os.path.exists(filename):
+            # os.rename() won't replace an existing file on windows.
+            os.remove(filename)
+        os.rename(temp_filename, filename)
+
+
+class _ZipWriter(object):
+    """
+    Writes a zip file from entries that have already been deflated.
+
+    The file is only ever appended to, so everything written to it is
+    final as soon as it's written.
+    """
+    _VERSION = 20
+    _ZIP64_VERSION = 45
+    _UTF8_FLAG = 0x800
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._central_directory = []
+
+    def write(self, entry):
+        name, flags = self._encode_name(entry.arcname)
+        dostime, dosdate = self._dos_date_time(entry.stat.st_mtime)
+        offset = self._fileobj.tell()
+        zip64 = (entry.file_size > zipfile.ZIP64_LIMIT or
+                 entry.compress_size > zipfile.ZIP64_LIMIT)
+        if zip64:
+            extra = struct.pack('<HHQQ', 1, 16, entry.file_size,
+                                entry.compress_size)
+            sizes = (0xffffffff, 0xffffffff)
+        else:
+            extra = b''
+            sizes = (entry.compress_size, entry.file_size)
+        version = self._ZIP64_VERSION if zip64 else self._VERSION
+        self._fileobj.write(struct.pack(
+            zipfile.structFileHeader, zipfile.stringFileHeader, version, 0,
+            flags, zipfile.ZIP_DEFLATED, dostime, dosdate, entry.crc,
+            sizes[0], sizes[1], len(name), len(extra)))
+        self._fileobj.write(name)
+        self._fileobj.write(extra)
+        self._copy_data(entry)
+        self._central_directory.append(
+            (entry, name, flags, dostime, dosdate, offset))
+
+    def _copy_data(self, entry):
+        try:
+            with open(entry.data_filename, 'rb') as f:
+                f.seek(entry.data_offset)
+                remaining = entry.compress_size
+                while remaining > 0:
+                    chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise RuntimeError(
+                            'Compressed data for {0} is truncated'.format(
+                                entry.filename))
+                    self._fileobj.write(chunk)
+                    remaining -= len(chunk)
+        finally:
+            if entry.temporary:
+                os.remove(entry.data_filename)
+
+    def close(self):
+        """
+        Write the central directory.
+        """
+        start = self._fileobj.tell()
+        for entry, name, flags, dostime, dosdate, offset in \
+                self._central_directory:
+            self._write_central_directory_header(
+                entry, name, flags, dostime, dosdate, offset)
+        end = self._fileobj.tell()
+        count = len(self._central_directory)
+        size = end - start
+        if (count >= zipfile.ZIP_FILECOUNT_LIMIT or
+                start > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT):
+            self._fileobj.write(struct.pack(
+                zipfile.structEndArchive64, zipfile.stringEndArchive64,
+                44, self._ZIP64_VERSION, self._ZIP64_VERSION, 0, 0,
+                count, count, size, start))
+            self._fileobj.write(struct.pack(
+                zipfile.structEndArchive64Locator,
+                zipfile.stringEndArchive64Locator, 0, end, 1))
+            count = min(count, 0xffff)
+            size = min(size, 0xffffffff)
+            start = min(start, 0xffffffff)
+        self._fileobj.write(struct.pack(
+            zipfile.structEndArchive, zipfile.stringEndArchive,
+            0, 0, count, count, size, start, 0))
+
+    def _write_central_directory_header(self, entry, name, flags, dostime,
+                                        dosdate, offset):
+        fields = []
+        sizes = [entry.compress_size, entry.file_size]
+        if entry.file_size > zipfile.ZIP64_LIMIT:
+            fields.append(entry.file_size)
+            sizes[1] = 0xffffffff
+        if entry.compress_size > zipfile.ZIP64_LIMIT:
+            fields.append(entry.compress_size)
+            sizes[0] = 0xffffffff
+        if offset > zipfile.ZIP64_LIMIT:
+            fields.append(offset)
+            offset = 0xffffffff
+        extra = b''
+        version = self._VERSION
+        if fields:
+            extra = struct.pack('<HH%dQ' % len(fields), 1, 8 * len(fields),
+                                *fields)
+            version = self._ZIP64_VERSION
+        # This is the system and version ZipFile records as the creator.
+        create_system = 0 if sys.platform == 'win32' else 3
+        external_attr = (entry.stat.st_mode & 0xFFFF) << 16
+        self._fileobj.write(struct.pack(
+            zipfile.structCentralDir, zipfile.stringCentralDir,
+            version, create_system, version, 0, flags, zipfile.ZIP_DEFLATED,
+            dostime, dosdate, entry.crc, sizes[0], sizes[1], len(name),
+            len(extra), 0, 0, 0, external_attr, offset))
+        self._fileobj.write(name)
+        self._fileobj.write(extra)
+
+    def _encode_name(self, arcname):
+        if isinstance(arcname, bytes):
+            # Python 2 paths are already encoded.
+            return arcname.replace(os.sep.encode('ascii'), b'/'), 0
+        arcname = arcname.replace(os.sep, '/')
+        try:
+            return arcname.encode('ascii'), 0
+        except UnicodeEncodeError:
+            return arcname.encode('utf-8'), self._UTF8_FLAG
+
+    def _dos_date_time(self, mtime):
+        # Zip files can't represent dates before 1980.
+        date_time = max(time.localtime(mtime)[0:6], (1980, 1, 1, 0, 0, 0))
+        dosdate = (date_time[0] - 1980) << 9 | date_time[1] << 5 | \
+            date_time[2]
+        dostime = date_time[3] << 11 | date_time[4] << 5 | date_time[5] // 2
+        return dostime, dosdate
+
+
+class ZipBundle(object):
+    """
+    A zip file that is written as its parts are read.
+
+    The members are compressed by a pool of threads when ``iter_parts``
+    is iterated, and appended to the zip file in order as soon as they
+    have been compressed, so the parts that have already been written
+    can be uploaded while the rest of the files are being compressed.
+    Any other file method writes the whole zip file first.
+
+    :param fileobj: The seekable file the zip file is written to.
+    :param members: A list of ``(filename, arcname)`` tuples of the files
+        to add to the zip file.
+    :param entry_cache: The CompressedEntryCache used to compress the
+        members.  Defaults to the one returned by ``get_bundle_cache``.
+    """
+
+    def __init__(self, fileobj, members, entry_cache=None):
+        self._fileobj = fileobj
+        self._members = members
+        if entry_cache is None:
+            entry_cache = get_bundle_cache()
+        self._entry_cache = entry_cache
+        self._written = False
+
+    def iter_parts(self, part_size):
+        """
+        Write the zip file, yielding each ``part_size`` bytes of it as
+        soon as they have been written.  The last part may be smaller.
+        """
+        if self._written:
+            raise RuntimeError('The bundle has already been written.')
+        self._written = True
+        offset = 0
+        writer = _ZipWriter(self._fileobj)
+        entries = concurrent_imap(self._entry_cache.compress, self._members,
+                                  max_workers=_get_compression_workers())
+        cached_filenames = []
+        for entry in entries:
+            writer.write(entry)
+            if not entry.temporary:
+                cached_filenames.append(entry.data_filename)
+            while self._fileobj.tell() - offset >= part_size:
+                yield self._read_part(offset, part_size)
+                offset += part_size
+        writer.close()
+        self._entry_cache.prune(keep=cached_filenames)
+        end = self._fileobj.tell()
+        while offset < end:
+            yield self._read_part(offset, min(part_size, end - offset))
+            offset += part_size
+
+    def _read_part(self, offset, size):
+        position = self._fileobj.tell()
+        self._fileobj.seek(offset)
+        data = self._fileobj.read(size)
+        self._fileobj.seek(position)
+        return data
+
+    def _write(self):
+        if not self._written:
+            for _ in self.iter_parts(MULTIPART_LIMIT):
+                pass
+
+    def read(self, *args):
+        self._write()
+        return self._fileobj.read(*args)
+
+    def seek(self, *args):
+        self._write()
+        return self._fileobj.seek(*args)
+
+    def tell(self):
+        self._write()
+        return self._fileobj.tell()
+
 
 class CodeDeployClient:
     """
@@ -522,26 +937,21 @@ class CodeDeployPush(CodeDeployBase):
         source_path = os.path.abspath(source)
         appspec_path = os.path.sep.join([source_path, 'appspec.yml'])
         with tempfile.TemporaryFile('w+b') as tf:
-            zf = zipfile.ZipFile(tf, 'w')
-            # Using 'try'/'finally' instead of 'with' statement since ZipFile
-            # does not have support context manager in Python 2.6.
-            try:
-                contains_appspec = False
-                for root, dirs, files in os.walk(source, topdown=True):
-                    if ignore_hidden_files:
-                        files = [fn for fn in files if not fn.startswith('.')]
-                        dirs[:] = [dn for dn in dirs if not dn.startswith('.')]
-                    for fn in files:
-                        filename = os.path.join(root, fn)
-                        filename = os.path.abspath(filename)
-                        arcname = filename[len(source_path) + 1:]
-                        if filename == appspec_path:
-                            contains_appspec = True
-                        zf.write(filename, arcname)
-                if not contains_appspec:
-                    raise RuntimeError(
-                        '{0} was not found'.format(appspec_path)
-                    )
-            finally:
-                zf.close()
-            yield tf
+            contains_appspec = False
+            members = []
+            for root, dirs, files in os.walk(source, topdown=True):
+                if ignore_hidden_files:
+                    files = [fn for fn in files if not fn.startswith('.')]
+                    dirs[:] = [dn for dn in dirs if not dn.startswith('.')]
+                for fn in files:
+                    filename = os.path.join(root, fn)
+                    filename = os.path.abspath(filename)
+                    arcname = filename[len(source_path) + 1:]
+                    if filename == appspec_path:
+                        contains_appspec = True
+                    members.append((filename, arcname))
+            if not contains_appspec:
+                raise RuntimeError(
+                    '{0} was not found'.format(appspec_path)
+                )
+            yield ZipBundle(tf, members)
@@ -1,7 +1,6 @@
 import logging
 import os
 
-import bcdoc.docevents
 from botocore.compat import OrderedDict
 from botocore import model
 from botocore.validate import validate_parameters
@@ -135,6 +134,10 @@ class BasicCommand(CLICommand):
 
         # Unpack arguments
         for key, value in vars(parsed_args).items():
+            if value is None:
+                # The argument wasn't specified so there's nothing
+                # to unpack.
+                continue
             cli_argument = None
 
             # Convert the name to use dashes instead of underscore
@@ -343,16 +346,6 @@ class BasicHelp(HelpCommand):
         else:
             return value
 
-    def __call__(self, args, parsed_globals):
-        # Create an event handler for a Provider Document
-        instance = self.EventHandlerClass(self)
-        # Now generate all of the events for a Provider document.
-        # We pass ourselves along so that we can, in turn, get passed
-        # to all event handlers.
-        bcdoc.docevents.generate_events(self.session, self)
-        self.renderer.render(self.doc.getvalue())
-        instance.unregister()
-
 
 class BasicDocHandler(OperationDocumentEventHandler):
     def __init__(self, help_command):
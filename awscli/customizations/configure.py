@@ -17,6 +17,7 @@ import logging
 
 from botocore.exceptions import ProfileNotFound
 
+from awscli.configcache import get_config_snapshot_cache
 from awscli.customizations.commands import BasicCommand
 from awscli.compat import raw_input
 
@@ -105,17 +106,23 @@ class ConfigFileWriter(object):
         if not os.path.isfile(config_filename):
             self._create_file(config_filename)
             self._write_new_section(section_name, new_values, config_filename)
-            return
-        with open(config_filename, 'r') as f:
-            contents = f.readlines()
-        # We can only update a single section at a time so we first need
-        # to find the section in question
-        try:
-            self._update_section_contents(contents, section_name, new_values)
-            with open(config_filename, 'w') as f:
-                f.write(''.join(contents))
-        except SectionNotFoundError:
-            self._write_new_section(section_name, new_values, config_filename)
+        else:
+            with open(config_filename, 'r') as f:
+                contents = f.readlines()
+            # We can only update a single section at a time so we first
+            # need to find the section in question
+            try:
+                self._update_section_contents(contents, section_name,
+                                              new_values)
+                with open(config_filename, 'w') as f:
+                    f.write(''.join(contents))
+            except SectionNotFoundError:
+                self._write_new_section(section_name, new_values,
+                                        config_filename)
+        # The file is rewritten in place, which can leave the modification
+        # time, size and inode that config snapshots are checked against
+        # unchanged, so any snapshots are removed.
+        get_config_snapshot_cache().clear()
 
     def _create_file(self, config_filename):
         # Create the file as well as the parent dir if needed.
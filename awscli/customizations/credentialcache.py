@@ -0,0 +1,164 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""Cache temporary credentials across CLI invocations.
+
+Temporary credentials that are fetched over the network, such as the
+credentials of the IAM role attached to an EC2 instance, are written to
+the same cache directory that the assume-role provider uses.  Subsequent
+CLI processes use the cached credentials until they are about to expire
+instead of calling the instance metadata service again.  Credentials
+found in the environment or in config files are read locally and aren't
+cached.
+
+Refreshes are serialized with a lock on the cache entry, so when many
+CLI processes start at the same time with an expired entry only one of
+them fetches new credentials and the rest use what it wrote to the
+cache.
+
+"""
+import logging
+import re
+import socket
+from datetime import datetime
+
+from dateutil.parser import parse
+from dateutil.tz import tzlocal
+from botocore import credentials
+from botocore.compat import total_seconds
+from botocore.utils import InstanceMetadataFetcher
+
+from awscli.customizations.assumerole import AssumeRoleProvider
+from awscli.customizations.assumerole import JSONFileCache
+
+
+LOG = logging.getLogger(__name__)
+
+
+def register_credential_cache(event_handlers):
+    event_handlers.register('session-initialized',
+                            inject_instance_metadata_cache,
+                            unique_id='inject_instance_metadata_cred_cache')
+
+
+def inject_instance_metadata_cache(session, **kwargs):
+    fetcher = InstanceMetadataFetcher(
+        timeout=session.get_config_variable('metadata_service_timeout'),
+        num_attempts=session.get_config_variable(
+            'metadata_service_num_attempts'))
+    provider = CachedCredentialProvider(
+        method=credentials.InstanceMetadataProvider.METHOD,
+        fetch_metadata=fetcher.retrieve_iam_role_credentials,
+        cache=JSONFileCache(AssumeRoleProvider.CACHE_DIR),
+        cache_key=_create_instance_metadata_cache_key(),
+    )
+    try:
+        cred_chain = session.get_component('credential_provider')
+        # Take the place of the uncached provider in the chain.
+        cred_chain.insert_after(provider.METHOD, provider)
+        cred_chain.remove(provider.METHOD)
+    except Exception:
+        LOG.debug("Not caching instance metadata credentials, credential "
+                  "provider from session could not be created.")
+
+
+def _create_instance_metadata_cache_key():
+    # The cache directory may be shared between hosts (e.g. an NFS
+    # mounted home directory), and each host can have a different role.
+    hostname = re.sub(r'[^\w.-]', '_', socket.gethostname())
+    return 'iam-role--%s' % hostname
+
+
+class CachedCredentialProvider(credentials.CredentialProvider):
+    """Caches temporary credentials fetched by another source.
+
+    :type method: str
+    :param method: The name of the provider this replaces, e.g.
+        ``iam-role``.
+
+    :type fetch_metadata: callable
+    :param fetch_metadata: A function that accepts no arguments, and
+        when called, returns a dict with the ``access_key``,
+        ``secret_key``, ``token`` and ``expiry_time`` of new credentials,
+        or an empty dict if no credentials are available.  This is the
+        format returned by
+        ``InstanceMetadataFetcher.retrieve_iam_role_credentials``.
+
+    :type cache: JSONFileCache
+    :param cache: The cache the credentials are stored in.  Refreshes
+        are made while holding the cache's ``lock()`` on the entry.
+
+    :type cache_key: str
+    :param cache_key: The key the credentials are stored under.
+
+    """
+    # Cached credentials are refreshed once they expire in less than
+    # this many seconds, which is the same window RefreshableCredentials
+    # uses, so that credentials are never read from the cache only to
+    # be refreshed immediately.
+    EARLY_REFRESH_SECONDS = credentials.RefreshableCredentials.refresh_timeout
+
+    def __init__(self, method, fetch_metadata, cache, cache_key):
+        self.METHOD = method
+        self._fetch_metadata = fetch_metadata
+        self._cache = cache
+        self._cache_key = cache_key
+
+    def load(self):
+        metadata = self._load_from_cache()
+        if metadata is None:
+            metadata = self._refresh()
+        if not metadata:
+            return None
+        return credentials.RefreshableCredentials.create_from_metadata(
+            metadata, refresh_using=self._refresh, method=self.METHOD)
+
+    def _load_from_cache(self):
+        try:
+            metadata = self._cache[self._cache_key]
+            if not self._is_expired(metadata):
+                LOG.debug("Credentials for %s retrieved from cache.",
+                          self.METHOD)
+                return metadata
+        except (KeyError, ValueError, TypeError):
+            # ValueError and TypeError are raised for entries that
+            # don't have a valid expiry time.
+            pass
+        return None
+
+    def _is_expired(self, metadata):
+        end_time = parse(metadata['expiry_time'])
+        now = datetime.now(tzlocal())
+        seconds = total_seconds(end_time - now)
+        return seconds < self.EARLY_REFRESH_SECONDS
+
+    def _refresh(self):
+        with self._cache.lock(self._cache_key):
+            # Another process may have refreshed the credentials while
+            # we were waiting for the lock.
+            metadata = self._load_from_cache()
+            if metadata is not None:
+                return metadata
+            LOG.debug("Fetching new credentials for %s.", self.METHOD)
+            metadata = self._fetch_metadata()
+            if metadata:
+                self._write_to_cache(metadata)
+            return metadata
+
+    def _write_to_cache(self, metadata):
+        try:
+            self._cache[self._cache_key] = metadata
+        except (IOError, OSError, ValueError):
+            # The credentials can still be used, they just won't be
+            # shared with other processes.
+            LOG.debug("Unable to cache credentials for %s.", self.METHOD,
+                      exc_info=True)
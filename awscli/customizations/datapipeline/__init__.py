@@ -1,10 +1,14 @@
 import sys
 import json
+import functools
 from datetime import datetime, timedelta
 
 from awscli.arguments import CustomArgument
 from awscli.customizations.commands import BasicCommand
 from awscli.customizations.datapipeline import translator
+from awscli.utils import PrefetchingPageIterator
+from awscli.utils import concurrent_imap
+from awscli.utils import external_sort
 
 
 DEFINITION_HELP_TEXT = """\
@@ -35,6 +39,12 @@ a key value pair. e.g. arrayValue=value1 arrayValue=value2
 """
 
 
+# The maximum number of object ids DescribeObjects accepts in one call.
+DESCRIBE_OBJECTS_BATCH_SIZE = 25
+# The number of DescribeObjects calls list-runs makes at the same time.
+DESCRIBE_OBJECTS_WORKERS = 5
+
+
 class DocSectionNotFoundError(Exception):
     pass
 
@@ -379,14 +389,21 @@ class ListRunsCommand(BasicCommand):
 
     def _list_runs(self, parsed_args):
         query = QueryArgBuilder().build_query(parsed_args)
-        object_ids = self._query_objects(parsed_args.pipeline_id, query)
-        objects = self._describe_objects(parsed_args.pipeline_id, object_ids)[
-            'pipelineObjects']
-        converted = convert_described_objects(
-            objects,
-            sort_key_func=lambda x: (x.get('@scheduledStartTime'),
-                                     x.get('name')))
-        self._formatter.display_objects_to_user(converted)
+        batches = self._query_object_batches(parsed_args.pipeline_id, query)
+        described = concurrent_imap(
+            functools.partial(self._describe_objects,
+                              parsed_args.pipeline_id),
+            batches, max_workers=DESCRIBE_OBJECTS_WORKERS)
+        converted = (
+            obj for parsed in described
+            for obj in convert_described_objects(parsed['pipelineObjects']))
+        # The runs are sorted without holding all of them in memory.
+        self._formatter.display_objects_to_user(
+            external_sort(converted, key=self._sort_key))
+
+    @staticmethod
+    def _sort_key(obj):
+        return (obj.get('@scheduledStartTime') or '', obj.get('name') or '')
 
     def _describe_objects(self, pipeline_id, object_ids):
         operation = self.service.get_operation('DescribeObjects')
@@ -394,13 +411,22 @@ class ListRunsCommand(BasicCommand):
             self.endpoint, pipeline_id=pipeline_id, object_ids=object_ids)
         return parsed
 
-    def _query_objects(self, pipeline_id, query):
+    def _query_object_batches(self, pipeline_id, query):
+        # Each batch of ids is described while the next pages of ids
+        # are still being queried.
         operation = self.service.get_operation('QueryObjects')
         paginator = operation.paginate(
             self.endpoint, pipeline_id=pipeline_id,
             sphere='INSTANCE', query=query)
-        parsed = paginator.build_full_result()
-        return parsed['ids']
+        batch = []
+        for _, page in PrefetchingPageIterator(paginator):
+            for object_id in page.get('ids', []):
+                batch.append(object_id)
+                if len(batch) == DESCRIBE_OBJECTS_BATCH_SIZE:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
 
 
 class ListRunsFormatter(object):
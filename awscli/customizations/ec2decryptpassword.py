@@ -63,6 +63,11 @@ class LaunchKeyArgument(BaseCLIArgument):
     def documentation(self):
         return HELP
 
+    @property
+    def changes_response(self):
+        # The password data is decrypted by an after-call handler.
+        return True
+
     def add_to_parser(self, parser):
         parser.add_argument(self.cli_name, dest=self.py_name,
                             help='SSH Private Key file')
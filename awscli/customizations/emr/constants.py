@@ -142,7 +142,12 @@ APPLICATIONS = ["HIVE", "PIG", "HBASE", "GANGLIA", "IMPALA", "MAPR",
 
 SSH_USER = 'hadoop'
 STARTING_STATES = ['STARTING', 'BOOTSTRAPPING']
+RUNNING_STATES = ['RUNNING', 'WAITING']
 TERMINATED_STATES = ['TERMINATED', 'TERMINATING', 'TERMINATED_WITH_ERRORS']
+FINAL_STATES = ['TERMINATED', 'TERMINATED_WITH_ERRORS']
+# How long, in seconds, the cached master of a running cluster is used.
+MASTER_CACHE_TTL = 60
+MAX_CONCURRENT_LOOKUPS = 10
 
 # list-clusters
 LIST_CLUSTERS_ACTIVE_STATES = ['STARTING', 'BOOTSTRAPPING', 'RUNNING',
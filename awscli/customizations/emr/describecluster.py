@@ -11,6 +11,8 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import functools
+
 from awscli.customizations.commands import BasicCommand
 from awscli.customizations.emr import emrutils
 from awscli.customizations.emr import helptext
@@ -34,20 +36,42 @@ class DescribeCluster(BasicCommand):
         emr = self._session.get_service('emr')
         describe_cluster = emr.get_operation('DescribeCluster')
         parameters = {'ClusterId': parsed_args.cluster_id}
-
-        describe_cluster_result = self._call(describe_cluster, parameters,
-                                             parsed_globals)
-        list_instance_groups_result = self._call(
-            emr.get_operation('ListInstanceGroups'), parameters,
-            parsed_globals)
-
-        list_bootstrap_actions_result = self._call(
-            emr.get_operation('ListBootstrapActions'),
-            parameters, parsed_globals)
-
-        master_public_dns = self._find_master_public_dns(
-            cluster_id=parsed_args.cluster_id,
-            parsed_globals=parsed_globals)
+        endpoint = self._get_endpoint(emr, parsed_globals)
+
+        # The master is looked up with ListInstances, which can take
+        # several pages, so a recently cached master is used instead.
+        master_cache = emrutils.get_master_cache()
+        cached_master = master_cache.get(endpoint, parsed_args.cluster_id)
+
+        # None of the calls depend on each other, so they're made at the
+        # same time over the same endpoint.
+        calls = [
+            functools.partial(
+                self._call, describe_cluster, parameters,
+                parsed_globals, endpoint=endpoint),
+            functools.partial(
+                self._call, emr.get_operation('ListInstanceGroups'),
+                parameters, parsed_globals, endpoint=endpoint),
+            functools.partial(
+                self._call, emr.get_operation('ListBootstrapActions'),
+                parameters, parsed_globals, endpoint=endpoint),
+        ]
+        if cached_master is None:
+            calls.append(functools.partial(
+                self._find_master_public_dns,
+                cluster_id=parsed_args.cluster_id,
+                parsed_globals=parsed_globals, endpoint=endpoint))
+        results = emrutils.call_concurrently(calls)
+        (describe_cluster_result, list_instance_groups_result,
+         list_bootstrap_actions_result) = results[:3]
+        if cached_master is None:
+            master_public_dns = results[3]
+            cluster_state = describe_cluster_result.get(
+                'Cluster', {}).get('Status', {}).get('State')
+            master_cache.set(endpoint, parsed_args.cluster_id,
+                             cluster_state, master_public_dns)
+        else:
+            master_public_dns = cached_master[1]
 
         constructed_result = self._construct_result(
             describe_cluster_result,
@@ -60,22 +84,25 @@ class DescribeCluster(BasicCommand):
 
         return 0
 
-    def _find_master_public_dns(self, cluster_id, parsed_globals):
+    def _find_master_public_dns(self, cluster_id, parsed_globals,
+                                endpoint=None):
         return emrutils.find_master_public_dns(
             session=self._session, cluster_id=cluster_id,
-            parsed_globals=parsed_globals)
+            parsed_globals=parsed_globals, endpoint=endpoint)
 
-    def _call(self, operation_object, parameters, parsed_globals):
+    def _get_endpoint(self, service, parsed_globals):
         # We could get an error from get_endpoint() about not having
         # a region configured.  Before this happens we want to check
         # for credentials so we can give a good error message.
-        result = []
         if not self._session.get_credentials():
             raise NoCredentialsError()
-        endpoint = operation_object.service.get_endpoint(
-            region_name=parsed_globals.region,
-            endpoint_url=parsed_globals.endpoint_url,
-            verify=parsed_globals.verify_ssl)
+        return emrutils.get_endpoint(service, parsed_globals)
+
+    def _call(self, operation_object, parameters, parsed_globals,
+              endpoint=None):
+        if endpoint is None:
+            endpoint = self._get_endpoint(operation_object.service,
+                                          parsed_globals)
         http_response, response_data = operation_object.call(endpoint,
                                                              **parameters)
         return response_data
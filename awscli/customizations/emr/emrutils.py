@@ -11,18 +11,25 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import functools
 import logging
 import json
 import os
+import re
+import time
 
 from awscli.customizations.emr import constants
 from awscli.customizations.emr import exceptions
 from botocore.exceptions import NoCredentialsError
 from botocore.exceptions import WaiterError
 from awscli.clidriver import CLIOperationCaller
+from awscli.customizations.assumerole import JSONFileCache
+from awscli.utils import concurrent_map
 
 
 LOG = logging.getLogger(__name__)
+MASTER_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'emr-cache'))
 
 
 def parse_tags(raw_tags_list):
@@ -200,40 +207,172 @@ def _find_most_recently_created(pages):
     return most_recently_created
 
 
-def get_cluster_state(session, parsed_globals, cluster_id):
+def call_concurrently(functions):
+    """
+    Call each of ``functions`` at the same time, and return their results
+    in the same order.  The functions take no arguments, use
+    ``functools.partial`` to bind their arguments.  Calls that share an
+    endpoint should be given the same endpoint from ``get_endpoint``
+    rather than each creating their own.  If any of the calls fail, the
+    exception of the first one that failed is raised.
+    """
+    return concurrent_map(lambda function: function(), functions,
+                          max_workers=max(len(functions), 1))
+
+
+def get_cluster_state(session, parsed_globals, cluster_id, endpoint=None):
     emr = session.get_service('emr')
-    endpoint = get_endpoint(emr, parsed_globals)
+    if endpoint is None:
+        endpoint = get_endpoint(emr, parsed_globals)
     describe_cluster_op = emr.get_operation('DescribeCluster')
     http, data = describe_cluster_op.call(endpoint, ClusterId=cluster_id)
     return data['Cluster']['Status']['State']
 
 
-def _find_master_instance(session, parsed_globals, cluster_id):
+def _find_master_instance(session, parsed_globals, cluster_id,
+                          endpoint=None):
     """
     Find the most recently created master instance.
     If the master instance is not available yet,
      the method will return None.
     """
     emr = session.get_service('emr')
-    endpoint = get_endpoint(emr, parsed_globals)
+    if endpoint is None:
+        endpoint = get_endpoint(emr, parsed_globals)
     operation_object = emr.get_operation('ListInstances')
     pages = operation_object.paginate(
         endpoint, ClusterId=cluster_id, InstanceGroupTypes=['MASTER'])
     return _find_most_recently_created(pages)
 
 
-def find_master_public_dns(session, parsed_globals, cluster_id):
+def find_master_public_dns(session, parsed_globals, cluster_id,
+                           endpoint=None):
     """
     Returns the master_instance's 'PublicDnsName'.
     """
     master_instance = _find_master_instance(
-        session, parsed_globals, cluster_id)
+        session, parsed_globals, cluster_id, endpoint)
     if master_instance is None:
         return ""
     else:
         return master_instance.get('PublicDnsName')
 
 
+def find_cluster_state_and_master_dns(session, parsed_globals, cluster_id,
+                                      endpoint=None, cache=None):
+    """
+    Returns the state and master instance's 'PublicDnsName' of a cluster.
+    They are looked up at the same time, and are kept in the master
+    cache for later calls against the same cluster.
+    """
+    if endpoint is None:
+        endpoint = get_endpoint(session.get_service('emr'), parsed_globals)
+    if cache is None:
+        cache = get_master_cache()
+    cached = cache.get(endpoint, cluster_id)
+    if cached is not None:
+        return cached
+    state, master_dns = call_concurrently([
+        functools.partial(get_cluster_state, session, parsed_globals,
+                          cluster_id, endpoint=endpoint),
+        functools.partial(find_master_public_dns, session=session,
+                          parsed_globals=parsed_globals,
+                          cluster_id=cluster_id, endpoint=endpoint)])
+    cache.set(endpoint, cluster_id, state, master_dns)
+    return state, master_dns
+
+
+def find_master_public_dns_names(session, parsed_globals, cluster_states,
+                                 endpoint=None, cache=None):
+    """
+    Returns a dict of cluster id to the master instance's 'PublicDnsName'
+    for each cluster in ``cluster_states``, a dict of cluster id to the
+    cluster's state.  The clusters are looked up concurrently over the
+    same endpoint, and cached names are used for clusters that are still
+    in the same state.
+    """
+    if endpoint is None:
+        endpoint = get_endpoint(session.get_service('emr'), parsed_globals)
+    if cache is None:
+        cache = get_master_cache()
+
+    def find(cluster_id):
+        state = cluster_states[cluster_id]
+        cached = cache.get(endpoint, cluster_id, state=state)
+        if cached is not None:
+            return cached[1]
+        master_dns = find_master_public_dns(
+            session=session, parsed_globals=parsed_globals,
+            cluster_id=cluster_id, endpoint=endpoint)
+        cache.set(endpoint, cluster_id, state, master_dns)
+        return master_dns
+
+    cluster_ids = list(cluster_states)
+    return dict(zip(cluster_ids, concurrent_map(
+        find, cluster_ids, max_workers=constants.MAX_CONCURRENT_LOOKUPS)))
+
+
+def get_master_cache():
+    """
+    Returns the ClusterMasterCache used to look up master instances.
+    """
+    return ClusterMasterCache(JSONFileCache(MASTER_CACHE_DIR))
+
+
+class ClusterMasterCache(object):
+    """
+    Keeps the state and master public DNS name of clusters between
+    invocations.
+
+    Entries of running clusters are only used for
+    ``constants.MASTER_CACHE_TTL`` seconds, in case the cluster is
+    terminated.  Entries of clusters in one of the final states never
+    change, so they don't expire.  Clusters in any other state are not
+    cached, because their master may not have been created yet.
+
+    :param cache: A JSONFileCache the entries are stored in.
+    """
+
+    def __init__(self, cache, ttl=constants.MASTER_CACHE_TTL):
+        self._cache = cache
+        self._ttl = ttl
+
+    def get(self, endpoint, cluster_id, state=None):
+        """
+        Returns a ``(state, master_dns)`` tuple for the cluster, or None
+        if it isn't cached.  If ``state`` is given, entries for any other
+        state are ignored.
+        """
+        try:
+            entry = self._cache[self._cache_key(endpoint, cluster_id)]
+            if state is not None and entry['State'] != state:
+                return None
+            if entry['State'] not in constants.FINAL_STATES and \
+                    time.time() - entry['CachedAt'] >= self._ttl:
+                return None
+            LOG.debug('Using cached master of cluster %s', cluster_id)
+            return entry['State'], entry['MasterPublicDnsName']
+        except (KeyError, TypeError):
+            return None
+
+    def set(self, endpoint, cluster_id, state, master_dns):
+        if not master_dns or state not in (constants.RUNNING_STATES +
+                                           constants.FINAL_STATES):
+            return
+        entry = {'State': state, 'MasterPublicDnsName': master_dns,
+                 'CachedAt': time.time()}
+        try:
+            self._cache[self._cache_key(endpoint, cluster_id)] = entry
+        except (IOError, OSError, ValueError):
+            LOG.debug('Unable to cache master of cluster %s', cluster_id,
+                      exc_info=True)
+
+    def _cache_key(self, endpoint, cluster_id):
+        # The same cluster can be looked up through different endpoints.
+        return re.sub(r'[^\w.-]', '_', 'master--%s--%s' % (
+            endpoint.host, cluster_id))
+
+
 def which(program):
     for path in os.environ["PATH"].split(os.pathsep):
         path = path.strip('"')
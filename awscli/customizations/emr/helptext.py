@@ -240,6 +240,11 @@ LIST_CLUSTERS_CREATED_BEFORE = (
     '<p>The creation date and time end value filter for '
     'listing clusters. For example, 2014-07-15T00:01:30. </p>')
 
+LIST_CLUSTERS_MASTER_PUBLIC_DNS = (
+    '<p>Adds the public DNS name of the master instance to each '
+    'cluster. The master instances of the clusters in each page '
+    'are looked up concurrently.</p>')
+
 EMR_MANAGED_MASTER_SECURITY_GROUP = (
     '<p>The identifier of the Amazon EC2 security group (managed by Amazon '
     'Elastic MapReduce) for the master node.</p>')
@@ -13,12 +13,13 @@
 
 
 from awscli.arguments import CustomArgument
+from awscli.customizations.emr import emrutils
 from awscli.customizations.emr import helptext
 from awscli.customizations.emr import exceptions
 from awscli.customizations.emr import constants
 
 
-def modify_list_clusters_argument(argument_table, **kwargs):
+def modify_list_clusters_argument(argument_table, operation, **kwargs):
     argument_table['cluster-states'] = \
         ClusterStatesArgument(
             name='cluster-states',
@@ -41,6 +42,10 @@ def modify_list_clusters_argument(argument_table, **kwargs):
     argument_table['created-after'] = CreatedAfter(
         name='created-after', help_text=helptext.LIST_CLUSTERS_CREATED_AFTER,
         cli_type_name='timestamp')
+    argument_table['master-public-dns'] = MasterPublicDnsArgument(
+        operation, name='master-public-dns',
+        help_text=helptext.LIST_CLUSTERS_MASTER_PUBLIC_DNS,
+        action='store_true')
 
 
 class ClusterStatesArgument(CustomArgument):
@@ -92,3 +97,42 @@ class CreatedAfter(CustomArgument):
         if value is None:
             return
         parameters['CreatedAfter'] = value
+
+
+class MasterPublicDnsArgument(CustomArgument):
+    def __init__(self, operation, *args, **kwargs):
+        super(MasterPublicDnsArgument, self).__init__(*args, **kwargs)
+        self._operation = operation
+        self._endpoint = None
+
+    @property
+    def changes_response(self):
+        # The clusters are annotated by an after-call handler.
+        return True
+
+    def add_to_params(self, parameters, value):
+        if value is not True:
+            return
+        session = self._operation.session
+        service_name = self._operation.service.endpoint_prefix
+        session.register('before-call.%s.%s' % (
+            service_name, self._operation.name), self._save_endpoint)
+        session.register('after-call.%s.%s' % (
+            service_name, self._operation.name), self._add_master_public_dns)
+
+    def _save_endpoint(self, endpoint, **kwargs):
+        # The masters are looked up over the endpoint ListClusters used.
+        self._endpoint = endpoint
+
+    def _add_master_public_dns(self, parsed, **kwargs):
+        clusters = parsed.get('Clusters', [])
+        if not clusters:
+            return
+        cluster_states = dict(
+            (cluster['Id'], cluster['Status']['State'])
+            for cluster in clusters)
+        master_dns_names = emrutils.find_master_public_dns_names(
+            self._operation.session, None, cluster_states,
+            endpoint=self._endpoint)
+        for cluster in clusters:
+            cluster['MasterPublicDnsName'] = master_dns_names[cluster['Id']]
@@ -31,14 +31,20 @@ def validate_and_find_master_dns(session, parsed_globals, cluster_id):
     Return the latest created master instance public dns name.
     Throw MasterDNSNotAvailableError or ClusterTerminatedError.
     """
-    cluster_state = emrutils.get_cluster_state(
-        session, parsed_globals, cluster_id)
+    emr = session.get_service('emr')
+    endpoint = emrutils.get_endpoint(emr, parsed_globals)
+
+    # The master is usually running already, so its DNS name is looked up
+    # at the same time as the cluster state, or taken from the cache if
+    # the cluster was connected to recently.
+    cluster_state, master_dns = emrutils.find_cluster_state_and_master_dns(
+        session, parsed_globals, cluster_id, endpoint=endpoint)
 
     if cluster_state in constants.TERMINATED_STATES:
         raise exceptions.ClusterTerminatedError
 
-    emr = session.get_service('emr')
-    endpoint = emrutils.get_endpoint(emr, parsed_globals)
+    if cluster_state in constants.RUNNING_STATES:
+        return master_dns
 
     try:
         cluster_running_waiter = emr.get_waiter('ClusterRunning',
@@ -51,7 +57,7 @@ def validate_and_find_master_dns(session, parsed_globals, cluster_id):
 
     return emrutils.find_master_public_dns(
         session=session, cluster_id=cluster_id,
-        parsed_globals=parsed_globals)
+        parsed_globals=parsed_globals, endpoint=endpoint)
 
 
 def validate_ssh_with_key_file(key_file):
@@ -17,11 +17,27 @@ import botocore
 import jmespath
 
 from awscli.compat import urlparse
+from awscli.responsecache import parse_cache_ttl
+
+
+# The regions used for --all-regions.
+PUBLIC_REGIONS = [
+    'us-east-1',
+    'us-west-1',
+    'us-west-2',
+    'eu-west-1',
+    'eu-central-1',
+    'ap-northeast-1',
+    'ap-southeast-1',
+    'ap-southeast-2',
+    'sa-east-1',
+]
 
 
 def register_parse_global_args(cli):
     cli.register('top-level-args-parsed', resolve_types)
     cli.register('top-level-args-parsed', no_sign_request)
+    cli.register('top-level-args-parsed', resolve_all_regions)
 
 
 def resolve_types(parsed_args, **kwargs):
@@ -30,6 +46,8 @@ def resolve_types(parsed_args, **kwargs):
     _resolve_arg(parsed_args, 'query')
     _resolve_arg(parsed_args, 'verify_ssl')
     _resolve_arg(parsed_args, 'endpoint_url')
+    _resolve_arg(parsed_args, 'regions')
+    _resolve_arg(parsed_args, 'cache_ttl')
 
 
 def _resolve_arg(parsed_args, name):
@@ -66,6 +84,27 @@ def _resolve_endpoint_url(value):
     return value
 
 
+def _resolve_regions(value):
+    regions = [region.strip() for region in value.split(',')
+               if region.strip()]
+    if not regions:
+        raise ValueError('Bad value for --regions "%s": expected a comma '
+                         'separated list of regions.' % value)
+    return regions
+
+
+def _resolve_cache_ttl(value):
+    return parse_cache_ttl(value)
+
+
+def resolve_all_regions(parsed_args, **kwargs):
+    if getattr(parsed_args, 'all_regions', False):
+        if getattr(parsed_args, 'regions', None):
+            raise ValueError('--regions and --all-regions cannot both be '
+                             'specified.')
+        parsed_args.regions = list(PUBLIC_REGIONS)
+
+
 def no_sign_request(parsed_args, session, **kwargs):
     if not parsed_args.sign_request:
         # In order to make signing disabled for all requests
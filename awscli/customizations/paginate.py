@@ -65,10 +65,15 @@ def unify_paging_params(argument_table, operation, event_name, **kwargs):
     _remove_existing_paging_arguments(argument_table, operation)
     parsed_args_event = event_name.replace('building-argument-table.',
                                            'operation-args-parsed.')
+    # The argument table can be built more than once for the same
+    # operation (e.g. for help and completion).  Registering with a
+    # unique id keeps a single handler per operation, and avoids
+    # flushing the emitter's handler lookup cache each time.
     operation.session.register(
         parsed_args_event,
         partial(check_should_enable_pagination,
-                list(_get_all_cli_input_tokens(operation))))
+                list(_get_all_cli_input_tokens(operation))),
+        unique_id='unify-paging-params.%s' % parsed_args_event)
     argument_table['starting-token'] = PageArgument('starting-token',
                                                     STARTING_TOKEN_HELP,
                                                     operation,
@@ -21,14 +21,47 @@ cloudwatch put-metric-data operation:
 * --statistic-values
 * --unit
 
+It also adds ``--metric-data-file``, which reads any number of data points
+from a file or standard input and sends them in as few requests as the
+per-request limits allow.
+
 """
+import csv
 import decimal
+import json
+import logging
+import random
+import sys
+import time
+
+from botocore.exceptions import NoCredentialsError
 
+from awscli.compat import six
+from awscli.argprocess import ParamError
 from awscli.arguments import CustomArgument
+from awscli.errorhandler import BaseOperationError
+from awscli.utils import concurrent_imap
 from awscli.utils import split_on_commas
 from awscli.customizations.utils import validate_mutually_exclusive_handler
 
 
+LOG = logging.getLogger(__name__)
+# The limits CloudWatch places on a single PutMetricData request.
+MAX_METRIC_DATA_PER_REQUEST = 20
+MAX_REQUEST_SIZE = 40 * 1024
+# The number of requests sent at the same time.
+MAX_CONCURRENT_REQUESTS = 10
+# The number of attempts made to send a request that is throttled, and
+# the limits of the exponential backoff between them, in seconds.
+MAX_SEND_ATTEMPTS = 6
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 20
+THROTTLING_ERROR_CODES = ['Throttling', 'ThrottlingException',
+                          'RequestLimitExceeded']
+CSV_COLUMNS = ['MetricName', 'Value', 'Unit', 'Timestamp', 'Dimensions',
+               'StatisticValues']
+
+
 def register_put_metric_data(event_handler):
     event_handler.register('building-argument-table.cloudwatch.put-metric-data',
                            _promote_args)
@@ -36,7 +69,8 @@ def register_put_metric_data(event_handler):
         'operation-args-parsed.cloudwatch.put-metric-data',
         validate_mutually_exclusive_handler(
             ['metric_data'], ['metric_name', 'timestamp', 'unit', 'value',
-                              'dimensions', 'statistic_values']))
+                              'dimensions', 'statistic_values'],
+            ['metric_data_file']))
 
 
 def _promote_args(argument_table, operation, **kwargs):
@@ -73,6 +107,18 @@ def _promote_args(argument_table, operation, **kwargs):
     argument_table['statistic-values'] = PutMetricArgument(
         'statistic-values', help_text='A set of statistical values describing '
                                       'the metric.')
+    argument_table['metric-data-file'] = MetricDataFileArgument(operation)
+    argument_table['metric-data-format'] = CustomArgument(
+        'metric-data-format', choices=['json', 'csv'],
+        help_text=(
+            'The format of <code>--metric-data-file</code>.  With '
+            '<code>json</code> (the default) each line is a JSON object in '
+            'the format of an element of <code>--metric-data</code>.  With '
+            '<code>csv</code> the first line is a header naming the columns, '
+            'which can be any of: %s.  The <code>Dimensions</code> and '
+            '<code>StatisticValues</code> columns use the same syntax as '
+            '<code>--dimensions</code> and <code>--statistic-values</code>.'
+            % ', '.join(CSV_COLUMNS)))
 
 
 def insert_first_element(name):
@@ -117,24 +163,287 @@ class PutMetricArgument(CustomArgument):
 
     @insert_first_element('MetricData')
     def _add_param_dimensions(self, first_element, value):
-        # Dimensions needs a little more processing.  We support
-        # the key=value,key2=value syntax so we need to parse
-        # that.
-        dimensions = []
-        for pair in split_on_commas(value):
-            key, value = pair.split('=')
-            dimensions.append({'Name': key, 'Value': value})
-        first_element['Dimensions'] = dimensions
+        first_element['Dimensions'] = _parse_dimensions(value)
 
     @insert_first_element('MetricData')
     def _add_param_statistic_values(self, first_element, value):
-        # StatisticValues is a struct type so we are parsing
-        # a csv keyval list into a dict.
-        statistics = {}
-        for pair in split_on_commas(value):
-            key, value = pair.split('=')
-            # There are four supported values: Maximum, Minimum, SampleCount,
-            # and Sum.  All of them are documented as a type double so we can
-            # convert these to a decimal value to preserve precision.
-            statistics[key] = decimal.Decimal(value)
-        first_element['StatisticValues'] = statistics
+        first_element['StatisticValues'] = _parse_statistic_values(value)
+
+
+def _parse_dimensions(value):
+    # Dimensions needs a little more processing.  We support
+    # the key=value,key2=value syntax so we need to parse
+    # that.
+    dimensions = []
+    for pair in split_on_commas(value):
+        key, value = pair.split('=')
+        dimensions.append({'Name': key, 'Value': value})
+    return dimensions
+
+
+def _parse_statistic_values(value):
+    # StatisticValues is a struct type so we are parsing
+    # a csv keyval list into a dict.
+    statistics = {}
+    for pair in split_on_commas(value):
+        key, value = pair.split('=')
+        # There are four supported values: Maximum, Minimum, SampleCount,
+        # and Sum.  All of them are documented as a type double so we can
+        # convert these to a decimal value to preserve precision.
+        statistics[key] = decimal.Decimal(value)
+    return statistics
+
+
+def _flatten(value, prefix):
+    # Yields the parameters a value is serialized to in a query
+    # request, e.g. MetricData.member.1.Dimensions.member.1.Name.
+    if isinstance(value, dict):
+        for key, member in value.items():
+            for item in _flatten(member, '%s.%s' % (prefix, key)):
+                yield item
+    elif isinstance(value, list):
+        for i, member in enumerate(value, 1):
+            for item in _flatten(member, '%s.member.%s' % (prefix, i)):
+                yield item
+    else:
+        yield prefix, value
+
+
+def estimate_request_size(value, prefix):
+    """Estimate the size of ``value`` in a form encoded query request."""
+    size = 0
+    quote = six.moves.urllib.parse.quote
+    for key, member in _flatten(value, prefix):
+        if not isinstance(member, six.string_types):
+            member = six.text_type(member)
+        if isinstance(member, six.text_type):
+            member = member.encode('utf-8')
+        size += len(quote(key)) + len(quote(member)) + 2
+    return size
+
+
+class MetricDataBatch(object):
+    """The data points sent in a single PutMetricData request.
+
+    :param lines: The numbers of the first and last input lines the
+        data points were read from.
+    :param metric_data: The list of ``MetricDatum`` structures.
+    :param error: If set, the lines couldn't be parsed and this is the
+        error message.  ``metric_data`` is empty.
+    """
+    def __init__(self, lines, metric_data, error=None):
+        self.lines = lines
+        self.metric_data = metric_data
+        self.error = error
+
+
+def pack_metric_data(numbered_data, namespace,
+                     max_count=MAX_METRIC_DATA_PER_REQUEST,
+                     max_size=MAX_REQUEST_SIZE):
+    """Group data points into as few requests as the limits allow.
+
+    :param numbered_data: An iterable of ``(line_number, datum)`` tuples.
+        If ``datum`` is an exception, an error batch is yielded for it.
+    :param namespace: The namespace the data points are sent to.
+
+    """
+    # Every request includes the action, version and namespace.
+    base_size = estimate_request_size(
+        {'Action': 'PutMetricData', 'Version': '2010-08-01',
+         'Namespace': namespace}, '')
+    # The largest member number a datum will be sent with.
+    prefix = 'MetricData.member.%s' % max_count
+    batch = []
+    first_line = None
+    size = base_size
+    for line_number, datum in numbered_data:
+        if isinstance(datum, Exception):
+            yield MetricDataBatch([line_number, line_number], [],
+                                  error=six.text_type(datum))
+            continue
+        datum_size = estimate_request_size(datum, prefix)
+        if base_size + datum_size > max_size:
+            yield MetricDataBatch(
+                [line_number, line_number], [],
+                error='The data point is larger than the %s byte limit of a '
+                      'request.' % max_size)
+            continue
+        if batch and (len(batch) >= max_count or
+                      size + datum_size > max_size):
+            yield MetricDataBatch([first_line, last_line], batch)
+            batch = []
+            size = base_size
+        if not batch:
+            first_line = line_number
+        batch.append(datum)
+        last_line = line_number
+        size += datum_size
+    if batch:
+        yield MetricDataBatch([first_line, last_line], batch)
+
+
+class MetricDataFileArgument(CustomArgument):
+    """Sends the data points in a file in bulk.
+
+    Each data point is read from a line of the file, and the data points
+    are packed into as few PutMetricData requests as the limits on the
+    number of data points and size of a request allow.  The requests are
+    sent concurrently, and retried with exponential backoff when they
+    are throttled.  A line of JSON is written for each request that
+    fails, with the ``Lines`` of the file it was sent from and the
+    ``Error``.
+    """
+    def __init__(self, operation_object):
+        self._operation_object = operation_object
+        self._source = None
+        super(MetricDataFileArgument, self).__init__(
+            'metric-data-file', no_paramfile=True,
+            help_text=(
+                'Sends the data points read from the given file, or standard '
+                'input if <code>-</code> is specified, in as few requests as '
+                'possible.  The format of the file is set with '
+                '<code>--metric-data-format</code>.  A line of JSON is '
+                'written for each request that fails, with the '
+                '<code>Lines</code> of the file the request was sent from '
+                'and the <code>Error</code>.'))
+        operation_object.session.register(
+            'calling-command.cloudwatch.put-metric-data',
+            self.put_metric_data_in_bulk)
+
+    def add_to_params(self, parameters, value):
+        # The file isn't a parameter of the operation, the data points
+        # are read from it when the command is called.
+        self._source = value
+
+    def put_metric_data_in_bulk(self, call_parameters, parsed_args,
+                                parsed_globals, stream=None, **kwargs):
+        if self._source is None:
+            return
+        if stream is None:
+            stream = sys.stdout
+        session = self._operation_object.session
+        if not session.get_credentials():
+            raise NoCredentialsError()
+        endpoint = self._operation_object.service.get_endpoint(
+            region_name=parsed_globals.region,
+            endpoint_url=parsed_globals.endpoint_url,
+            verify=parsed_globals.verify_ssl)
+        namespace = call_parameters['Namespace']
+        data_format = getattr(parsed_args, 'metric_data_format', None)
+
+        def send(batch):
+            return self._send_batch(endpoint, namespace, batch)
+
+        rc = 0
+        input_file = self._open_source(self._source)
+        try:
+            if data_format == 'csv':
+                numbered_data = self._read_csv(input_file)
+            else:
+                numbered_data = self._read_json_lines(input_file)
+            batches = pack_metric_data(numbered_data, namespace)
+            for failure in concurrent_imap(
+                    send, batches, max_workers=MAX_CONCURRENT_REQUESTS):
+                if failure is not None:
+                    rc = 255
+                    stream.write(json.dumps(failure))
+                    stream.write('\n')
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            stream.flush()
+        return rc
+
+    def _open_source(self, source):
+        if source == '-':
+            return sys.stdin
+        if source.startswith('file://'):
+            source = source[len('file://'):]
+        try:
+            return open(source, 'r')
+        except IOError as e:
+            raise ParamError(self.name, "Unable to open %s: %s" % (source, e))
+
+    def _read_json_lines(self, input_file):
+        for line_number, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            try:
+                datum = json.loads(line, parse_float=decimal.Decimal)
+                if not isinstance(datum, dict):
+                    raise ValueError("Expected a JSON object, received: %s"
+                                     % line.strip())
+            except ValueError as e:
+                datum = e
+            yield line_number, datum
+
+    def _read_csv(self, input_file):
+        reader = csv.reader(input_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [column.strip() for column in header]
+        unknown = [column for column in header if column not in CSV_COLUMNS]
+        if unknown:
+            raise ParamError(
+                self.name, "Unknown CSV columns: %s, must be one of: %s" %
+                (', '.join(unknown), ', '.join(CSV_COLUMNS)))
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            # The reader's line number is the last line of the row.
+            try:
+                datum = self._convert_csv_row(header, row)
+            except (ValueError, decimal.InvalidOperation) as e:
+                datum = ValueError('Invalid row: %s' % e)
+            yield reader.line_num, datum
+
+    def _convert_csv_row(self, header, row):
+        if len(row) > len(header):
+            raise ValueError('expected %s columns, received %s' %
+                             (len(header), len(row)))
+        datum = {}
+        for column, cell in zip(header, row):
+            cell = cell.strip()
+            if not cell:
+                continue
+            if column == 'Value':
+                datum[column] = decimal.Decimal(cell)
+            elif column == 'Dimensions':
+                datum[column] = _parse_dimensions(cell)
+            elif column == 'StatisticValues':
+                datum[column] = _parse_statistic_values(cell)
+            else:
+                datum[column] = cell
+        return datum
+
+    def _send_batch(self, endpoint, namespace, batch):
+        if batch.error is not None:
+            return {'Lines': batch.lines, 'Error': batch.error}
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            try:
+                self._operation_object.call(
+                    endpoint, Namespace=namespace,
+                    MetricData=batch.metric_data)
+                return None
+            except BaseOperationError as e:
+                if attempt == MAX_SEND_ATTEMPTS or not self._is_retryable(e):
+                    return self._failure(batch, e)
+                delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempt - 1))
+                # The jitter keeps concurrent requests that were throttled
+                # together from being retried together.
+                delay *= random.uniform(0.5, 1)
+                LOG.debug("Retrying lines %s-%s in %.2f seconds: %s",
+                          batch.lines[0], batch.lines[1], delay, e)
+                time.sleep(delay)
+            except Exception as e:
+                return self._failure(batch, e)
+
+    def _is_retryable(self, error):
+        return (error.error_code in THROTTLING_ERROR_CODES or
+                error.http_status_code >= 500)
+
+    def _failure(self, batch, error):
+        LOG.debug("Failed to send lines %s-%s", batch.lines[0],
+                  batch.lines[1], exc_info=True)
+        return {'Lines': batch.lines, 'Error': six.text_type(error)}
@@ -17,7 +17,8 @@ import os
 import sys
 
 from awscli.customizations.s3.utils import find_chunksize, \
-    operate, find_bucket_key, relative_path, PrintTask, create_warning
+    operate, find_bucket_key, relative_path, PrintTask, create_warning, \
+    MAX_SINGLE_UPLOAD_SIZE
 from awscli.customizations.s3.executor import Executor
 from awscli.customizations.s3 import tasks
 from awscli.customizations.s3.transferconfig import RuntimeConfig
@@ -41,6 +42,7 @@ class S3Handler(object):
     class pull tasks from to complete.
     """
     MAX_IO_QUEUE_SIZE = 20
+    CREATE_MULTIPART_COPY_TASK = tasks.CreateMultipartUploadTask
 
     def __init__(self, session, params, result_queue=None,
                  runtime_config=None):
@@ -299,7 +301,8 @@ class S3Handler(object):
         chunksize = find_chunksize(filename.size, self.chunksize)
         num_uploads = int(math.ceil(filename.size / float(chunksize)))
         upload_context = self._enqueue_upload_start_task(
-            chunksize, num_uploads, filename)
+            chunksize, num_uploads, filename,
+            task_class=self.CREATE_MULTIPART_COPY_TASK)
         self._enqueue_upload_tasks(
             num_uploads, chunksize, upload_context, filename, tasks.CopyPartTask)
         self._enqueue_upload_end_task(filename, upload_context)
@@ -309,10 +312,11 @@ class S3Handler(object):
             self.executor.submit(remove_task)
         return num_uploads
 
-    def _enqueue_upload_start_task(self, chunksize, num_uploads, filename):
+    def _enqueue_upload_start_task(self, chunksize, num_uploads, filename,
+                                   task_class=tasks.CreateMultipartUploadTask):
         upload_context = tasks.MultipartUploadContext(
             expected_parts=num_uploads)
-        create_multipart_upload_task = tasks.CreateMultipartUploadTask(
+        create_multipart_upload_task = task_class(
             session=self.session, filename=filename,
             parameters=self.params,
             result_queue=self.result_queue, upload_context=upload_context)
@@ -349,6 +353,34 @@ class S3Handler(object):
         self._multipart_uploads.append((upload_context, filename))
 
 
+class S3CopyHandler(S3Handler):
+    """
+    This class is an alternative ``S3Handler`` to be used when copying or
+    moving objects from one S3 location to another.  The data is copied
+    by S3 itself, so copies use their own part size, threshold and
+    number of threads (``multipart_copy_chunksize``,
+    ``multipart_copy_threshold`` and ``max_concurrent_copies``) instead
+    of the values used for uploads and downloads, and the multipart
+    uploads of copies are created ahead of the parts already queued.
+    """
+    CREATE_MULTIPART_COPY_TASK = tasks.CreateMultipartCopyTask
+
+    def __init__(self, session, params, result_queue=None,
+                 runtime_config=None):
+        copy_config = RuntimeConfig.defaults()
+        if runtime_config is not None:
+            copy_config.update(runtime_config)
+        # A single CopyObject can't copy more than 5GB.
+        copy_config['multipart_threshold'] = min(
+            copy_config['multipart_copy_threshold'], MAX_SINGLE_UPLOAD_SIZE)
+        copy_config['multipart_chunksize'] = \
+            copy_config['multipart_copy_chunksize']
+        copy_config['max_concurrent_requests'] = \
+            copy_config['max_concurrent_copies']
+        super(S3CopyHandler, self).__init__(session, params, result_queue,
+                                            copy_config)
+
+
 class S3StreamHandler(S3Handler):
     """
     This class is an alternative ``S3Handler`` to be used when the operation
@@ -25,12 +25,14 @@ from awscli.customizations.s3.fileformat import FileFormat
 from awscli.customizations.s3.filegenerator import FileGenerator
 from awscli.customizations.s3.fileinfo import TaskInfo, FileInfo
 from awscli.customizations.s3.filters import create_filter
-from awscli.customizations.s3.s3handler import S3Handler, S3StreamHandler
+from awscli.customizations.s3.s3handler import S3Handler, S3StreamHandler, \
+    S3CopyHandler
 from awscli.customizations.s3.utils import find_bucket_key, uni_print, \
     AppendFilter, find_dest_path_comp_key, human_readable_size
 from awscli.customizations.s3.syncstrategy.base import MissingFileSync, \
     SizeAndLastModifiedSync, NeverSync
 from awscli.customizations.s3 import transferconfig
+from awscli.utils import PrefetchingPageIterator
 
 
 RECURSIVE = {'name': 'recursive', 'action': 'store_true', 'dest': 'dir_op',
@@ -325,9 +327,9 @@ class ListCommand(S3Command):
 
     def _list_all_objects(self, bucket, key, page_size=None):
         operation = self.service.get_operation('ListObjects')
-        iterator = operation.paginate(self.endpoint, bucket=bucket,
-                                      prefix=key, delimiter='/',
-                                      page_size=page_size)
+        iterator = PrefetchingPageIterator(
+            operation.paginate(self.endpoint, bucket=bucket, prefix=key,
+                               delimiter='/', page_size=page_size))
         for _, response_data in iterator:
             self._display_page(response_data)
 
@@ -369,8 +371,9 @@ class ListCommand(S3Command):
 
     def _list_all_objects_recursive(self, bucket, key, page_size=None):
         operation = self.service.get_operation('ListObjects')
-        iterator = operation.paginate(self.endpoint, bucket=bucket,
-                                      prefix=key, page_size=page_size)
+        iterator = PrefetchingPageIterator(
+            operation.paginate(self.endpoint, bucket=bucket, prefix=key,
+                               page_size=page_size))
         for _, response_data in iterator:
             self._display_page(response_data, use_basename=False)
 
@@ -739,9 +742,14 @@ class CommandArchitecture(object):
         file_info_builder = FileInfoBuilder(
             self._service, self._endpoint,
             self._source_endpoint, self.parameters)
-        s3handler = S3Handler(self.session, self.parameters,
-                              runtime_config=self._runtime_config,
-                              result_queue=result_queue)
+        if self.parameters['paths_type'] == 's3s3':
+            s3handler = S3CopyHandler(self.session, self.parameters,
+                                      runtime_config=self._runtime_config,
+                                      result_queue=result_queue)
+        else:
+            s3handler = S3Handler(self.session, self.parameters,
+                                  runtime_config=self._runtime_config,
+                                  result_queue=result_queue)
         s3_stream_handler = S3StreamHandler(self.session, self.parameters,
                                             result_queue=result_queue)
 
@@ -467,6 +467,18 @@ class CreateMultipartUploadTask(BasicTask):
             raise e
 
 
+class CreateMultipartCopyTask(CreateMultipartUploadTask):
+    """
+    Creates the multipart upload of a multipart copy.
+
+    These tasks are retrieved from the task queue before any part tasks,
+    so the uploads of the next copies are created while the parts of
+    earlier copies are in flight, and copy part tasks rarely have to
+    wait for an upload id.
+    """
+    PRIORITY = 9
+
+
 class RemoveRemoteObjectTask(OrderableTask):
     def __init__(self, filename, context):
         self._context = context
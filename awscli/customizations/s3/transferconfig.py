@@ -19,6 +19,12 @@ DEFAULTS = {
     'multipart_chunksize': 8 * (1024 ** 2),
     'max_concurrent_requests': 10,
     'max_queue_size': 1000,
+    # Copies between S3 locations are made by S3 itself, so parts can
+    # be much larger than for uploads and downloads without using any
+    # local memory, and more of them can be in flight at once.
+    'multipart_copy_threshold': 128 * (1024 ** 2),
+    'multipart_copy_chunksize': 128 * (1024 ** 2),
+    'max_concurrent_copies': 20,
 }
 
 
@@ -29,8 +35,12 @@ class InvalidConfigError(Exception):
 class RuntimeConfig(object):
 
     POSITIVE_INTEGERS = ['multipart_chunksize', 'multipart_threshold',
-                         'max_concurrent_requests', 'max_queue_size']
-    HUMAN_READABLE_SIZES = ['multipart_chunksize', 'multipart_threshold']
+                         'max_concurrent_requests', 'max_queue_size',
+                         'multipart_copy_chunksize',
+                         'multipart_copy_threshold', 'max_concurrent_copies']
+    HUMAN_READABLE_SIZES = ['multipart_chunksize', 'multipart_threshold',
+                            'multipart_copy_chunksize',
+                            'multipart_copy_threshold']
 
     @staticmethod
     def defaults():
@@ -27,6 +27,7 @@ from botocore.compat import unquote_str
 from awscli.compat import six
 from awscli.compat import PY3
 from awscli.compat import queue
+from awscli.utils import PrefetchingPageIterator
 
 
 HUMANIZE_SUFFIXES = ('KiB', 'MiB', 'GiB', 'TiB', 'PiB', 'EiB')
@@ -475,7 +476,8 @@ class BucketLister(object):
                                 self._decode_keys,
                                 'BucketListerDecodeKeys',
                                 True):
-            pages = self._operation.paginate(self._endpoint, **kwargs)
+            pages = PrefetchingPageIterator(
+                self._operation.paginate(self._endpoint, **kwargs))
             for response, page in pages:
                 contents = page.get('Contents', [])
                 for content in contents:
@@ -77,6 +77,11 @@ class StreamingOutputArgument(BaseCLIArgument):
     def documentation(self):
         return self.HELP
 
+    @property
+    def changes_response(self):
+        # The streamed contents are saved by an after-call handler.
+        return True
+
     def add_to_parser(self, parser):
         parser.add_argument(self._name, metavar=self.py_name,
                             help=self.HELP)
@@ -10,12 +10,36 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import json
+import math
+import random
+import sys
+import time
+
 from botocore import xform_name
 from botocore.exceptions import DataNotFoundError
+from botocore.exceptions import NoCredentialsError
+from botocore.waiter import LegacyOperationMethod
 
+from awscli.argprocess import ParamError
+from awscli.arguments import CustomArgument
 from awscli.clidriver import ServiceOperation
+from awscli.customizations.arguments import OverrideRequiredArgsArgument
 from awscli.customizations.commands import BasicCommand, BasicHelp, \
     BasicDocHandler
+from awscli.utils import concurrent_map
+from awscli.utils import json_encoder
+
+
+# The most resources that are described in one call when waiting for
+# many parameter sets at once.
+MAX_COALESCED_RESOURCES = 100
+MAX_CONCURRENT_POLLS = 10
+# When waiting for many parameter sets, the delay between polls starts
+# at the waiter's delay and backs off by this factor, up to
+# MAX_POLL_DELAY_FACTOR times the waiter's delay.
+POLL_BACKOFF = 1.5
+MAX_POLL_DELAY_FACTOR = 4
 
 
 def register_add_waiters(cli):
@@ -181,8 +205,18 @@ class WaiterStateDocBuilder(object):
 class WaiterCaller(object):
     def __init__(self, waiter_name):
         self._waiter_name = waiter_name
-
-    def invoke(self, operation_object, parameters, parsed_globals):
+        # These are set by the arguments that wait for many parameter
+        # sets at once.
+        self.input_source = None
+        self.per_resource = False
+        self.quorum = None
+
+    def invoke(self, operation_object, parameters, parsed_globals,
+               cacheable=True):
+        if self.input_source is not None or self.per_resource or \
+                self.quorum is not None:
+            return self._wait_for_many(operation_object, parameters,
+                                       parsed_globals)
         # Create the endpoint based on the parsed globals
         service_object = operation_object.service
         endpoint = service_object.get_endpoint(
@@ -194,10 +228,363 @@ class WaiterCaller(object):
         waiter.wait(**parameters)
         return 0
 
+    def _wait_for_many(self, operation_object, parameters, parsed_globals,
+                       stream=None):
+        if stream is None:
+            stream = sys.stdout
+        parameter_sets = self._get_parameter_sets(parameters)
+        service_object = operation_object.service
+        if not service_object.session.get_credentials():
+            raise NoCredentialsError()
+        endpoint = service_object.get_endpoint(
+            region_name=parsed_globals.region,
+            endpoint_url=parsed_globals.endpoint_url,
+            verify=parsed_globals.verify_ssl)
+        waiter_config = get_waiter_model_from_service_object(
+            service_object).get_waiter(self._waiter_name)
+        multi_waiter = MultiWaiter(waiter_config, operation_object, endpoint)
+        if self.per_resource:
+            parameter_sets = multi_waiter.split(parameter_sets)
+        quorum = len(parameter_sets)
+        if self.quorum is not None:
+            quorum = parse_quorum(self.quorum, quorum)
+        outcomes = multi_waiter.wait(parameter_sets, quorum)
+        for outcome in outcomes:
+            stream.write(json.dumps(outcome, default=json_encoder))
+            stream.write('\n')
+        stream.flush()
+        succeeded = sum(1 for outcome in outcomes
+                        if outcome['State'] == 'success')
+        if succeeded < quorum:
+            return 255
+        return 0
+
+    def _get_parameter_sets(self, parameters):
+        if self.input_source is None:
+            return [parameters]
+        if self.input_source == '-':
+            input_file = sys.stdin
+        else:
+            source = self.input_source
+            if source.startswith('file://'):
+                source = source[len('file://'):]
+            try:
+                input_file = open(source, 'r')
+            except IOError as e:
+                raise ParamError('wait-input-json-lines',
+                                 'Unable to open %s: %s' % (source, e))
+        parameter_sets = []
+        try:
+            for line in input_file:
+                if not line.strip():
+                    continue
+                try:
+                    input_data = json.loads(line)
+                except ValueError as e:
+                    raise ParamError('wait-input-json-lines',
+                                     'Invalid JSON: %s\nJSON received: %s'
+                                     % (e, line.strip()))
+                if not isinstance(input_data, dict):
+                    raise ParamError('wait-input-json-lines',
+                                     'Expected a JSON object, received: %s'
+                                     % line.strip())
+                # Values from the command line take precedence over the
+                # values from each line, as with --cli-input-json-lines.
+                input_data.update(parameters)
+                parameter_sets.append(input_data)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+        return parameter_sets
+
+
+def parse_quorum(value, total):
+    """Convert a ``--wait-quorum`` value to a number of parameter sets.
+
+    The value is either a number of parameter sets or a percentage of
+    ``total``, such as ``90%``.
+
+    """
+    try:
+        if value.endswith('%'):
+            percentage = float(value[:-1])
+            if not 0 <= percentage <= 100:
+                raise ValueError(value)
+            count = int(math.ceil(percentage * total / 100.0))
+        else:
+            count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise ParamError('wait-quorum', 'Expected a number of resources or '
+                         'a percentage, received: %s' % value)
+    return min(count, total)
+
+
+class MultiWaiter(object):
+    """Waits for many parameter sets of the same waiter at once.
+
+    Parameter sets that only differ in the resource IDs they list, such
+    as the ``InstanceIds`` of ``DescribeInstances``, are polled with one
+    call for up to ``MAX_COALESCED_RESOURCES`` resources, and each set
+    is matched against the waiter's acceptors using only its own part
+    of the response.  Every set is polled on one shared schedule, which
+    backs off from the waiter's delay with random jitter.
+
+    :param waiter_config: The ``SingleWaiterConfig`` of the waiter.
+    :param operation_object: The operation the waiter polls.
+    :param endpoint: The endpoint all of the polls are made over.
+    """
+
+    def __init__(self, waiter_config, operation_object, endpoint):
+        self._config = waiter_config
+        self._acceptors = list(waiter_config.acceptors)
+        self._operation_method = LegacyOperationMethod(operation_object,
+                                                       endpoint)
+        self._resource_parameter = _find_resource_parameter(
+            operation_object.model.input_shape)
+
+    def split(self, parameter_sets):
+        """
+        Split parameter sets that list many resources into one parameter
+        set per resource, so an outcome is reported for each resource.
+        """
+        if self._resource_parameter is None:
+            raise ParamError('wait-per-resource', 'This waiter does not '
+                             'accept a list of resource IDs.')
+        split_sets = []
+        for parameters in parameter_sets:
+            resource_ids = parameters.get(self._resource_parameter)
+            if not resource_ids:
+                split_sets.append(parameters)
+                continue
+            for resource_id in resource_ids:
+                split_set = dict(parameters)
+                split_set[self._resource_parameter] = [resource_id]
+                split_sets.append(split_set)
+        return split_sets
+
+    def wait(self, parameter_sets, quorum=None):
+        """
+        Wait until ``quorum`` of the parameter sets, by default all of
+        them, have reached the waiter's success state, or until enough
+        of them have failed that the quorum can't be reached.
+
+        Returns a list with the outcome of each parameter set: a dict
+        with its ``Index``, ``Parameters`` and ``State``, which is one of
+        ``success``, ``failure``, ``error``, ``timeout`` or ``waiting``
+        for the sets that were still waiting when the quorum was
+        reached, and the ``Reason`` for any of the unsuccessful states.
+        """
+        if quorum is None:
+            quorum = len(parameter_sets)
+        outcomes = [{'Index': index, 'Parameters': parameters,
+                     'State': 'waiting'}
+                    for index, parameters in enumerate(parameter_sets)]
+        pending = outcomes
+        delay = self._config.delay
+        # The same total time the waiter would wait for a single set.
+        deadline = time.time() + (self._config.delay *
+                                  self._config.max_attempts)
+        while pending:
+            self._poll(pending)
+            pending = [outcome for outcome in pending
+                       if outcome['State'] == 'waiting']
+            succeeded = sum(1 for outcome in outcomes
+                            if outcome['State'] == 'success')
+            if succeeded >= quorum or succeeded + len(pending) < quorum:
+                break
+            sleep_amount = random.uniform(delay / 2.0, delay)
+            if time.time() + sleep_amount > deadline:
+                for outcome in pending:
+                    outcome['State'] = 'timeout'
+                    outcome['Reason'] = 'Max attempts exceeded'
+                break
+            time.sleep(sleep_amount)
+            delay = min(delay * POLL_BACKOFF,
+                        self._config.delay * MAX_POLL_DELAY_FACTOR)
+        return outcomes
+
+    def _poll(self, pending):
+        batches = self._create_batches(pending)
+        responses = concurrent_map(self._call_batch, batches,
+                                   max_workers=MAX_CONCURRENT_POLLS)
+        retry = []
+        for batch, response in zip(batches, responses):
+            if len(batch) > 1 and 'Error' in response:
+                # A single missing resource fails the whole call, so the
+                # sets are polled one at a time instead.
+                retry.extend(batch)
+                continue
+            for outcome in batch:
+                if len(batch) > 1:
+                    resource_ids = outcome['Parameters'][
+                        self._resource_parameter]
+                    selected, _ = _select_resources(
+                        response, self._resource_parameter[:-1],
+                        set(resource_ids))
+                    self._update(outcome, selected)
+                else:
+                    self._update(outcome, response)
+        if retry:
+            responses = concurrent_map(
+                lambda outcome: self._operation_method(
+                    **outcome['Parameters']),
+                retry, max_workers=MAX_CONCURRENT_POLLS)
+            for outcome, response in zip(retry, responses):
+                self._update(outcome, response)
+
+    def _create_batches(self, pending):
+        batches = []
+        groups = {}
+        for outcome in pending:
+            parameters = outcome['Parameters']
+            resource_ids = parameters.get(self._resource_parameter)
+            if self._resource_parameter is None or not resource_ids:
+                batches.append([outcome])
+                continue
+            others = dict(parameters)
+            del others[self._resource_parameter]
+            key = json.dumps(others, sort_keys=True, default=json_encoder)
+            batch = groups.get(key)
+            if batch is None or (
+                    sum(len(o['Parameters'][self._resource_parameter])
+                        for o in batch) + len(resource_ids) >
+                    MAX_COALESCED_RESOURCES):
+                batch = groups[key] = []
+                batches.append(batch)
+            batch.append(outcome)
+        return batches
+
+    def _call_batch(self, batch):
+        if len(batch) == 1:
+            return self._operation_method(**batch[0]['Parameters'])
+        parameters = dict(batch[0]['Parameters'])
+        resource_ids = []
+        for outcome in batch:
+            for resource_id in outcome['Parameters'][self._resource_parameter]:
+                if resource_id not in resource_ids:
+                    resource_ids.append(resource_id)
+        parameters[self._resource_parameter] = resource_ids
+        return self._operation_method(**parameters)
+
+    def _update(self, outcome, response):
+        # This mirrors a single attempt of botocore's Waiter.wait.
+        for acceptor in self._acceptors:
+            if acceptor.matcher_func(response):
+                if acceptor.state == 'success':
+                    outcome['State'] = 'success'
+                elif acceptor.state == 'failure':
+                    outcome['State'] = 'failure'
+                    outcome['Reason'] = ('Waiter encountered a terminal '
+                                         'failure state')
+                return
+        if 'Error' in response:
+            outcome['State'] = 'error'
+            outcome['Reason'] = 'Unexpected error encountered: %s' % (
+                response['Error'].get('Code'))
+
+
+def _find_resource_parameter(input_shape):
+    # The list of resource IDs that parameter sets can be combined on.
+    # The resources in the response are identified by the singular
+    # name, e.g. the ``InstanceId`` of each of the ``InstanceIds``.
+    if input_shape is None:
+        return None
+    for name, shape in input_shape.members.items():
+        if shape.type_name == 'list' and name.endswith('Ids') and \
+                shape.member.type_name == 'string':
+            return name
+    return None
+
+
+def _select_resources(value, id_key, resource_ids):
+    # Returns a copy of a response with only the elements of its lists
+    # that are, or contain, one of ``resource_ids``.  The second value
+    # returned is whether any such element was found.
+    if isinstance(value, dict):
+        if id_key in value:
+            return value, value[id_key] in resource_ids
+        selected = {}
+        found = False
+        for key, child in value.items():
+            selected[key], child_found = _select_resources(
+                child, id_key, resource_ids)
+            found = found or child_found
+        return selected, found
+    elif isinstance(value, list) and value and isinstance(value[0], dict):
+        selected = []
+        for child in value:
+            child, child_found = _select_resources(child, id_key,
+                                                   resource_ids)
+            if child_found:
+                selected.append(child)
+        return selected, bool(selected)
+    return value, False
+
+
+class WaitInputJSONLinesArgument(OverrideRequiredArgsArgument):
+    ARG_DATA = {
+        'name': 'wait-input-json-lines',
+        'help_text': 'Waits for every line of the given file, or standard '
+                     'input if ``-`` is specified, at the same time. Each '
+                     'line is a JSON string in the format provided by '
+                     '``--generate-cli-skeleton``, and values given on the '
+                     'command line override the values of every line. '
+                     'Lines that only differ in the resource IDs they list '
+                     'are polled together, and the outcome for each line is '
+                     'written as a line of JSON.',
+        'no_paramfile': True,
+    }
+
+    def __init__(self, session, waiter_caller):
+        self._waiter_caller = waiter_caller
+        super(WaitInputJSONLinesArgument, self).__init__(session)
+
+    def add_to_params(self, parameters, value):
+        if value is not None:
+            self._waiter_caller.input_source = value
+
+
+class WaiterCallerArgument(CustomArgument):
+    """An argument that sets an attribute of the ``WaiterCaller``."""
+
+    def __init__(self, waiter_caller, attribute, *args, **kwargs):
+        self._waiter_caller = waiter_caller
+        self._attribute = attribute
+        super(WaiterCallerArgument, self).__init__(*args, **kwargs)
+
+    def add_to_params(self, parameters, value):
+        if value is not None:
+            setattr(self._waiter_caller, self._attribute, value)
+
 
 class WaiterStateCommand(ServiceOperation):
     DESCRIPTION = ''
 
+    def _create_argument_table(self):
+        argument_table = super(WaiterStateCommand,
+                               self)._create_argument_table()
+        caller = self._operation_caller
+        WaitInputJSONLinesArgument(
+            self._service_object.session, caller).add_to_arg_table(
+                argument_table)
+        WaiterCallerArgument(
+            caller, 'per_resource', 'wait-per-resource', action='store_true',
+            help_text='Reports an outcome for each of the resource IDs '
+                      'given, such as each of the ``--instance-ids``, '
+                      'instead of one outcome for all of them.'
+        ).add_to_arg_table(argument_table)
+        WaiterCallerArgument(
+            caller, 'quorum', 'wait-quorum',
+            help_text='Stops waiting once this many of the resources, or '
+                      'this percentage of them if the value ends with '
+                      '``%``, have reached the desired state. By default '
+                      'all of them must reach it. The command fails if '
+                      'the quorum is not reached.'
+        ).add_to_arg_table(argument_table)
+        return argument_table
+
     def create_help_command(self):
         help_command = super(WaiterStateCommand, self).create_help_command()
         # Change the operation object's description by changing it to the
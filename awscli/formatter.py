@@ -17,6 +17,7 @@ from botocore.compat import json
 from botocore.utils import set_value_from_jmespath
 
 from awscli.table import MultiTable, Styler, ColorizedStyler
+from awscli.table import DEFAULT_SPOOL_MAX_SIZE
 from awscli import text
 from awscli import compat
 from awscli.utils import json_encoder
@@ -99,32 +100,42 @@ class TableFormatter(FullyBufferedFormatter):
     and generate a pretty printed table.  It does this without
     using the output definition from the model.
 
+    Once a table has more than ``DEFAULT_SPOOL_ROW_THRESHOLD`` rows,
+    further rows are spooled to a temporary file (spilling to disk past
+    ``DEFAULT_SPOOL_MAX_SIZE`` bytes) so that large responses can be
+    rendered without keeping every rendered row in memory.
+
     """
     def __init__(self, args, table=None):
         super(TableFormatter, self).__init__(args)
         if args.color == 'auto':
             self.table = MultiTable(initial_section=False,
-                                    column_separator='|')
+                                    column_separator='|',
+                                    spool_max_size=DEFAULT_SPOOL_MAX_SIZE)
         elif args.color == 'off':
             styler = Styler()
             self.table = MultiTable(initial_section=False,
-                                    column_separator='|', styler=styler)
+                                    column_separator='|', styler=styler,
+                                    spool_max_size=DEFAULT_SPOOL_MAX_SIZE)
         elif args.color == 'on':
             styler = ColorizedStyler()
             self.table = MultiTable(initial_section=False,
-                                    column_separator='|', styler=styler)
+                                    column_separator='|', styler=styler,
+                                    spool_max_size=DEFAULT_SPOOL_MAX_SIZE)
         else:
             raise ValueError("Unknown color option: %s" % args.color)
 
     def _format_response(self, operation, response, stream):
-        if self._build_table(operation.name, response):
-            try:
+        try:
+            if self._build_table(operation.name, response):
                 self.table.render(stream)
-            except IOError:
-                # If they're piping stdout to another process which exits before
-                # we're done writing all of our output, we'll get an error about a
-                # closed pipe which we can safely ignore.
-                pass
+        except IOError:
+            # If they're piping stdout to another process which exits before
+            # we're done writing all of our output, we'll get an error about a
+            # closed pipe which we can safely ignore.
+            pass
+        finally:
+            self.table.close()
 
     def _build_table(self, title, current, indent_level=0):
         if not current:
@@ -19,6 +19,7 @@ registered with the event system.
 from awscli.argprocess import ParamShorthand
 from awscli.argprocess import uri_param
 from awscli.errorhandler import ErrorHandler
+from awscli.configcache import register_config_snapshot
 from awscli.customizations.streamingoutputarg import add_streaming_output_arg
 from awscli.customizations.addexamples import add_examples
 from awscli.customizations.removals import register_removals
@@ -51,6 +52,7 @@ from awscli.customizations.cliinputjson import register_cli_input_json
 from awscli.customizations.generatecliskeleton import \
     register_generate_cli_skeleton
 from awscli.customizations.assumerole import register_assume_role_provider
+from awscli.customizations.credentialcache import register_credential_cache
 from awscli.customizations.waiters import register_add_waiters
 from awscli.customizations.codedeploy import initialize as codedeploy_init
 from awscli.customizations.configservice.subscribe import register_subscribe
@@ -114,6 +116,8 @@ def awscli_initialize(event_handlers):
     register_s3_endpoint(event_handlers)
     register_generate_cli_skeleton(event_handlers)
     register_assume_role_provider(event_handlers)
+    register_credential_cache(event_handlers)
+    register_config_snapshot(event_handlers)
     register_add_waiters(event_handlers)
     codedeploy_init(event_handlers)
     register_subscribe(event_handlers)
@@ -11,12 +11,17 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import sys
+import hashlib
+import json
 import logging
 import os
 import platform
 import shlex
+import shutil
 from subprocess import Popen, PIPE
 
+import docutils
+from botocore import __version__ as botocore_version
 from docutils.core import publish_string
 from docutils.writers import manpage
 
@@ -24,13 +29,21 @@ import bcdoc.docevents
 from bcdoc.restdoc import ReSTDocument
 from bcdoc.textwriter import TextWriter
 
+from awscli import __version__
 from awscli.clidocs import ProviderDocumentEventHandler
 from awscli.clidocs import ServiceDocumentEventHandler
 from awscli.clidocs import OperationDocumentEventHandler
 from awscli.argprocess import ParamShorthand
+from awscli.utils import write_file_atomically
 
 
 LOG = logging.getLogger('awscli.help')
+HELP_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'help-cache'))
+# The number of fingerprint directories kept in the help cache, so that
+# several CLI versions or virtualenvs sharing a home directory don't
+# keep removing each other's cached help.
+MAX_HELP_CACHE_FINGERPRINTS = 5
 
 
 class ExecutableNotFoundError(Exception):
@@ -50,14 +63,100 @@ def get_renderer():
         return PosixHelpRenderer()
 
 
+def get_help_cache(session):
+    """
+    Return the HelpCache used to store rendered help pages.
+    """
+    return HelpCache(session)
+
+
+class HelpCache(object):
+    """
+    On-disk cache of rendered help pages.
+
+    Entries are stored in a directory named after a fingerprint of
+    everything that can change the generated help: the CLI, botocore
+    and docutils versions, the data path and the configured plugins.
+    When any of these change a new directory is used, and only the
+    ``MAX_HELP_CACHE_FINGERPRINTS`` most recently used directories are
+    kept.
+    """
+
+    def __init__(self, session, cache_dir=HELP_CACHE_DIR):
+        self._cache_dir = cache_dir
+        self._working_dir = os.path.join(
+            cache_dir, self._compute_fingerprint(session))
+
+    def _compute_fingerprint(self, session):
+        key = json.dumps({
+            'aws-cli': __version__,
+            'botocore': botocore_version,
+            'docutils': docutils.__version__,
+            'data_path': session.get_config_variable('data_path'),
+            'plugins': session.full_config.get('plugins', {}),
+        }, sort_keys=True)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, name):
+        """
+        Return the cached bytes stored under ``name`` or None.
+        """
+        try:
+            with open(self._convert_name(name), 'rb') as f:
+                contents = f.read()
+            # The modification time is used to find the least recently
+            # used directories when stale entries are removed.
+            os.utime(self._working_dir, None)
+            return contents
+        except (IOError, OSError):
+            return None
+
+    def set(self, name, contents):
+        """
+        Store the bytes in ``contents`` under ``name``.
+
+        Failing to write to the cache is not an error, the help page
+        will simply be rendered again next time.
+        """
+        try:
+            if not os.path.isdir(self._working_dir):
+                self._remove_stale_entries()
+            write_file_atomically(self._convert_name(name), contents)
+        except (IOError, OSError):
+            LOG.debug("Unable to cache help page %s", name, exc_info=True)
+
+    def _remove_stale_entries(self):
+        # Called before the working directory is created, so this leaves
+        # room for it.
+        if not os.path.isdir(self._cache_dir):
+            return
+        entries = []
+        for entry in os.listdir(self._cache_dir):
+            path = os.path.join(self._cache_dir, entry)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        for _, path in entries[MAX_HELP_CACHE_FINGERPRINTS - 1:]:
+            LOG.debug("Removing stale help cache %s", path)
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _convert_name(self, name):
+        return os.path.join(self._working_dir, name)
+
+
 class HelpRenderer(object):
     """
     Interface for a help renderer.
 
     The renderer is responsible for displaying the help content on
-    a particular platform.
+    a particular platform.  If ``cache`` is set to a ``HelpCache``,
+    a renderer can use it to store its own intermediate output.
     """
 
+    cache = None
+
     def render(self, contents):
         """
         Each implementation of HelpRenderer must implement this
@@ -83,18 +182,30 @@ class PosixHelpRenderer(HelpRenderer):
         return shlex.split(pager)
 
     def render(self, contents):
+        groff_output = None
+        if self.cache is not None:
+            # The groff output only depends on the ReST contents, so
+            # it's cached under a hash of them.
+            cache_name = hashlib.sha1(contents).hexdigest() + '.txt'
+            groff_output = self.cache.get(cache_name)
+        if groff_output is None:
+            groff_output = self._render_groff(contents)
+            if self.cache is not None:
+                self.cache.set(cache_name, groff_output)
+        cmdline = self.get_pager_cmdline()
+        LOG.debug("Running command: %s", cmdline)
+        p4 = self._popen(cmdline, stdin=PIPE)
+        p4.communicate(input=groff_output)
+        sys.exit(1)
+
+    def _render_groff(self, contents):
         man_contents = publish_string(contents, writer=manpage.Writer())
         if not self._exists_on_path('groff'):
             raise ExecutableNotFoundError('groff')
         cmdline = ['groff', '-man', '-T', 'ascii']
         LOG.debug("Running command: %s", cmdline)
         p3 = self._popen(cmdline, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        groff_output = p3.communicate(input=man_contents)[0]
-        cmdline = self.get_pager_cmdline()
-        LOG.debug("Running command: %s", cmdline)
-        p4 = self._popen(cmdline, stdin=PIPE)
-        p4.communicate(input=groff_output)
-        sys.exit(1)
+        return p3.communicate(input=man_contents)[0]
 
     def _get_rst2man_name(self):
         if self._exists_on_path('rst2man.py'):
@@ -225,14 +336,32 @@ class HelpCommand(object):
         pass
 
     def __call__(self, args, parsed_globals):
+        cache = None
+        if not getattr(parsed_globals, 'no_cache', False):
+            cache = get_help_cache(self.session)
+        self.renderer.cache = cache
+        contents = None
+        cache_name = self.event_class + '.rst'
+        if cache is not None:
+            contents = cache.get(cache_name)
+        if contents is None:
+            contents = self.generate_contents()
+            if cache is not None:
+                cache.set(cache_name, contents)
+        self.renderer.render(contents)
+
+    def generate_contents(self):
+        """
+        Run the documentation pipeline and return the ReST document.
+        """
         # Create an event handler for a Provider Document
         instance = self.EventHandlerClass(self)
         # Now generate all of the events for a Provider document.
         # We pass ourselves along so that we can, in turn, get passed
         # to all event handlers.
         bcdoc.docevents.generate_events(self.session, self)
-        self.renderer.render(self.doc.getvalue())
         instance.unregister()
+        return self.doc.getvalue()
 
 
 class ProviderHelpCommand(HelpCommand):
@@ -12,17 +12,24 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import hashlib
+import json
 import logging
+import mmap
 import os
 
 from botocore.vendored import requests
 from awscli.compat import six
 
 from awscli.compat import compat_open
+from awscli.utils import write_file_atomically
 
 
 logger = logging.getLogger(__name__)
 
+URI_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'paramfile-cache'))
+
 # These are special cased arguments that do _not_ get the
 # special param file processing.  This is typically because it
 # refers to an actual URI of some sort and we don't want to actually
@@ -71,7 +78,7 @@ class ResourceLoadingError(Exception):
     pass
 
 
-def get_paramfile(path):
+def get_paramfile(path, blob_shape=None):
     """
     It is possible to pass parameters to operations by referring
     to files or URI's.  If such a reference is detected, this
@@ -79,9 +86,18 @@ def get_paramfile(path):
     and returns it.  If there are any errors or if the ``path``
     does not appear to refer to a file or URI, a ``None`` is
     returned.
+
+    If ``blob_shape`` is the shape of a blob parameter, a ``fileb://``
+    file isn't read into memory.  A file object is returned for
+    streaming blobs, and a read only memory mapped view of the file
+    for any other blob.
     """
     data = None
     if isinstance(path, six.string_types):
+        if blob_shape is not None and path.startswith('fileb://'):
+            return get_blob_file(
+                'fileb://', path,
+                streaming=blob_shape.serialization.get('streaming', False))
         for prefix in PrefixMap:
             if path.startswith(prefix):
                 kwargs = KwargsMap.get(prefix, {})
@@ -89,12 +105,17 @@ def get_paramfile(path):
     return data
 
 
-def get_file(prefix, path, mode):
+def _get_file_path(prefix, path):
     file_path = path[len(prefix):]
     file_path = os.path.expanduser(file_path)
     file_path = os.path.expandvars(file_path)
     if not os.path.isfile(file_path):
         raise ResourceLoadingError("file does not exist: %s" % file_path)
+    return file_path
+
+
+def get_file(prefix, path, mode):
+    file_path = _get_file_path(prefix, path)
     try:
         with compat_open(file_path, mode) as f:
             return f.read()
@@ -103,10 +124,43 @@ def get_file(prefix, path, mode):
             path, e))
 
 
+def get_blob_file(prefix, path, streaming=False):
+    file_path = _get_file_path(prefix, path)
+    try:
+        f = open(file_path, 'rb')
+    except (OSError, IOError) as e:
+        raise ResourceLoadingError('Unable to load paramfile %s: %s' % (
+            path, e))
+    if streaming:
+        # The file is read as the request is sent, and it's seekable
+        # so the request can be retried.
+        return f
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError):
+        # Empty files, and files such as pipes, can't be mapped.
+        return f.read()
+    finally:
+        # The mapping stays valid after the file is closed.
+        f.close()
+
+
 def get_uri(prefix, uri):
+    cache = get_uri_cache()
+    entry = cache.get(uri)
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
     try:
-        r = requests.get(uri)
-        if r.status_code == 200:
+        r = requests.get(uri, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            logger.debug("Using cached copy of %s", uri)
+            return entry['content']
+        elif r.status_code == 200:
+            cache.set(uri, r)
             return r.text
         else:
             raise ResourceLoadingError(
@@ -116,6 +170,70 @@ def get_uri(prefix, uri):
         raise ResourceLoadingError('Unable to retrieve %s: %s' % (uri, e))
 
 
+def get_uri_cache():
+    """
+    Return the URICache used to store http(s) parameter sources.
+    """
+    return URICache()
+
+
+class URICache(object):
+    """
+    On-disk copies of parameters retrieved from http(s) URIs.
+
+    A copy is only kept if the response has an ``ETag`` or
+    ``Last-Modified`` header, and it is only used after the server
+    confirms, with a conditional request, that it hasn't changed.
+
+    :param cache_dir: The directory the copies are stored in.
+    """
+
+    def __init__(self, cache_dir=URI_CACHE_DIR):
+        self._cache_dir = cache_dir
+
+    def get(self, uri):
+        """
+        Return the entry stored for ``uri``, a dict with its ``etag``,
+        ``last_modified`` and ``content``, or None.
+        """
+        try:
+            with open(self._convert_uri(uri), 'rb') as f:
+                entry = json.loads(f.read().decode('utf-8'))
+            if entry['uri'] != uri or 'content' not in entry:
+                return None
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        return entry
+
+    def set(self, uri, response):
+        """
+        Store the content of the ``response`` retrieved from ``uri``.
+
+        Failing to write to the cache is not an error, the content will
+        simply be retrieved in full next time.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        cache_control = response.headers.get('Cache-Control', '')
+        if not (etag or last_modified) or 'no-store' in cache_control:
+            return
+        contents = json.dumps({
+            'uri': uri,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content': response.text,
+        }).encode('utf-8')
+        try:
+            write_file_atomically(self._convert_uri(uri), contents)
+        except (IOError, OSError):
+            logger.debug("Unable to cache %s", uri, exc_info=True)
+
+    def _convert_uri(self, uri):
+        return os.path.join(
+            self._cache_dir,
+            hashlib.sha256(uri.encode('utf-8')).hexdigest() + '.json')
+
+
 PrefixMap = {'file://': get_file,
              'fileb://': get_file,
              'http://': get_uri,
@@ -0,0 +1,245 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""On-disk cache of responses from read-only operations.
+
+The cache is opt-in: it is only used when a TTL is given with the
+``--cache-ttl`` global option or the ``cli_cache_ttl`` config variable.
+Each response is stored in its own file, named after a hash of the
+profile, credentials, region, endpoint, operation and parameters used to
+make the call.  Entries are written atomically so any number of
+processes can share the cache without locking, and the least recently
+used entries are removed once the cache grows past its maximum size.
+Paginated operations store the response of each page, which are
+replayed through a page iterator so that they are displayed exactly
+like pages retrieved from the service.
+
+"""
+import base64
+import copy
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+
+from botocore.utils import parse_timestamp
+
+from awscli.compat import six
+from awscli.utils import is_read_only_operation
+from awscli.utils import prune_lru_files
+from awscli.utils import write_file_atomically
+
+
+LOG = logging.getLogger(__name__)
+RESPONSE_CACHE_DIR = os.path.expanduser(
+    os.path.join('~', '.aws', 'cli', 'response-cache'))
+DEFAULT_MAX_CACHE_SIZE = 50 * 1024 * 1024
+CACHE_TTL_CONFIG_VAR = 'cli_cache_ttl'
+_ENTRY_SUFFIX = '.json'
+
+# Read-only operations whose responses are credentials, one-time tokens
+# or reads from a stream.  These are never cached, since the cache would
+# write them to disk and replay them for the whole TTL.
+NON_CACHEABLE_OPERATIONS = set([
+    ('cognito-identity', 'GetCredentialsForIdentity'),
+    ('cognito-identity', 'GetId'),
+    ('cognito-identity', 'GetOpenIdToken'),
+    ('cognito-identity', 'GetOpenIdTokenForDeveloperIdentity'),
+    ('ec2', 'GetConsoleOutput'),
+    ('ec2', 'GetPasswordData'),
+    ('kinesis', 'GetRecords'),
+    ('kinesis', 'GetShardIterator'),
+    ('lambda', 'GetFunction'),
+    ('sts', 'GetFederationToken'),
+    ('sts', 'GetSessionToken'),
+])
+# Operations with any of these words in their name are treated the
+# same way, so that new operations of this kind aren't cached either.
+NON_CACHEABLE_NAME_PARTS = ('Credential', 'Password', 'Secret', 'Token')
+
+
+def get_response_cache():
+    """
+    Return the ResponseCache used to store responses.
+    """
+    return ResponseCache()
+
+
+def parse_cache_ttl(value, name='--cache-ttl'):
+    """Convert a cache TTL to a number of seconds.
+
+    :param name: The name of the option or config variable the value
+        came from, used in the error message.
+
+    """
+    try:
+        ttl = int(value)
+    except (TypeError, ValueError):
+        ttl = -1
+    if ttl < 0:
+        raise ValueError('Bad value for %s "%s": expected a number of '
+                         'seconds.' % (name, value))
+    return ttl
+
+
+def is_cacheable_operation(operation_object):
+    """Determine if the responses of an operation can be cached.
+
+    Only read only operations are cached, and never the operations in
+    ``NON_CACHEABLE_OPERATIONS`` or with a name containing one of
+    ``NON_CACHEABLE_NAME_PARTS``.
+
+    """
+    name = operation_object.name
+    if (operation_object.service.endpoint_prefix, name) in \
+            NON_CACHEABLE_OPERATIONS:
+        return False
+    if any(part in name for part in NON_CACHEABLE_NAME_PARTS):
+        return False
+    return is_read_only_operation(operation_object)
+
+
+def compute_cache_key(operation_object, endpoint, parameters, profile,
+                      credentials=None, paginate=False):
+    """Return the name of the cache entry for an operation call."""
+    access_key = None
+    if credentials is not None:
+        access_key = credentials.access_key
+    key = json.dumps({
+        'profile': profile,
+        'access_key': access_key,
+        'region': endpoint.region_name,
+        'host': endpoint.host,
+        'service': operation_object.service.endpoint_prefix,
+        'operation': operation_object.name,
+        'parameters': parameters,
+        'paginate': paginate,
+    }, sort_keys=True, cls=_ResponseEncoder)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def record_pages(page_iterator):
+    """Retrieve every page of ``page_iterator``.
+
+    Returns the parsed response of each call the page iterator made.
+    The responses are copied before the page iterator truncates them for
+    ``--max-items`` or ``--starting-token``, so passing them to
+    ``replay_pages`` with the same parameters gives the same pages.
+
+    """
+    pages = []
+    make_request = page_iterator._make_request
+
+    def record(current_kwargs):
+        response = make_request(current_kwargs)
+        page = copy.deepcopy(page_iterator._extract_parsed_response(response))
+        page.pop('ResponseMetadata', None)
+        pages.append(page)
+        return response
+
+    page_iterator._make_request = record
+    for _ in page_iterator:
+        pass
+    return pages
+
+
+def replay_pages(page_iterator, pages):
+    """Make ``page_iterator`` use the pages from ``record_pages``.
+
+    The page iterator returns the recorded responses instead of calling
+    the operation, as ``(http_response, parsed)`` tuples with no HTTP
+    response.
+
+    """
+    responses = iter(pages)
+    page_iterator._make_request = lambda current_kwargs: (
+        None, next(responses))
+    return page_iterator
+
+
+class _ResponseEncoder(json.JSONEncoder):
+    # Parsed responses can contain datetimes and, for blob members,
+    # bytes.  These are tagged so they can be restored when read back.
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime):
+            return {'__datetime__': obj.isoformat()}
+        elif isinstance(obj, six.binary_type):
+            return {'__bytes__': base64.b64encode(obj).decode('ascii')}
+        return super(_ResponseEncoder, self).default(obj)
+
+
+def _decode_tagged_value(obj):
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return parse_timestamp(obj['__datetime__'])
+        elif '__bytes__' in obj:
+            return base64.b64decode(obj['__bytes__'].encode('ascii'))
+    return obj
+
+
+class ResponseCache(object):
+    """
+    A size bounded, least recently used cache of parsed responses.
+
+    :param cache_dir: The directory the entries are stored in.
+    :param max_size: The total size in bytes of the entries to keep.
+    """
+
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR,
+                 max_size=DEFAULT_MAX_CACHE_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+
+    def get(self, key, ttl):
+        """
+        Return the response stored under ``key`` if it was stored less
+        than ``ttl`` seconds ago, otherwise None.
+        """
+        filename = self._convert_key(key)
+        try:
+            with open(filename, 'rb') as f:
+                entry = json.loads(f.read().decode('utf-8'),
+                                   object_hook=_decode_tagged_value)
+            if time.time() - entry['created'] >= ttl:
+                return None
+            # The modification time is used to find the least recently
+            # used entries when the cache is pruned.
+            os.utime(filename, None)
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        LOG.debug("Using cached response %s", key)
+        return entry['response']
+
+    def set(self, key, response):
+        """
+        Store ``response`` under ``key``.
+
+        Failing to write to the cache is not an error, the operation
+        will simply be called again next time.
+        """
+        try:
+            contents = json.dumps(
+                {'created': time.time(), 'response': response},
+                cls=_ResponseEncoder).encode('utf-8')
+        except (TypeError, ValueError):
+            LOG.debug("Unable to serialize response %s", key, exc_info=True)
+            return
+        try:
+            write_file_atomically(self._convert_key(key), contents)
+            prune_lru_files(self._cache_dir, self._max_size, _ENTRY_SUFFIX)
+        except (IOError, OSError):
+            LOG.debug("Unable to cache response %s", key, exc_info=True)
+
+    def _convert_key(self, key):
+        return os.path.join(self._cache_dir, key + _ENTRY_SUFFIX)
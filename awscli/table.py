@@ -13,11 +13,22 @@
 import os
 import sys
 import struct
+import tempfile
 
 import colorama
+from botocore.compat import json
+
 from awscli.compat import six
 
 
+# The number of rows a RowSpool will keep in memory before it starts
+# writing rows to a temporary file.
+DEFAULT_SPOOL_ROW_THRESHOLD = 10000
+# The number of bytes of spooled rows a RowSpool will hold in memory
+# before spilling over to a temporary file on disk.
+DEFAULT_SPOOL_MAX_SIZE = 1024 * 1024
+
+
 def determine_terminal_width(default_width=80):
     # If we can't detect the terminal width, the default_width is returned.
     try:
@@ -119,13 +130,12 @@ class IndentedStream(object):
         self._right_indent_char = right_indent_char
 
     def write(self, text):
-        self._stream.write(self._left_indent_char * self._indent_level)
+        left = self._left_indent_char * self._indent_level
         if text.endswith('\n'):
-            self._stream.write(text[:-1])
-            self._stream.write(self._right_indent_char * self._indent_level)
-            self._stream.write('\n')
+            right = self._right_indent_char * self._indent_level
+            self._stream.write(''.join([left, text[:-1], right, '\n']))
         else:
-            self._stream.write(text)
+            self._stream.write(left + text)
 
     def __getattr__(self, attr):
         return getattr(self._stream, attr)
@@ -169,13 +179,107 @@ class ColorizedStyler(Styler):
                 text + colorama.Style.RESET_ALL)
 
 
+class RowSpool(object):
+    """Append only storage for the rows of a table.
+
+    Up to ``row_threshold`` rows are kept in memory.  Past that, rows
+    are serialized as JSON lines into a single spooled temporary file,
+    which is kept in memory until it grows past ``max_size`` bytes and
+    then rolled over to disk.  Small tables are rendered exactly as
+    before, while tables with a very large number of rows don't need
+    to hold every row in memory.
+
+    """
+    def __init__(self, max_size=DEFAULT_SPOOL_MAX_SIZE,
+                 row_threshold=DEFAULT_SPOOL_ROW_THRESHOLD):
+        self._max_size = max_size
+        self._row_threshold = row_threshold
+        self._rows_in_memory = 0
+        self._file = None
+
+    def new_rows(self):
+        return SpooledRows(self)
+
+    def keep_in_memory(self):
+        # Returns True if one more row can be kept in memory.
+        if self._rows_in_memory >= self._row_threshold:
+            return False
+        self._rows_in_memory += 1
+        return True
+
+    def write(self, row):
+        # Returns the offset of the row that was written.
+        if self._file is None:
+            self._file = tempfile.SpooledTemporaryFile(
+                max_size=self._max_size)
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(json.dumps(row).encode('utf-8') + b'\n')
+        return offset
+
+    def read(self, offset):
+        self._file.seek(offset)
+        return json.loads(self._file.readline().decode('utf-8'))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class SpooledRows(object):
+    """The rows of a single section, stored in a ``RowSpool``.
+
+    This supports the subset of the list interface that ``Section``
+    and ``MultiTable`` need.  Rows are kept in a list until the spool
+    runs out of in memory rows, after which the rows of the section
+    are moved to the spool and only their offsets are kept.
+
+    """
+    def __init__(self, spool):
+        self._spool = spool
+        self._rows = []
+        self._offsets = None
+
+    def append(self, row):
+        if self._offsets is None:
+            if self._spool.keep_in_memory():
+                self._rows.append(row)
+                return
+            self._offsets = [self._spool.write(r) for r in self._rows]
+            self._rows = None
+        self._offsets.append(self._spool.write(row))
+
+    def __len__(self):
+        if self._offsets is None:
+            return len(self._rows)
+        return len(self._offsets)
+
+    def __iter__(self):
+        if self._offsets is None:
+            return iter(self._rows)
+        return (self._spool.read(offset) for offset in self._offsets)
+
+    def __getitem__(self, index):
+        if self._offsets is None:
+            return self._rows[index]
+        return self._spool.read(self._offsets[index])
+
+
 class MultiTable(object):
     def __init__(self, terminal_width=None, initial_section=True,
                  column_separator='|', terminal=None,
-                 styler=None, auto_reformat=True):
+                 styler=None, auto_reformat=True, spool_max_size=None,
+                 spool_row_threshold=DEFAULT_SPOOL_ROW_THRESHOLD):
         self._auto_reformat = auto_reformat
+        # If a spool_max_size is provided, rows past the
+        # spool_row_threshold are stored in a RowSpool instead of
+        # being kept in memory.
+        if spool_max_size is not None:
+            self._spool = RowSpool(spool_max_size, spool_row_threshold)
+        else:
+            self._spool = None
         if initial_section:
-            self._current_section = Section()
+            self._current_section = self._create_section()
             self._sections = [self._current_section]
         else:
             self._current_section = None
@@ -203,11 +307,20 @@ class MultiTable(object):
         self._current_section.add_row(row_elements)
 
     def new_section(self, title, indent_level=0):
-        self._current_section = Section()
+        self._current_section = self._create_section()
         self._sections.append(self._current_section)
         self._current_section.add_title(title)
         self._current_section.indent_level = indent_level
 
+    def _create_section(self):
+        if self._spool is None:
+            return Section()
+        return Section(rows=self._spool.new_rows())
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+
     def render(self, stream):
         max_width = self._calculate_max_width()
         should_convert_table = self._determine_conversion_needed(max_width)
@@ -257,9 +370,7 @@ class MultiTable(object):
         # the width of each of the columns.
         widths = section.calculate_column_widths(padding=4,
                                                  max_width=max_width)
-        # TODO: Built a list instead of +=, it's more efficient.
-        current = ''
-        length_so_far = 0
+        parts = []
         # The first cell needs both left and right edges '|  foo  |'
         # while subsequent cells only need right edges '  foo  |'.
         first = True
@@ -270,12 +381,12 @@ class MultiTable(object):
                 first = False
             else:
                 left_edge = ''
-            current += center_text(text=stylized_header, length=width,
-                                   left_edge=left_edge, right_edge='|',
-                                   text_length=len(header))
-            length_so_far += width
+            parts.append(center_text(text=stylized_header, length=width,
+                                     left_edge=left_edge, right_edge='|',
+                                     text_length=len(header)))
+        parts.append('\n')
         self._write_line_break(stream, widths)
-        stream.write(current + '\n')
+        stream.write(''.join(parts))
 
     def _write_line_break(self, stream, widths):
         # Write out something like:
@@ -300,10 +411,7 @@ class MultiTable(object):
             return
         self._write_line_break(stream, widths)
         for row in section.rows:
-            # TODO: Built the string in a list then join instead of using +=,
-            # it's more efficient.
-            current = ''
-            length_so_far = 0
+            parts = []
             first = True
             for width, element in zip(widths, row):
                 if first:
@@ -312,20 +420,22 @@ class MultiTable(object):
                 else:
                     left_edge = ''
                 stylized = self._styler.style_row_element(element)
-                current += align_left(text=stylized, length=width,
-                                      left_edge=left_edge,
-                                      right_edge=self._column_separator,
-                                      text_length=len(element))
-                length_so_far += width
-            stream.write(current + '\n')
+                parts.append(align_left(text=stylized, length=width,
+                                        left_edge=left_edge,
+                                        right_edge=self._column_separator,
+                                        text_length=len(element)))
+            parts.append('\n')
+            stream.write(''.join(parts))
         self._write_line_break(stream, widths)
 
 
 class Section(object):
-    def __init__(self):
+    def __init__(self, rows=None):
         self.title = ''
         self.headers = []
-        self.rows = []
+        if rows is None:
+            rows = []
+        self.rows = rows
         self.indent_level = 0
         self._num_cols = None
         self._max_widths = []
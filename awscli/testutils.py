@@ -155,6 +155,11 @@ class BaseCLIDriverTest(unittest.TestCase):
         }
         self.environ_patch = mock.patch('os.environ', self.environ)
         self.environ_patch.start()
+        # Help pages should always be generated rather than being
+        # read from the user's help cache.
+        self.help_cache_patch = mock.patch('awscli.help.get_help_cache',
+                                           return_value=None)
+        self.help_cache_patch.start()
         emitter = HierarchicalEmitter()
         session = Session(EnvironmentVariables, emitter, loader=_LOADER)
         load_plugins({}, event_hooks=emitter)
@@ -164,6 +169,7 @@ class BaseCLIDriverTest(unittest.TestCase):
 
     def tearDown(self):
         self.environ_patch.stop()
+        self.help_cache_patch.stop()
 
 
 class BaseAWSHelpOutputTest(BaseCLIDriverTest):
@@ -235,6 +241,9 @@ class BaseAWSCommandParamsTest(unittest.TestCase):
         }
         self.environ_patch = mock.patch('os.environ', self.environ)
         self.environ_patch.start()
+        self.help_cache_patch = mock.patch('awscli.help.get_help_cache',
+                                           return_value=None)
+        self.help_cache_patch.start()
         self.http_response = requests.models.Response()
         self.http_response.status_code = 200
         self.parsed_response = {}
@@ -247,6 +256,7 @@ class BaseAWSCommandParamsTest(unittest.TestCase):
     def tearDown(self):
         # This clears all the previous registrations.
         self.environ_patch.stop()
+        self.help_cache_patch.stop()
         if self.make_request_is_patched:
             self.make_request_patch.stop()
 
@@ -13,8 +13,47 @@
 from awscli.compat import six
 
 
+# The number of characters buffered before they are written to the
+# underlying stream.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
 def format_text(data, stream):
-    _format_text(data, stream)
+    buffered = BufferedTextStream(stream)
+    try:
+        _format_text(data, buffered)
+    finally:
+        buffered.flush()
+
+
+class BufferedTextStream(object):
+    """Collect writes and send them to a stream in batches.
+
+    Text output is made up of a very large number of small writes,
+    and each write to stdout (especially the codecs writer we use on
+    python2) has a fixed overhead.  Joining the writes together before
+    sending them to the stream avoids paying that cost for every field.
+
+    """
+    def __init__(self, stream, max_size=None):
+        if max_size is None:
+            max_size = DEFAULT_BUFFER_SIZE
+        self._stream = stream
+        self._max_size = max_size
+        self._buffer = []
+        self._size = 0
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._size += len(data)
+        if self._size >= self._max_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._size = 0
 
 
 def _format_text(item, stream, identifier=None, scalar_keys=None):
@@ -25,18 +64,14 @@ def _format_text(item, stream, identifier=None, scalar_keys=None):
     else:
         # If it's not a list or a dict, we just write the scalar
         # value out directly.
-        stream.write(six.text_type(item))
-        stream.write('\n')
+        stream.write(six.text_type(item) + '\n')
 
 
 def _format_list(item, identifier, stream):
     if not item:
         return
     if any(isinstance(el, dict) for el in item):
-        all_keys = _all_scalar_keys(item)
-        for element in item:
-            _format_text(element, stream=stream, identifier=identifier,
-                         scalar_keys=all_keys)
+        _format_list_of_dicts(item, identifier, stream)
     elif any(isinstance(el, list) for el in item):
         scalar_elements, non_scalars = _partition_list(item)
         if scalar_elements:
@@ -66,8 +101,29 @@ def _format_scalar_list(elements, identifier, stream):
                                        item))
     else:
         # For a bare list, just print the contents.
-        stream.write('\t'.join([six.text_type(item) for item in elements]))
-        stream.write('\n')
+        stream.write(
+            '\t'.join([six.text_type(item) for item in elements]) + '\n')
+
+
+def _format_list_of_dicts(item, identifier, stream):
+    # The columns are the same for every element in the list, so we
+    # compute them once up front instead of once per element.
+    scalar_keys = _all_scalar_keys(item)
+    scalar_key_set = set(scalar_keys)
+    prefix = []
+    if identifier is not None:
+        prefix = [identifier.upper()]
+    text_type = six.text_type
+    for element in item:
+        if scalar_keys:
+            get = element.get
+            stream.write('\t'.join(
+                prefix + [text_type(get(key, '')) for key in scalar_keys]
+            ) + '\n')
+        for key in sorted(element):
+            if key not in scalar_key_set:
+                _format_text(item=element[key], stream=stream,
+                             identifier=key)
 
 
 def _format_dict(scalar_keys, item, identifier, stream):
@@ -75,8 +131,7 @@ def _format_dict(scalar_keys, item, identifier, stream):
     if scalars:
         if identifier is not None:
             scalars.insert(0, identifier.upper())
-        stream.write('\t'.join(scalars))
-        stream.write('\n')
+        stream.write('\t'.join(scalars) + '\n')
     for new_identifier, non_scalar in non_scalars:
         _format_text(item=non_scalar, stream=stream,
                      identifier=new_identifier)
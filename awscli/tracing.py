@@ -0,0 +1,287 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+"""Opt-in timing instrumentation for the CLI.
+
+Tracing is enabled with the ``--debug-timing`` global option, which
+prints a report of where time was spent to stderr, or with the
+``AWS_CLI_TRACE_EVENTS`` environment variable.  If the environment
+variable is set to ``1`` the same report is printed, otherwise its value
+is used as the name of a file to write a Chrome trace (viewable in
+``chrome://tracing``) to.
+
+The tracer records spans for the phases of ``CLIDriver.main``, every
+emitted event, every handler invoked for an event and every module
+imported while the CLI runs.
+
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from botocore.hooks import HierarchicalEmitter
+
+from awscli.compat import six
+
+
+LOG = logging.getLogger(__name__)
+TRACE_ENV_VAR = 'AWS_CLI_TRACE_EVENTS'
+DEBUG_TIMING_OPTION = '--debug-timing'
+# The number of entries shown in each section of the timing report.
+REPORT_LIMIT = 25
+
+Span = namedtuple('Span', ['category', 'name', 'start', 'duration',
+                           'self_duration', 'thread_id'])
+
+
+def create_tracer(args, environ=None):
+    """Return an ``EventTracer`` if tracing was requested, else None.
+
+    This is checked before the command line is parsed so that the
+    loading of plugins is traced as well.
+
+    """
+    if environ is None:
+        environ = os.environ
+    value = environ.get(TRACE_ENV_VAR, '')
+    if DEBUG_TIMING_OPTION in args or value == '1':
+        return EventTracer()
+    elif value:
+        return EventTracer(trace_filename=value)
+    return None
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def phase(tracer, name):
+    """Return a context manager that records ``name`` as a phase.
+
+    Does nothing if ``tracer`` is None.
+
+    """
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span('phase', name)
+
+
+class _Span(object):
+    def __init__(self, tracer, category, name):
+        self._tracer = tracer
+        self._category = category
+        self._name = name
+
+    def __enter__(self):
+        self._stack = self._tracer._get_stack()
+        # Each entry on the stack accumulates the time spent in
+        # spans nested inside of it, so self time can be computed.
+        self._child_time = [0.0]
+        self._stack.append(self._child_time)
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.time() - self._start
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][0] += duration
+        self._tracer.add_span(Span(
+            self._category, self._name, self._start, duration,
+            duration - self._child_time[0], threading.current_thread().ident))
+        return False
+
+
+class EventTracer(object):
+    """Records timed spans and reports on them.
+
+    :param trace_filename: If given, ``finish()`` writes a Chrome trace
+        to this file instead of printing a report.
+    :param stream: The stream the report is written to, defaults to
+        stderr.
+
+    """
+    def __init__(self, trace_filename=None, stream=None):
+        self._trace_filename = trace_filename
+        self._stream = stream
+        self._spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start_time = time.time()
+        self._original_import = None
+
+    @property
+    def spans(self):
+        return list(self._spans)
+
+    def span(self, category, name):
+        return _Span(self, category, name)
+
+    def add_span(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def _get_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def install_import_hook(self):
+        """Record the time taken to import each new module."""
+        if self._original_import is not None:
+            return
+        original_import = six.moves.builtins.__import__
+        self._original_import = original_import
+
+        def traced_import(name, *args, **kwargs):
+            # ``from package import module`` can load a new module even
+            # when the package itself was already imported.
+            fromlist = args[2] if len(args) > 2 else kwargs.get('fromlist')
+            if not name or (name in sys.modules and not fromlist):
+                return original_import(name, *args, **kwargs)
+            with self.span('import', name):
+                return original_import(name, *args, **kwargs)
+
+        six.moves.builtins.__import__ = traced_import
+
+    def uninstall_import_hook(self):
+        if self._original_import is not None:
+            six.moves.builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def finish(self):
+        """Stop tracing and write out the report or trace file."""
+        self.uninstall_import_hook()
+        if self._trace_filename is not None:
+            with open(self._trace_filename, 'w') as f:
+                self.write_chrome_trace(f)
+        else:
+            self.write_report(self._stream or sys.stderr)
+
+    def write_report(self, stream):
+        stream.write('\nTiming report (seconds)\n')
+        phases = [s for s in self._spans if s.category == 'phase']
+        if phases:
+            stream.write('\nPhases:\n')
+            for span in sorted(phases, key=lambda s: s.start):
+                stream.write('  %10.4f  %s\n' % (span.duration, span.name))
+        self._write_section(stream, 'Handlers by self time', 'handler')
+        self._write_section(stream, 'Events by total time', 'event',
+                            key='duration')
+        self._write_section(stream, 'Imports by self time', 'import')
+
+    def _write_section(self, stream, title, category, key='self_duration'):
+        totals = defaultdict(float)
+        counts = defaultdict(int)
+        for span in self._spans:
+            if span.category == category:
+                totals[span.name] += getattr(span, key)
+                counts[span.name] += 1
+        if not totals:
+            return
+        stream.write('\n%s:\n' % title)
+        stream.write('  %10s  %6s  %s\n' % ('time', 'calls', 'name'))
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        for name, total in ranked[:REPORT_LIMIT]:
+            stream.write('  %10.4f  %6d  %s\n' % (total, counts[name], name))
+        if len(ranked) > REPORT_LIMIT:
+            stream.write('  ... %d more\n' % (len(ranked) - REPORT_LIMIT))
+
+    def write_chrome_trace(self, stream):
+        pid = os.getpid()
+        trace_events = []
+        for span in sorted(self._spans, key=lambda s: s.start):
+            trace_events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': int((span.start - self._start_time) * 1000000),
+                'dur': int(span.duration * 1000000),
+                'pid': pid,
+                'tid': span.thread_id,
+            })
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'},
+                  stream)
+
+
+def get_handler_name(handler):
+    """Return a readable name for an event handler."""
+    while isinstance(handler, functools.partial):
+        handler = handler.func
+    owner = getattr(handler, '__self__', None)
+    name = getattr(handler, '__name__', None)
+    if name is None:
+        # A callable object.
+        owner, name = handler, '__call__'
+    if owner is not None:
+        if not isinstance(owner, type):
+            owner = type(owner)
+        return '%s.%s.%s' % (owner.__module__, owner.__name__, name)
+    return '%s.%s' % (getattr(handler, '__module__', None), name)
+
+
+class TracingEmitter(HierarchicalEmitter):
+    """A HierarchicalEmitter that records a span for every event emitted
+    and every handler invoked.
+
+    """
+    def __init__(self, tracer=None):
+        super(TracingEmitter, self).__init__()
+        self._tracer = tracer
+        self._handler_names = {}
+
+    def _emit(self, event_name, kwargs, stop_on_response=False):
+        with self._tracer.span('event', event_name):
+            return self._traced_emit(event_name, kwargs, stop_on_response)
+
+    def _traced_emit(self, event_name, kwargs, stop_on_response):
+        # This mirrors HierarchicalEmitter._emit, with each handler
+        # call wrapped in a span.
+        handlers_to_call = self._lookup_cache.get(event_name)
+        if handlers_to_call is None:
+            handlers_to_call = self._handlers.prefix_search(event_name)
+            self._lookup_cache[event_name] = handlers_to_call
+        elif not handlers_to_call:
+            return []
+        kwargs['event_name'] = event_name
+        responses = []
+        for handler in handlers_to_call:
+            LOG.debug('Event %s: calling handler %s', event_name, handler)
+            with self._tracer.span('handler', self._get_name(handler)):
+                response = handler(**kwargs)
+            responses.append((handler, response))
+            if stop_on_response and response is not None:
+                return responses
+        return responses
+
+    def _get_name(self, handler):
+        try:
+            return self._handler_names[id(handler)][1]
+        except KeyError:
+            name = get_handler_name(handler)
+            # The handler is kept alongside its name so its id
+            # can't be reused by another object.
+            self._handler_names[id(handler)] = (handler, name)
+            return name
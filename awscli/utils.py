@@ -12,15 +12,48 @@
 # language governing permissions and limitations under the License.
 import csv
 import datetime
+import errno
+import heapq
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
 
 from awscli.compat import six
+from awscli.compat import queue
+
+
+LOG = logging.getLogger(__name__)
+
+# The default number of pages a PrefetchingPageIterator will fetch
+# ahead of the page currently being consumed.
+DEFAULT_MAX_PREFETCH = 2
+# The default number of threads used by concurrent_imap.
+DEFAULT_MAX_WORKERS = 10
+# Operations whose names start with any of these prefixes are
+# considered to not modify any resources.
+READ_ONLY_OPERATION_PREFIXES = ('Describe', 'List', 'Get')
+# The default number of items external_sort holds in memory at once.
+DEFAULT_SORT_RUN_SIZE = 10000
+
+
+# Characters that require more than a simple split in split_on_commas.
+_SPECIAL_CSV_CHARS = frozenset('"\'[]\\')
 
 
 def split_on_commas(value):
-    if not any(char in value for char in ['"', '\\', "'", ']', '[']):
+    # A single pass over the value finds which special characters are
+    # present, so large values are split in linear time.
+    special_chars = _SPECIAL_CSV_CHARS.intersection(value)
+    if not special_chars:
         # No quotes or escaping, just use a simple split.
         return value.split(',')
-    elif not any(char in value for char in ['"', "'", '[', ']']):
+    elif special_chars == set('\\'):
         # Simple escaping, let the csv module handle it.
         return list(csv.reader(six.StringIO(value), escapechar='\\'))[0]
     else:
@@ -34,6 +67,9 @@ def _split_with_quotes(value):
         parts = list(csv.reader(six.StringIO(value), escapechar='\\'))[0]
     except csv.Error:
         raise ValueError("Bad csv value: %s" % value)
+    # Checked once up front rather than rescanning the value for
+    # every part that opens a list.
+    has_list_end = ']' in value
     iter_parts = iter(parts)
     new_parts = []
     for part in iter_parts:
@@ -43,7 +79,7 @@ def _split_with_quotes(value):
         # Find an opening list bracket
         list_start = part.find('=[')
 
-        if list_start >= 0 and value.find(']') != -1 and \
+        if list_start >= 0 and has_list_end and \
            (quote_char is None or part.find(quote_char) > list_start):
             # This is a list, eat all the items until the end
             if ']' in part:
@@ -115,3 +151,452 @@ def json_encoder(obj):
         return obj
 
 
+def write_file_atomically(filename, contents):
+    """Replace the contents of ``filename`` with the bytes in ``contents``.
+
+    The contents are written to a temporary file in the same directory,
+    which is then renamed over ``filename``, so readers never see a
+    partially written file.  Missing parent directories are created.
+
+    ``contents`` can also be a function that accepts the binary file
+    object of the temporary file and writes the contents to it, for
+    contents too large to hold in memory.
+
+    """
+    dirname = os.path.dirname(filename)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    fd, temp_filename = tempfile.mkstemp(dir=dirname)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if callable(contents):
+                contents(f)
+            else:
+                f.write(contents)
+        if sys.platform == 'win32' and os.path.exists(filename):
+            # os.rename() won't replace an existing file on windows.
+            os.remove(filename)
+        os.rename(temp_filename, filename)
+    except Exception:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def prune_lru_files(dirname, max_size, suffix, keep=()):
+    """Remove the least recently used files from a directory.
+
+    The files in ``dirname`` whose names end with ``suffix`` are removed,
+    oldest modification time first, until their total size is no larger
+    than ``max_size`` bytes.  Caches that use this touch their files
+    whenever they are used.
+
+    :param keep: Filenames that must not be removed.  The files may
+        take up more than ``max_size`` bytes if these alone do.
+
+    """
+    try:
+        names = os.listdir(dirname)
+    except OSError:
+        return
+    keep = set(keep)
+    entries = []
+    total_size = 0
+    for name in names:
+        if not name.endswith(suffix):
+            continue
+        filename = os.path.join(dirname, name)
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            # Removed by another process.
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+        total_size += stat.st_size
+    for _, size, filename in sorted(entries):
+        if total_size <= max_size:
+            break
+        if filename in keep:
+            continue
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+        total_size -= size
+
+
+class FileLock(object):
+    """An advisory lock shared between processes.
+
+    The lock is held by whichever process manages to create ``filename``,
+    and is released by removing it.  A lock file older than
+    ``stale_after`` seconds is assumed to have been left behind by a
+    process that died while holding it, and is broken.  Each lock writes
+    a unique token into the lock file and only removes the file if it
+    still holds that token, so a lock that was broken doesn't remove the
+    lock of the process that took it over.  A stale lock is broken by
+    renaming it to a unique name, so only one process can break it.
+
+    If the lock can't be acquired within ``timeout`` seconds, using the
+    lock as a context manager carries on without it; ``acquired`` can be
+    checked to tell whether the lock is held.
+
+    """
+    def __init__(self, filename, timeout=10, stale_after=60, delay=0.05):
+        self._filename = filename
+        self._timeout = timeout
+        self._stale_after = stale_after
+        self._delay = delay
+        self._token = uuid.uuid4().hex.encode('ascii')
+        self.acquired = False
+
+    def acquire(self):
+        """Wait for the lock, returning True if it was acquired."""
+        deadline = time.time() + self._timeout
+        while True:
+            try:
+                fd = os.open(self._filename,
+                             os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                try:
+                    os.write(fd, self._token)
+                finally:
+                    os.close(fd)
+                self.acquired = True
+                return True
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    self._create_parent_dir()
+                    continue
+                elif e.errno != errno.EEXIST:
+                    raise
+            if self._break_stale_lock():
+                continue
+            if time.time() >= deadline:
+                LOG.debug("Timed out waiting for lock %s", self._filename)
+                return False
+            time.sleep(self._delay)
+
+    def release(self):
+        if self.acquired:
+            self.acquired = False
+            try:
+                with open(self._filename, 'rb') as f:
+                    token = f.read()
+                if token != self._token:
+                    LOG.debug("Lock %s was broken, not removing it",
+                              self._filename)
+                    return
+                os.remove(self._filename)
+            except (IOError, OSError):
+                pass
+
+    def _create_parent_dir(self):
+        dirname = os.path.dirname(self._filename)
+        try:
+            os.makedirs(dirname)
+        except OSError as e:
+            # Another process may have created it first.
+            if e.errno != errno.EEXIST:
+                raise
+
+    def _break_stale_lock(self):
+        broken_filename = '%s.%s.broken' % (self._filename,
+                                            uuid.uuid4().hex)
+        try:
+            observed = self._stat_lock(self._filename)
+            if time.time() - observed[0] < self._stale_after:
+                return False
+            LOG.debug("Removing stale lock %s", self._filename)
+            os.rename(self._filename, broken_filename)
+        except (IOError, OSError):
+            # The lock was released or broken while we were looking
+            # at it.
+            return True
+        try:
+            if self._stat_lock(broken_filename) != observed:
+                # Another process broke the stale lock and took a new
+                # lock after we looked at it, so it's put back.
+                self._restore_lock(broken_filename)
+            else:
+                os.remove(broken_filename)
+        except (IOError, OSError):
+            LOG.debug("Unable to clean up broken lock %s", broken_filename,
+                      exc_info=True)
+        return True
+
+    def _stat_lock(self, filename):
+        with open(filename, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            return stat.st_mtime, stat.st_ino, f.read()
+
+    def _restore_lock(self, broken_filename):
+        # Neither of these replace a lock taken in the meantime.
+        if hasattr(os, 'link'):
+            os.link(broken_filename, self._filename)
+            os.remove(broken_filename)
+        else:
+            os.rename(broken_filename, self._filename)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+class PrefetchingPageIterator(object):
+    """Fetch pages from a paginator on a background thread.
+
+    This wraps a ``PageIterator`` returned from ``operation.paginate()``
+    so that page N+1 is being retrieved while the caller is still
+    processing page N.  At most ``max_prefetch`` pages are buffered
+    ahead of the consumer.
+
+    All of the paging logic (``--max-items``, ``--starting-token``,
+    resume tokens) is still handled by the wrapped page iterator, so
+    the pages yielded are exactly the pages the wrapped iterator would
+    have yielded.  ``resume_token`` is only meaningful once iteration
+    has completed, same as the wrapped page iterator.
+
+    """
+    _PAGE = 'page'
+    _ERROR = 'error'
+    _DONE = 'done'
+    # How often, in seconds, a blocked producer checks whether the
+    # consumer has gone away.
+    _PUT_TIMEOUT = 0.1
+    # How often, in seconds, a consumer waiting for a page wakes up.
+    _GET_TIMEOUT = 1
+
+    def __init__(self, page_iterator, max_prefetch=DEFAULT_MAX_PREFETCH):
+        self._page_iterator = page_iterator
+        self._max_prefetch = max_prefetch
+
+    @property
+    def result_keys(self):
+        return self._page_iterator.result_keys
+
+    @property
+    def resume_token(self):
+        return self._page_iterator.resume_token
+
+    @property
+    def non_aggregate_part(self):
+        return self._page_iterator.non_aggregate_part
+
+    def build_full_result(self):
+        # Building the full result does no per page work that could
+        # overlap with fetching the next page, so there's nothing to
+        # gain from prefetching here.
+        return self._page_iterator.build_full_result()
+
+    def __iter__(self):
+        if self._max_prefetch < 1:
+            for page in self._page_iterator:
+                yield page
+            return
+        pages = queue.Queue(maxsize=self._max_prefetch)
+        stopped = threading.Event()
+        producer = threading.Thread(target=self._fetch_pages,
+                                    args=(pages, stopped))
+        producer.daemon = True
+        producer.start()
+        try:
+            while True:
+                item_type, value = self._get(pages)
+                if item_type == self._PAGE:
+                    yield value
+                elif item_type == self._ERROR:
+                    six.reraise(*value)
+                else:
+                    break
+        finally:
+            # If the consumer stops early (an exception or the generator
+            # being closed), this tells the producer to stop fetching.
+            stopped.set()
+
+    def _fetch_pages(self, pages, stopped):
+        try:
+            for page in self._page_iterator:
+                if not self._put(pages, stopped, (self._PAGE, page)):
+                    return
+        except Exception:
+            self._put(pages, stopped, (self._ERROR, sys.exc_info()))
+        else:
+            self._put(pages, stopped, (self._DONE, None))
+
+    def _get(self, pages):
+        # We wait with a timeout because on python2 a get() with no
+        # timeout can't be interrupted with a KeyboardInterrupt.
+        while True:
+            try:
+                return pages.get(timeout=self._GET_TIMEOUT)
+            except queue.Empty:
+                continue
+
+    def _put(self, pages, stopped, item):
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=self._PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def is_read_only_operation(operation_object):
+    """Determine if an operation only reads data.
+
+    An operation is considered read only if its name starts with one
+    of ``READ_ONLY_OPERATION_PREFIXES`` and it does not have a
+    streaming output (e.g. ``s3api get-object``).
+
+    """
+    return (operation_object.name.startswith(READ_ONLY_OPERATION_PREFIXES)
+            and not operation_object.is_streaming())
+
+
+class _PendingCall(object):
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.exc_info = None
+        self.done = threading.Event()
+
+    def get_result(self):
+        # We wait with a timeout because on python2 a wait() with no
+        # timeout can't be interrupted with a KeyboardInterrupt.
+        while not self.done.is_set():
+            self.done.wait(1)
+        if self.exc_info is not None:
+            six.reraise(*self.exc_info)
+        return self.result
+
+
+def concurrent_imap(function, iterable, max_workers=DEFAULT_MAX_WORKERS,
+                    ordered=True):
+    """Call ``function`` on every item of ``iterable`` using threads.
+
+    This works like ``itertools.imap``: by default results are yielded
+    in the same order as the items of ``iterable``, regardless of the
+    order in which the calls finish.  If ``ordered`` is False, results
+    are yielded as soon as their call finishes instead.  At most
+    ``max_workers`` calls run at the same time, and items are only
+    pulled from ``iterable`` as results are consumed, so ``iterable``
+    can be an arbitrarily long stream.
+
+    If a call raises an exception, the exception is raised when its
+    result is reached.  Calls that have not started yet when the
+    generator is closed are skipped.
+
+    """
+    calls = queue.Queue()
+    finished = queue.Queue()
+    cancelled = threading.Event()
+
+    def worker():
+        while True:
+            pending = calls.get()
+            if pending is None:
+                return
+            if not cancelled.is_set():
+                try:
+                    pending.result = function(pending.item)
+                except Exception:
+                    pending.exc_info = sys.exc_info()
+            pending.done.set()
+            if not ordered:
+                finished.put(pending)
+
+    def next_result():
+        if ordered:
+            pending = in_flight.popleft()
+        else:
+            while True:
+                try:
+                    pending = finished.get(timeout=1)
+                    break
+                except queue.Empty:
+                    continue
+            in_flight.remove(pending)
+        return pending.get_result()
+
+    threads = []
+    for _ in range(max_workers):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    in_flight = deque()
+    try:
+        for item in iterable:
+            pending = _PendingCall(item)
+            calls.put(pending)
+            in_flight.append(pending)
+            # Allow a worker's worth of items to be queued up so the
+            # workers don't sit idle while we wait on a result.
+            if len(in_flight) >= max_workers * 2:
+                yield next_result()
+        while in_flight:
+            yield next_result()
+    finally:
+        cancelled.set()
+        for _ in threads:
+            calls.put(None)
+
+
+def concurrent_map(function, iterable, max_workers=DEFAULT_MAX_WORKERS):
+    """Like ``concurrent_imap`` but returns a list of the results."""
+    return list(concurrent_imap(function, iterable, max_workers))
+
+
+def external_sort(iterable, key, run_size=DEFAULT_SORT_RUN_SIZE):
+    """Yield the items of ``iterable`` sorted by ``key``.
+
+    Items are sorted in memory in runs of ``run_size`` items.  If there
+    is more than one run, each run is written to a temporary file and
+    the runs are merged as they are read back, so at most ``run_size``
+    items are held in memory.  Items and their keys must be JSON
+    serializable, and keys are compared as they are after a round trip
+    through JSON (tuples become lists).  The sort is stable.
+
+    """
+    runs = []
+    try:
+        run = []
+        for item in iterable:
+            run.append(item)
+            if len(run) >= run_size:
+                runs.append(_write_sorted_run(run, key))
+                run = []
+        if not runs:
+            for item in sorted(run, key=key):
+                yield item
+            return
+        if run:
+            runs.append(_write_sorted_run(run, key))
+        readers = [_read_sorted_run(f, i) for i, f in enumerate(runs)]
+        for _, _, _, item in heapq.merge(*readers):
+            yield item
+    finally:
+        for f in runs:
+            f.close()
+
+
+def _write_sorted_run(run, key):
+    f = tempfile.TemporaryFile('w+b')
+    for item in sorted(run, key=key):
+        f.write(json.dumps([key(item), item]).encode('utf-8'))
+        f.write(b'\n')
+    f.seek(0)
+    return f
+
+
+def _read_sorted_run(f, run_number):
+    # The run number and line number break ties between equal keys so
+    # that items are never compared, and the merge is stable.
+    for line_number, line in enumerate(f):
+        sort_key, item = json.loads(line.decode('utf-8'))
+        yield sort_key, run_number, line_number, item
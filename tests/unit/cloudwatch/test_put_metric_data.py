@@ -12,8 +12,10 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import decimal
+import json
 
 from awscli.testutils import BaseAWSCommandParamsTest
+from awscli.testutils import FileCreator
 
 
 class TestPutMetricData(BaseAWSCommandParamsTest):
@@ -70,3 +72,71 @@ class TestPutMetricData(BaseAWSCommandParamsTest):
             'Namespace': 'MyService'
         }
         self.assert_params_for_cmd(cmdline, expected)
+
+
+class TestPutMetricDataFromFile(BaseAWSCommandParamsTest):
+    prefix = 'cloudwatch put-metric-data --namespace MyService '
+
+    def setUp(self):
+        super(TestPutMetricDataFromFile, self).setUp()
+        self.files = FileCreator()
+        self.addCleanup(self.files.remove_all)
+
+    def metric_data_sent(self):
+        return [params['MetricData'] for _, params in self.operations_called]
+
+    def test_json_lines_are_packed_into_requests(self):
+        lines = [json.dumps({'MetricName': 'Requests', 'Value': i,
+                             'Unit': 'Count'}) for i in range(45)]
+        filename = self.files.create_file('data.json', '\n'.join(lines))
+        stdout, _, _ = self.run_cmd(
+            self.prefix + '--metric-data-file %s' % filename)
+        self.assertEqual(stdout, '')
+        sent = self.metric_data_sent()
+        self.assertEqual(sorted(len(data) for data in sent), [5, 20, 20])
+        values = sorted(datum['Value'] for data in sent for datum in data)
+        self.assertEqual(values, list(range(45)))
+        for _, params in self.operations_called:
+            self.assertEqual(params['Namespace'], 'MyService')
+
+    def test_csv(self):
+        filename = self.files.create_file('data.csv', (
+            'MetricName,Value,Dimensions,Timestamp\n'
+            'Latency,1.5,"Host=a,Stack=prod",2015-01-01T00:00:00Z\n'
+            'Latency,2,,\n'))
+        self.run_cmd(self.prefix + '--metric-data-format csv '
+                     '--metric-data-file %s' % filename)
+        self.assertEqual(self.metric_data_sent(), [[
+            {'MetricName': 'Latency', 'Value': decimal.Decimal('1.5'),
+             'Dimensions': [{'Name': 'Host', 'Value': 'a'},
+                            {'Name': 'Stack', 'Value': 'prod'}],
+             'Timestamp': '2015-01-01T00:00:00Z'},
+            {'MetricName': 'Latency', 'Value': decimal.Decimal('2')}]])
+
+    def test_unknown_csv_column(self):
+        filename = self.files.create_file(
+            'data.csv', 'MetricName,Valu\nLatency,1\n')
+        _, stderr, _ = self.run_cmd(
+            self.prefix + '--metric-data-format csv '
+            '--metric-data-file %s' % filename, expected_rc=255)
+        self.assertIn('Unknown CSV columns: Valu', stderr)
+
+    def test_invalid_lines_are_reported(self):
+        filename = self.files.create_file('data.json', (
+            '{"MetricName": "Requests", "Value": 1}\n'
+            'not json\n'
+            '{"MetricName": "Requests", "Value": 2}\n'))
+        stdout, _, _ = self.run_cmd(
+            self.prefix + '--metric-data-file %s' % filename,
+            expected_rc=255)
+        failure = json.loads(stdout)
+        self.assertEqual(failure['Lines'], [2, 2])
+        self.assertEqual(len(self.metric_data_sent()[0]), 2)
+
+    def test_cannot_be_combined_with_metric_name(self):
+        filename = self.files.create_file('data.json', '')
+        _, stderr, _ = self.run_cmd(
+            self.prefix + '--metric-name Requests '
+            '--metric-data-file %s' % filename, expected_rc=255)
+        self.assertIn('cannot be specified', stderr)
+
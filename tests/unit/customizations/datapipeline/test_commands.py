@@ -198,25 +198,65 @@ class TestCommandsRunProperly(BaseAWSCommandParamsTest):
         elif name== 'DescribeObjects':
             return self.describe_objects
 
-    def test_list_runs(self):
+    def setup_list_runs(self, pages, describe_objects):
         self.driver.session = mock.Mock()
         self.driver.session.emit_first_non_none_response.return_value = None
         self.driver.session.get_service.return_value.get_endpoint.return_value = \
                 mock.sentinel.endpoint
         self.driver.session.get_service.return_value.get_operation = self.get_service
-        self.query_objects.paginate.return_value.build_full_result.return_value = {
-            'ids': ['object-ids']}
-        self.describe_objects.call.return_value = (
-            None, {'pipelineObjects': [
-                {'fields': [], 'id': 'id', 'name': 'name'}]})
+        self.query_objects.paginate.return_value = [
+            (None, page) for page in pages]
+        self.describe_objects.call.side_effect = describe_objects
 
-        command = ListRunsCommand(self.driver.session, formatter=mock.Mock())
+    def run_list_runs(self):
+        formatter = mock.Mock()
+        displayed = []
+        formatter.display_objects_to_user.side_effect = \
+                lambda objects: displayed.extend(objects)
+        command = ListRunsCommand(self.driver.session, formatter=formatter)
         command(['--pipeline-id', 'my-pipeline-id'],
                 parsed_globals=FakeParsedArgs(region='us-east-1'))
+        return displayed
+
+    def describe(self, endpoint, pipeline_id, object_ids):
+        return None, {'pipelineObjects': [
+            {'id': object_id, 'name': 'name',
+             'fields': [{'key': '@scheduledStartTime',
+                         'stringValue': '2014-01-01T00:%02d:00' % (
+                             int(object_id.split('-')[1]) % 60)}]}
+            for object_id in object_ids]}
+
+    def test_list_runs(self):
+        self.setup_list_runs(
+            [{'ids': ['object-ids']}],
+            [(None, {'pipelineObjects': [
+                {'fields': [], 'id': 'id', 'name': 'name'}]})])
+        displayed = self.run_list_runs()
         self.assertTrue(self.query_objects.paginate.called)
         self.describe_objects.call.assert_called_with(
             mock.sentinel.endpoint, pipeline_id='my-pipeline-id',
             object_ids=['object-ids'])
+        self.assertEqual(displayed, [{'@id': 'id', 'name': 'name'}])
+
+    def test_list_runs_describes_objects_in_batches(self):
+        pages = [{'ids': ['id-%s' % i for i in range(start, start + 20)]}
+                 for start in range(0, 100, 20)]
+        self.setup_list_runs(pages, self.describe)
+        displayed = self.run_list_runs()
+        batches = [call[1]['object_ids']
+                   for call in self.describe_objects.call.call_args_list]
+        self.assertEqual(len(batches), 4)
+        self.assertTrue(all(len(batch) <= 25 for batch in batches))
+        self.assertEqual(sorted(sum(batches, [])),
+                         sorted('id-%s' % i for i in range(100)))
+        self.assertEqual(len(displayed), 100)
+        start_times = [obj['@scheduledStartTime'] for obj in displayed]
+        self.assertEqual(start_times, sorted(start_times))
+
+    def test_list_runs_without_runs(self):
+        self.setup_list_runs([{'ids': []}], self.describe)
+        self.assertEqual(self.run_list_runs(), [])
+        self.assertFalse(self.describe_objects.call.called)
 
 
 class TestHelpOutput(BaseAWSHelpOutputTest):
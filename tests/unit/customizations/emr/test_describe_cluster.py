@@ -12,11 +12,16 @@
 # language governing permissions and limitations under the License.
 
 import json
+import shutil
+import tempfile
 
 from tests.unit.customizations.emr import EMRBaseAWSCommandParamsTest as \
     BaseAWSCommandParamsTest
 from mock import patch
 
+from awscli.customizations.assumerole import JSONFileCache
+from awscli.customizations.emr.emrutils import ClusterMasterCache
+
 
 describe_cluster_result_mock = {
     "Cluster": {
@@ -237,6 +242,19 @@ EXPECTED_RESULT = {
 class TestDescribeCluster(BaseAWSCommandParamsTest):
     prefix = 'emr describe-cluster'
 
+    def setUp(self):
+        super(TestDescribeCluster, self).setUp()
+        self.tempdir = tempfile.mkdtemp()
+        self.master_cache = ClusterMasterCache(JSONFileCache(self.tempdir))
+        patcher = patch('awscli.customizations.emr.emrutils.get_master_cache',
+                        return_value=self.master_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super(TestDescribeCluster, self).tearDown()
+        shutil.rmtree(self.tempdir)
+
     @patch('awscli.customizations.emr.emr.DescribeCluster._construct_result')
     @patch('awscli.customizations.emr.emr.'
            'DescribeCluster._find_master_public_dns')
@@ -253,20 +271,35 @@ class TestDescribeCluster(BaseAWSCommandParamsTest):
         self.run_cmd(cmdline, expected_rc=0)
 
         self.assertEqual(len(self.operations_called), 3)
-        self.assertEqual(self.operations_called[0][0].name,
-                         'DescribeCluster')
-        self.assertEqual(self.operations_called[0][1]['ClusterId'],
-                         'j-ABCD')
+        # The calls are made concurrently, so they can be made in any
+        # order.
+        self.assertEqual(
+            sorted(operation.name for operation, _ in self.operations_called),
+            ['DescribeCluster', 'ListBootstrapActions', 'ListInstanceGroups'])
+        for _, params in self.operations_called:
+            self.assertEqual(params['ClusterId'], 'j-ABCD')
+
+    @patch('awscli.customizations.emr.emrutils.get_endpoint')
+    @patch('awscli.customizations.emr.emr.DescribeCluster._construct_result')
+    @patch('awscli.customizations.emr.emr.'
+           'DescribeCluster._find_master_public_dns')
+    def test_calls_share_one_endpoint(
+            self, find_master_public_dns_patch, construct_result_patch,
+            get_endpoint_patch):
+        endpoints = []
+
+        def get_endpoint(service, parsed_globals):
+            endpoints.append(service.get_endpoint(region_name='us-east-1'))
+            return endpoints[-1]
+        get_endpoint_patch.side_effect = get_endpoint
+        construct_result_patch.return_value = dict()
 
-        self.assertEqual(self.operations_called[1][0].name,
-                         'ListInstanceGroups')
-        self.assertEqual(self.operations_called[1][1]['ClusterId'],
-                         'j-ABCD')
+        self.run_cmd(self.prefix + ' --cluster-id j-ABCD', expected_rc=0)
 
-        self.assertEqual(self.operations_called[2][0].name,
-                         'ListBootstrapActions')
-        self.assertEqual(self.operations_called[2][1]['ClusterId'],
-                         'j-ABCD')
+        self.assertEqual(len(endpoints), 1)
+        self.assertIs(
+            find_master_public_dns_patch.call_args[1]['endpoint'],
+            endpoints[0])
 
     @patch('awscli.customizations.emr.emrutils._find_most_recently_created')
     @patch('awscli.customizations.emr.emr.DescribeCluster._call')
@@ -283,6 +316,22 @@ class TestDescribeCluster(BaseAWSCommandParamsTest):
         result_json = json.loads(result[0])
         self.assertEquals(result_json, EXPECTED_RESULT)
 
+    @patch('awscli.customizations.emr.emrutils._find_most_recently_created')
+    @patch('awscli.customizations.emr.emr.DescribeCluster._call')
+    def test_cached_master_is_used(
+            self, call_patch, find_most_recently_created_instance_patch):
+        find_most_recently_created_instance_patch.return_value = \
+            list_instances_result_mock['Instances'][0]
+        call_patch.side_effect = side_effect_of_call
+
+        cmdline = self.prefix + ' --cluster-id j-ABCD'
+        for _ in range(2):
+            result_json = json.loads(self.run_cmd(cmdline, expected_rc=0)[0])
+            self.assertEquals(result_json, EXPECTED_RESULT)
+        # The cluster is terminated, so its master is only looked up once.
+        self.assertEqual(
+            find_most_recently_created_instance_patch.call_count, 1)
+
 
 def side_effect_of_call(*args, **kwargs):
     if args[0].name == 'DescribeCluster':
@@ -11,7 +11,18 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import shutil
+import tempfile
+import threading
+
+import mock
+
+from awscli.customizations.assumerole import JSONFileCache
+from awscli.customizations.emr import emrutils
 from awscli.customizations.emr.emrutils import which
+from awscli.customizations.emr.emrutils import call_concurrently
+from awscli.customizations.emr.emrutils import ClusterMasterCache
+from awscli.testutils import unittest
 from nose.tools import assert_equal
 from nose.tools import assert_not_equal
 
@@ -25,3 +36,110 @@ class TestEMRutils(object):
     def test_which_with_non_existing_command(self):
         path = which('klajsflklj')
         assert_equal(path, None)
+
+    def test_call_concurrently_returns_results_in_order(self):
+        results = call_concurrently([lambda: 1, lambda: 2, lambda: 3])
+        assert_equal(results, [1, 2, 3])
+
+    def test_call_concurrently_makes_calls_at_the_same_time(self):
+        # Each call waits for all of the calls to have started.
+        lock = threading.Lock()
+        all_started = threading.Event()
+        started = []
+
+        def call():
+            with lock:
+                started.append(True)
+                if len(started) == 3:
+                    all_started.set()
+            all_started.wait(5)
+            return all_started.is_set()
+        assert_equal(call_concurrently([call, call, call]),
+                     [True, True, True])
+
+
+class TestClusterMasterCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = ClusterMasterCache(JSONFileCache(self.tempdir), ttl=60)
+        self.endpoint = mock.Mock(host='https://elasticmapreduce.amazonaws.com')
+        patcher = mock.patch('time.time', return_value=1000)
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_running_cluster_expires(self):
+        self.cache.set(self.endpoint, 'j-1', 'WAITING', 'master')
+        self.assertEqual(self.cache.get(self.endpoint, 'j-1'),
+                         ('WAITING', 'master'))
+        self.time.return_value = 1060
+        self.assertIsNone(self.cache.get(self.endpoint, 'j-1'))
+
+    def test_terminated_cluster_does_not_expire(self):
+        self.cache.set(self.endpoint, 'j-1', 'TERMINATED', 'master')
+        self.time.return_value = 100000
+        self.assertEqual(self.cache.get(self.endpoint, 'j-1'),
+                         ('TERMINATED', 'master'))
+
+    def test_starting_clusters_and_missing_masters_are_not_cached(self):
+        self.cache.set(self.endpoint, 'j-1', 'STARTING', 'master')
+        self.cache.set(self.endpoint, 'j-2', 'RUNNING', '')
+        self.assertIsNone(self.cache.get(self.endpoint, 'j-1'))
+        self.assertIsNone(self.cache.get(self.endpoint, 'j-2'))
+
+    def test_entries_for_other_states_are_ignored(self):
+        self.cache.set(self.endpoint, 'j-1', 'WAITING', 'master')
+        self.assertIsNone(
+            self.cache.get(self.endpoint, 'j-1', state='TERMINATED'))
+        self.assertEqual(self.cache.get(self.endpoint, 'j-1', state='WAITING'),
+                         ('WAITING', 'master'))
+
+    def test_entries_are_per_endpoint(self):
+        self.cache.set(self.endpoint, 'j-1', 'WAITING', 'master')
+        other_endpoint = mock.Mock(host='https://other.amazonaws.com')
+        self.assertIsNone(self.cache.get(other_endpoint, 'j-1'))
+
+
+class TestFindMasters(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = ClusterMasterCache(JSONFileCache(self.tempdir))
+        self.endpoint = mock.Mock(host='https://elasticmapreduce.amazonaws.com')
+        self.session = mock.Mock()
+        for name in ('find_master_public_dns', 'get_cluster_state'):
+            patcher = mock.patch.object(emrutils, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.find_master_public_dns.side_effect = \
+            lambda cluster_id, **kwargs: 'master-' + cluster_id
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_find_cluster_state_and_master_dns_is_cached(self):
+        self.get_cluster_state.return_value = 'WAITING'
+        for _ in range(2):
+            self.assertEqual(
+                emrutils.find_cluster_state_and_master_dns(
+                    self.session, None, 'j-1', endpoint=self.endpoint,
+                    cache=self.cache),
+                ('WAITING', 'master-j-1'))
+        self.assertEqual(self.get_cluster_state.call_count, 1)
+        self.assertEqual(self.find_master_public_dns.call_count, 1)
+
+    def test_find_master_public_dns_names(self):
+        cluster_states = dict(('j-%s' % i, 'WAITING') for i in range(50))
+        self.cache.set(self.endpoint, 'j-0', 'WAITING', 'cached')
+        names = emrutils.find_master_public_dns_names(
+            self.session, None, cluster_states, endpoint=self.endpoint,
+            cache=self.cache)
+        expected = dict((cluster_id, 'master-' + cluster_id)
+                        for cluster_id in cluster_states)
+        expected['j-0'] = 'cached'
+        self.assertEqual(names, expected)
+        self.assertEqual(self.find_master_public_dns.call_count, 49)
+        self.assertFalse(self.get_cluster_state.called)
+        for call in self.find_master_public_dns.call_args_list:
+            self.assertIs(call[1]['endpoint'], self.endpoint)
@@ -15,6 +15,15 @@ from tests.unit.customizations.emr import EMRBaseAWSCommandParamsTest as \
     BaseAWSCommandParamsTest
 from datetime import datetime
 from time import mktime
+import json
+import shutil
+import tempfile
+
+from mock import patch
+
+from awscli.customizations.assumerole import JSONFileCache
+from awscli.customizations.emr.emrutils import ClusterMasterCache
+from awscli.responsecache import ResponseCache
 
 
 class TestListClusters(BaseAWSCommandParamsTest):
@@ -67,6 +76,60 @@ class TestListClusters(BaseAWSCommandParamsTest):
         result = self.run_cmd(cmdline, 255)
         self.assertEquals(expected_error_msg, result[1])
 
+    def test_list_clusters_with_master_public_dns(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        patcher = patch('awscli.customizations.emr.emrutils.get_master_cache',
+                        return_value=ClusterMasterCache(JSONFileCache(tempdir)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.parsed_responses = [
+            {'Clusters': [{'Id': 'j-1', 'Status': {'State': 'WAITING'}}]},
+            {'Instances': [{'PublicDnsName': 'master-1',
+                            'Status': {'Timeline': {
+                                'CreationDateTime': 1398375871.0}}}]},
+        ]
+        stdout = self.run_cmd(self.prefix + '--master-public-dns')[0]
+        self.assertEqual(json.loads(stdout)['Clusters'], [
+            {'Id': 'j-1', 'Status': {'State': 'WAITING'},
+             'MasterPublicDnsName': 'master-1'}])
+        self.assertEqual(
+            [operation.name for operation, _ in self.operations_called],
+            ['ListClusters', 'ListInstances'])
+        self.assertEqual(self.operations_called[1][1],
+                         {'ClusterId': 'j-1', 'InstanceGroupTypes': ['MASTER']})
+
+    def test_master_public_dns_is_not_mixed_with_cached_responses(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        for name, cache in (
+                ('awscli.customizations.emr.emrutils.get_master_cache',
+                 ClusterMasterCache(JSONFileCache(tempdir + '/masters'))),
+                ('awscli.clidriver.get_response_cache',
+                 ResponseCache(tempdir + '/responses'))):
+            patcher = patch(name, return_value=cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        clusters = {'Clusters': [{'Id': 'j-1', 'Status': {'State': 'WAITING'}}]}
+        self.parsed_responses = [
+            clusters,
+            {'Clusters': [{'Id': 'j-1', 'Status': {'State': 'WAITING'}}]},
+            {'Instances': [{'PublicDnsName': 'master-1',
+                            'Status': {'Timeline': {
+                                'CreationDateTime': 1398375871.0}}}]},
+        ]
+        cmdline = self.prefix + '--cache-ttl 60'
+        self.run_cmd(cmdline)
+        stdout = self.run_cmd(cmdline + ' --master-public-dns')[0]
+        self.assertEqual(
+            json.loads(stdout)['Clusters'][0]['MasterPublicDnsName'],
+            'master-1')
+        # The annotated call went to the service, and the plain call is
+        # still answered from the unannotated cached response.
+        self.assertEqual(self.parsed_responses, [])
+        stdout = self.run_cmd(cmdline)[0]
+        self.assertEqual(json.loads(stdout), clusters)
+
 
 if __name__ == "__main__":
     unittest.main()
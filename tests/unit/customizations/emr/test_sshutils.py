@@ -21,7 +21,8 @@ class TestSSHUtils(unittest.TestCase):
 
     @mock.patch('awscli.customizations.emr.sshutils.emrutils')
     def test_validate_and_find_master_dns_waits(self, emrutils):
-        emrutils.get_cluster_state.return_value = 'STARTING'
+        emrutils.find_cluster_state_and_master_dns.return_value = (
+            'STARTING', '')
         session = mock.Mock()
         fake_endpoint = mock.sentinel.fake_endpoint
         emrutils.get_endpoint.return_value = fake_endpoint
@@ -41,7 +42,24 @@ class TestSSHUtils(unittest.TestCase):
 
     @mock.patch('awscli.customizations.emr.sshutils.emrutils')
     def test_cluster_in_terminated_states(self, emrutils):
-        emrutils.get_cluster_state.return_value = 'TERMINATED'
+        emrutils.find_cluster_state_and_master_dns.return_value = (
+            'TERMINATED', 'master-dns')
         with self.assertRaises(exceptions.ClusterTerminatedError):
             sshutils.validate_and_find_master_dns(
                 mock.Mock(), None, 'cluster-id')
+
+    @mock.patch('awscli.customizations.emr.sshutils.emrutils')
+    def test_running_cluster_does_not_wait(self, emrutils):
+        emrutils.find_cluster_state_and_master_dns.return_value = (
+            'WAITING', 'master-dns')
+        session = mock.Mock()
+
+        master_dns = sshutils.validate_and_find_master_dns(
+            session, None, 'cluster-id')
+
+        self.assertEqual(master_dns, 'master-dns')
+        self.assertFalse(session.get_service.return_value.get_waiter.called)
+        self.assertFalse(emrutils.find_master_public_dns.called)
+        endpoint = emrutils.get_endpoint.return_value
+        emrutils.find_cluster_state_and_master_dns.assert_called_with(
+            session, None, 'cluster-id', endpoint=endpoint)
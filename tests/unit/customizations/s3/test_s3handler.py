@@ -19,11 +19,13 @@ import mock
 
 from awscli.testutils import unittest
 from awscli import EnvironmentVariables
-from awscli.customizations.s3.s3handler import S3Handler, S3StreamHandler
+from awscli.customizations.s3.s3handler import S3Handler, S3StreamHandler, \
+    S3CopyHandler
 from awscli.customizations.s3.fileinfo import FileInfo
 from awscli.customizations.s3.tasks import CreateMultipartUploadTask, \
-    UploadPartTask, CreateLocalFileTask
-from awscli.customizations.s3.utils import MAX_PARTS
+    UploadPartTask, CreateLocalFileTask, CreateMultipartCopyTask, \
+    CopyPartTask, CompleteMultipartUploadTask
+from awscli.customizations.s3.utils import MAX_PARTS, MAX_SINGLE_UPLOAD_SIZE
 from awscli.customizations.s3.transferconfig import RuntimeConfig
 from tests.unit.customizations.s3.fake_session import FakeSession
 from tests.unit.customizations.s3 import make_loc_files, clean_loc_files, \
@@ -799,6 +801,56 @@ class TestStreams(S3HandlerBaseTest):
                             CreateLocalFileTask)
 
 
+class TestS3CopyHandler(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession()
+        self.service = self.session.get_service('s3')
+        self.endpoint = self.service.get_endpoint('us-east-1')
+        self.params = {'region': 'us-east-1'}
+
+    def create_file_info(self, name, size):
+        return FileInfo(src='bucket/' + name, src_type='s3',
+                        dest='bucket2/' + name, dest_type='s3',
+                        operation_name='copy', size=size,
+                        service=self.service, endpoint=self.endpoint)
+
+    def test_copies_use_their_own_config(self):
+        config = runtime_config(
+            multipart_threshold=10, multipart_chunksize=10,
+            max_concurrent_requests=5, multipart_copy_threshold=1000,
+            multipart_copy_chunksize=100, max_concurrent_copies=30)
+        handler = S3CopyHandler(self.session, self.params,
+                                runtime_config=config)
+        self.assertEqual(handler.multi_threshold, 1000)
+        self.assertEqual(handler.chunksize, 100)
+        self.assertEqual(handler.executor.num_threads, 30)
+
+    def test_threshold_is_limited_to_single_copy_size(self):
+        config = runtime_config(multipart_copy_threshold='10GB')
+        handler = S3CopyHandler(self.session, self.params,
+                                runtime_config=config)
+        self.assertEqual(handler.multi_threshold, MAX_SINGLE_UPLOAD_SIZE)
+
+    def test_multipart_uploads_are_created_ahead_of_parts(self):
+        config = runtime_config(multipart_copy_threshold=100,
+                                multipart_copy_chunksize=100)
+        handler = S3CopyHandler(self.session, self.params,
+                                runtime_config=config)
+        handler.executor = mock.Mock()
+        handler._enqueue_tasks([self.create_file_info('small', 100),
+                                self.create_file_info('large', 250)])
+        submitted = [c[0][0] for c in handler.executor.submit.call_args_list]
+        self.assertEqual(
+            [type(task) for task in submitted[1:]],
+            [CreateMultipartCopyTask, CopyPartTask, CopyPartTask,
+             CopyPartTask, CompleteMultipartUploadTask])
+        self.assertEqual(submitted[2]._chunk_size, 100)
+        # Queued parts of earlier copies are retrieved after the upload
+        # of the next copy is created.
+        self.assertLess(submitted[1].PRIORITY, submitted[0].PRIORITY)
+        self.assertLess(submitted[1].PRIORITY, submitted[2].PRIORITY)
+
+
 class TestS3HandlerInitialization(unittest.TestCase):
     def setUp(self):
         self.arbitrary_params = {'region': 'us-west-2'}
@@ -19,6 +19,7 @@ from mock import patch, Mock, MagicMock
 
 import botocore.session
 from awscli.customizations.s3.s3 import S3
+from awscli.customizations.s3.s3handler import S3CopyHandler
 from awscli.customizations.s3.subcommands import CommandParameters, \
     CommandArchitecture, CpCommand, SyncCommand, ListCommand, get_endpoint, \
     RbCommand
@@ -355,9 +356,13 @@ class CommandArchitectureTest(S3HandlerBaseTest):
                   'is_stream': False}
         cmd_arc = CommandArchitecture(self.session, 'cp', params)
         cmd_arc.create_instructions()
-        cmd_arc.run()
+        with patch('awscli.customizations.s3.subcommands.S3CopyHandler',
+                   wraps=S3CopyHandler) as copy_handler:
+            cmd_arc.run()
         output_str = "(dryrun) copy: %s to %s" % (s3_file, s3_file)
         self.assertIn(output_str, self.output.getvalue())
+        # Copies between S3 locations use the copy handler.
+        self.assertTrue(copy_handler.called)
 
     def test_run_mv(self):
         # This ensures that the architecture sets up correctly for a ``mv``
@@ -59,3 +59,11 @@ class TestTransferConfig(unittest.TestCase):
         runtime_config = self.build_config_with(multipart_threshold="10MB")
         self.assertEqual(runtime_config['multipart_threshold'],
                          10 * 1024 * 1024)
+
+    def test_copy_sizes_converted_to_bytes(self):
+        runtime_config = self.build_config_with(
+            multipart_copy_threshold="1GB", multipart_copy_chunksize="256MB")
+        self.assertEqual(runtime_config['multipart_copy_threshold'],
+                         1024 ** 3)
+        self.assertEqual(runtime_config['multipart_copy_chunksize'],
+                         256 * 1024 * 1024)
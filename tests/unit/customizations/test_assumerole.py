@@ -190,6 +190,33 @@ class TestAssumeRoleCredentialProvider(unittest.TestCase):
         self.assertEqual(credentials.secret_key, 'bar')
         self.assertEqual(credentials.token, 'baz')
 
+    def test_assume_role_uses_creds_refreshed_while_waiting_for_lock(self):
+        expired = datetime.utcnow().isoformat() + 'Z'
+        in_future = (datetime.utcnow() +
+                     timedelta(seconds=3600)).isoformat() + 'Z'
+        self.fake_config['profiles']['development']['role_arn'] = 'myrole'
+        cache = mock.MagicMock()
+        entries = [
+            {'Credentials': {'AccessKeyId': 'foo-expired',
+                             'SecretAccessKey': 'bar', 'SessionToken': 'baz',
+                             'Expiration': expired}},
+            {'Credentials': {'AccessKeyId': 'foo-other-process',
+                             'SecretAccessKey': 'bar', 'SessionToken': 'baz',
+                             'Expiration': in_future}},
+        ]
+        cache.__getitem__.side_effect = entries
+        client_creator = mock.Mock()
+        provider = assumerole.AssumeRoleProvider(
+            self.create_config_loader(), client_creator,
+            cache=cache, profile_name='development')
+
+        credentials = provider.load()
+
+        self.assertEqual(credentials.access_key, 'foo-other-process')
+        cache.lock.assert_called_with('development--myrole')
+        self.assertFalse(client_creator.return_value.assume_role.called)
+        self.assertFalse(cache.__setitem__.called)
+
     def test_external_id_provided(self):
         self.fake_config['profiles']['development']['external_id'] = 'myid'
         response = {
@@ -238,6 +265,41 @@ class TestAssumeRoleCredentialProvider(unittest.TestCase):
             RoleArn='myrole', RoleSessionName=mock.ANY, SerialNumber='mfa',
             TokenCode='token-code')
 
+    def test_mfa_code_is_prompted_for_before_taking_lock(self):
+        self.fake_config['profiles']['development']['mfa_serial'] = 'mfa'
+        response = {
+            'Credentials': {
+                'AccessKeyId': 'foo',
+                'SecretAccessKey': 'bar',
+                'SessionToken': 'baz',
+                'Expiration': datetime.now(tzlocal()).isoformat(),
+            },
+        }
+        client_creator = self.create_client_creator(with_response=response)
+        calls = []
+
+        def lock(cache_key):
+            calls.append('lock')
+            return mock.MagicMock()
+
+        def prompter(text):
+            calls.append('prompt')
+            return 'token-code'
+
+        cache = mock.MagicMock()
+        cache.__getitem__.side_effect = KeyError
+        cache.lock.side_effect = lock
+        provider = assumerole.AssumeRoleProvider(
+            self.create_config_loader(), client_creator,
+            cache=cache, profile_name='development', prompter=prompter)
+
+        provider.load()
+
+        self.assertEqual(calls, ['prompt', 'lock'])
+        client_creator.return_value.assume_role.assert_called_with(
+            RoleArn='myrole', RoleSessionName=mock.ANY, SerialNumber='mfa',
+            TokenCode='token-code')
+
     def test_assume_role_mfa_cannot_refresh_credentials(self):
         # Note: we should look into supporting optional behavior
         # in the future that allows for reprompting for credentials.
@@ -355,6 +417,39 @@ class TestJSONCache(unittest.TestCase):
         with self.assertRaises(KeyError):
             self.cache['foo']
 
+    def test_values_are_read_from_memory(self):
+        self.cache['mykey'] = {'foo': 'bar'}
+        os.remove(os.path.join(self.tempdir, 'mykey.json'))
+        self.assertTrue('mykey' in self.cache)
+        self.assertEqual(self.cache['mykey'], {'foo': 'bar'})
+
+    def test_returned_values_can_be_modified(self):
+        self.cache['mykey'] = {'foo': 'bar'}
+        self.cache['mykey']['foo'] = 'changed'
+        self.assertEqual(self.cache['mykey'], {'foo': 'bar'})
+
+    def test_lock_rereads_value_from_file(self):
+        self.cache['mykey'] = {'foo': 'bar'}
+        other_process_cache = assumerole.JSONFileCache(self.tempdir)
+        other_process_cache['mykey'] = {'foo': 'updated'}
+        self.assertEqual(self.cache['mykey'], {'foo': 'bar'})
+        with self.cache.lock('mykey'):
+            self.assertEqual(self.cache['mykey'], {'foo': 'updated'})
+
+    def test_lock_is_held_in_working_dir(self):
+        lock_filename = os.path.join(self.tempdir, 'mykey.lock')
+        with self.cache.lock('mykey') as lock:
+            self.assertTrue(lock.acquired)
+            self.assertTrue(os.path.isfile(lock_filename))
+        self.assertFalse(os.path.exists(lock_filename))
+
+    def test_write_does_not_leave_temporary_files(self):
+        self.cache['mykey'] = {'foo': 'bar' * 100}
+        self.cache['mykey'] = {'foo': 'baz'}
+        self.assertEqual(os.listdir(self.tempdir), ['mykey.json'])
+        with open(os.path.join(self.tempdir, 'mykey.json')) as f:
+            self.assertEqual(f.read(), '{"foo": "baz"}')
+
     @unittest.skipIf(platform.system() not in ['Darwin', 'Linux'],
                      'File permissions tests not supported on Windows.')
     def test_permissions_for_file_restricted(self):
@@ -11,13 +11,16 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import mock
+import json
 import os
 import shutil
 import tempfile
 
 from awscli.testutils import unittest
 from awscli.argprocess import ParamError
+from awscli.compat import six
 from awscli.customizations.cliinputjson import CliInputJSONArgument
+from awscli.customizations.cliinputjson import CliInputJSONLinesArgument
 
 
 class TestCliInputJSONArgument(unittest.TestCase):
@@ -99,3 +102,116 @@ class TestCliInputJSONArgument(unittest.TestCase):
         # Nothing should have been added to the call parameters because
         # ``cli_input_json`` is not in the ``parsed_args``
         self.assertEqual(call_parameters, {'A': 'baz'})
+
+
+class TestCliInputJSONLinesArgument(unittest.TestCase):
+    def setUp(self):
+        self.operation_object = mock.Mock()
+        self.operation_object.can_paginate = False
+        self.operation_object.call.side_effect = self.fake_call
+        self.argument = CliInputJSONLinesArgument(self.operation_object)
+        self.parsed_args = mock.Mock()
+        self.parsed_args.cli_input_json_lines_unordered = False
+        self.parsed_globals = mock.Mock()
+        self.parsed_globals.query = None
+        self.stream = six.StringIO()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_file = os.path.join(self.temp_dir, 'input.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def fake_call(self, endpoint, **kwargs):
+        if kwargs.get('QueueUrl') == 'bad':
+            raise RuntimeError('bad queue')
+        return None, {'Params': kwargs, 'ResponseMetadata': {}}
+
+    def write_lines(self, lines):
+        with open(self.temp_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def call_for_each_line(self, call_parameters=None):
+        if call_parameters is None:
+            call_parameters = {}
+        rc = self.argument.call_for_each_line(
+            call_parameters=call_parameters, parsed_args=self.parsed_args,
+            parsed_globals=self.parsed_globals, stream=self.stream)
+        results = [json.loads(line) for line in
+                   self.stream.getvalue().splitlines()]
+        return rc, results
+
+    def test_register_argument_action(self):
+        register_args = self.operation_object.session.register.call_args_list
+        self.assertEqual(register_args[0][0][0], 'calling-command')
+        self.assertEqual(register_args[0][0][1],
+                         self.argument.call_for_each_line)
+
+    def test_not_specified(self):
+        self.argument.add_to_params({}, None)
+        rc = self.argument.call_for_each_line(
+            call_parameters={}, parsed_args=self.parsed_args,
+            parsed_globals=self.parsed_globals, stream=self.stream)
+        self.assertIsNone(rc)
+        self.assertFalse(self.operation_object.call.called)
+
+    def test_calls_operation_for_each_line(self):
+        self.write_lines(['{"QueueUrl": "a"}', '', '{"QueueUrl": "b"}'])
+        self.argument.add_to_params({}, self.temp_file)
+        rc, results = self.call_for_each_line()
+        self.assertEqual(rc, 0)
+        self.assertEqual(results, [
+            {'Index': 0, 'Response': {'Params': {'QueueUrl': 'a'}}},
+            {'Index': 1, 'Response': {'Params': {'QueueUrl': 'b'}}},
+        ])
+        # All of the calls share the same endpoint.
+        self.assertEqual(
+            self.operation_object.service.get_endpoint.call_count, 1)
+
+    def test_command_line_values_override_lines(self):
+        self.write_lines(['{"QueueUrl": "a", "VisibilityTimeout": 1}'])
+        self.argument.add_to_params({}, 'file://' + self.temp_file)
+        rc, results = self.call_for_each_line({'VisibilityTimeout': 30})
+        self.assertEqual(
+            results[0]['Response']['Params'],
+            {'QueueUrl': 'a', 'VisibilityTimeout': 30})
+
+    def test_failed_lines_are_reported(self):
+        self.write_lines(['{"QueueUrl": "a"}', '{"QueueUrl": "bad"}',
+                          'not json', '["not", "an", "object"]'])
+        self.argument.add_to_params({}, self.temp_file)
+        rc, results = self.call_for_each_line()
+        self.assertEqual(rc, 255)
+        self.assertEqual([r['Index'] for r in results], [0, 1, 2, 3])
+        self.assertIn('Response', results[0])
+        self.assertEqual(results[1]['Error'], 'bad queue')
+        self.assertIn('Error', results[2])
+        self.assertIn('Expected a JSON object', results[3]['Error'])
+
+    def test_unordered_results_have_index(self):
+        self.parsed_args.cli_input_json_lines_unordered = True
+        self.write_lines(['{"QueueUrl": "%s"}' % i for i in range(50)])
+        self.argument.add_to_params({}, self.temp_file)
+        rc, results = self.call_for_each_line()
+        self.assertEqual(sorted(r['Index'] for r in results), list(range(50)))
+
+    def test_reads_from_stdin(self):
+        stdin = six.StringIO('{"QueueUrl": "a"}\n')
+        self.argument.add_to_params({}, '-')
+        with mock.patch('sys.stdin', stdin):
+            rc, results = self.call_for_each_line()
+        self.assertEqual(results, [
+            {'Index': 0, 'Response': {'Params': {'QueueUrl': 'a'}}}])
+
+    def test_missing_file(self):
+        self.argument.add_to_params({}, os.path.join(self.temp_dir, 'nope'))
+        with self.assertRaises(ParamError):
+            self.call_for_each_line()
+
+    def test_query_applied_to_each_response(self):
+        self.parsed_globals.query = mock.Mock()
+        self.parsed_globals.query.search.return_value = 'filtered'
+        self.write_lines(['{"QueueUrl": "a"}'])
+        self.argument.add_to_params({}, self.temp_file)
+        rc, results = self.call_for_each_line()
+        self.assertEqual(results, [{'Index': 0, 'Response': 'filtered'}])
@@ -29,12 +29,13 @@ class TestCloudTrailPlumbing(unittest.TestCase):
         cli.register.assert_called_with('building-command-table.cloudtrail',
                                         cloudtrail.inject_commands)
 
-    def test_injection_adds_two_commands_to_cmd_table(self):
+    def test_injection_adds_commands_to_cmd_table(self):
         command_table = {}
         session = Mock()
         cloudtrail.inject_commands(command_table, session)
         self.assertIn('create-subscription', command_table)
         self.assertIn('update-subscription', command_table)
+        self.assertIn('search-logs', command_table)
 
 
 class TestCreateSubscription(BaseAWSCommandParamsTest):
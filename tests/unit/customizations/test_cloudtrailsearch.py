@@ -0,0 +1,262 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+from dateutil.tz import tzutc
+
+from awscli.compat import six
+from awscli.customizations import cloudtrailsearch
+from awscli.customizations.cloudtrailsearch import CloudTrailSearch
+from awscli.customizations.cloudtrailsearch import LogFileCache
+from awscli.customizations.cloudtrailsearch import RecordFilter
+from awscli.customizations.cloudtrailsearch import iter_log_records
+from awscli.testutils import unittest
+
+
+PREFIX = 'logs/AWSLogs/123456789012/CloudTrail/us-east-1/'
+
+
+def gzip_records(records):
+    buf = six.BytesIO()
+    f = gzip.GzipFile(fileobj=buf, mode='wb')
+    f.write(json.dumps({'Records': records}).encode('utf-8'))
+    f.close()
+    return buf.getvalue()
+
+
+def log_file_key(day, time):
+    return '%s%s/123456789012_CloudTrail_us-east-1_%sT%sZ_abc.json.gz' % (
+        PREFIX, day, day.replace('/', ''), time)
+
+
+def record(event_name, event_time, **kwargs):
+    record = {'eventName': event_name, 'eventTime': event_time}
+    record.update(kwargs)
+    return record
+
+
+class TestIterLogRecords(unittest.TestCase):
+    def split(self, text, size):
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def test_records_split_across_chunks(self):
+        records = [{'eventName': 'RunInstances', 'n': i} for i in range(20)]
+        text = json.dumps({'Records': records}, indent=2)
+        for size in (1, 7, 64, len(text)):
+            self.assertEqual(
+                list(iter_log_records(self.split(text, size))), records)
+
+    def test_empty_records(self):
+        self.assertEqual(list(iter_log_records(['{"Records": []}'])), [])
+
+    def test_other_layouts_are_parsed_in_full(self):
+        text = json.dumps({'Other': 'x' * 2000, 'Records': [{'a': 1}]})
+        self.assertEqual(list(iter_log_records(self.split(text, 100))),
+                         [{'a': 1}])
+
+    def test_truncated_file_is_an_error(self):
+        with self.assertRaises(ValueError):
+            list(iter_log_records(['{"Records": [{"a": 1}, {"b"']))
+
+
+class TestRecordFilter(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime.datetime(2015, 3, 1, 12, tzinfo=tzutc())
+        self.end = datetime.datetime(2015, 3, 1, 13, tzinfo=tzutc())
+
+    def test_time_window(self):
+        record_filter = RecordFilter(self.start, self.end)
+        self.assertTrue(record_filter(record('A', '2015-03-01T12:00:00Z')))
+        self.assertTrue(record_filter(record('A', '2015-03-01T13:00:00Z')))
+        self.assertFalse(record_filter(record('A', '2015-03-01T11:59:59Z')))
+        self.assertFalse(record_filter(record('A', '2015-03-01T13:00:01Z')))
+
+    def test_event_names(self):
+        record_filter = RecordFilter(self.start, self.end,
+                                     event_names=['A', 'B'])
+        self.assertTrue(record_filter(record('B', '2015-03-01T12:30:00Z')))
+        self.assertFalse(record_filter(record('C', '2015-03-01T12:30:00Z')))
+
+    def test_users(self):
+        record_filter = RecordFilter(self.start, self.end, users=['admin'])
+        self.assertTrue(record_filter(record(
+            'A', '2015-03-01T12:30:00Z', userIdentity={'userName': 'admin'})))
+        self.assertTrue(record_filter(record(
+            'A', '2015-03-01T12:30:00Z', userIdentity={
+                'type': 'AssumedRole',
+                'sessionContext': {'sessionIssuer': {'userName': 'admin'}}})))
+        self.assertFalse(record_filter(record(
+            'A', '2015-03-01T12:30:00Z', userIdentity={'userName': 'other'})))
+        self.assertFalse(record_filter(record('A', '2015-03-01T12:30:00Z')))
+
+    def test_resources(self):
+        record_filter = RecordFilter(self.start, self.end,
+                                     resources=['i-12345678'])
+        self.assertTrue(record_filter(record(
+            'A', '2015-03-01T12:30:00Z', requestParameters={
+                'instancesSet': {'items': [{'instanceId': 'i-12345678'}]}})))
+        self.assertTrue(record_filter(record(
+            'A', '2015-03-01T12:30:00Z', requestParameters=None,
+            resources=[{'ARN': 'i-12345678'}])))
+        self.assertFalse(record_filter(record(
+            'A', '2015-03-01T12:30:00Z',
+            requestParameters={'instanceId': 'i-87654321'})))
+
+
+class TestLogFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tempdir, 'cache')
+        self.cache = LogFileCache(self.cache_dir, max_size=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_download_is_cached(self):
+        download = mock.Mock(side_effect=lambda f: f.write(b'contents'))
+        for _ in range(2):
+            with self.cache.open('bucket', 'key', '"etag"', download) as f:
+                self.assertEqual(f.read(), b'contents')
+        self.assertEqual(download.call_count, 1)
+        with self.cache.open('bucket', 'key', '"etag2"', download) as f:
+            self.assertEqual(f.read(), b'contents')
+        self.assertEqual(download.call_count, 2)
+
+    def test_failed_download_is_not_cached(self):
+        download = mock.Mock(side_effect=IOError('failed'))
+        with self.assertRaises(IOError):
+            self.cache.open('bucket', 'key', '"etag"', download)
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_unwritable_cache_dir_uses_temporary_file(self):
+        open(self.cache_dir, 'w').close()
+        download = mock.Mock(side_effect=lambda f: f.write(b'contents'))
+        with self.cache.open('bucket', 'key', '"etag"', download) as f:
+            self.assertEqual(f.read(), b'contents')
+
+    def test_prune_removes_least_recently_used(self):
+        for name in ('old', 'new'):
+            with self.cache.open('bucket', name, '"etag"',
+                                 lambda f: f.write(b'123456')):
+                pass
+        names = sorted(os.listdir(self.cache_dir))
+        os.utime(os.path.join(self.cache_dir, names[0]), (0, 0))
+        self.cache.prune()
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), names[1:])
+
+
+class TestCloudTrailSearch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = LogFileCache(self.tempdir)
+        patcher = mock.patch.object(cloudtrailsearch, 'get_log_file_cache',
+                                    return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stdout = six.StringIO()
+        patcher = mock.patch('sys.stdout', self.stdout)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.objects = {}
+        self.s3 = mock.Mock()
+        self.s3.get_paginator.return_value.paginate.side_effect = self.list
+        self.s3.get_object.side_effect = lambda Bucket, Key, IfMatch: {
+            'Body': six.BytesIO(self.objects[Key])}
+        self.cloudtrail = mock.Mock()
+        self.cloudtrail.describe_trails.return_value = {'trailList': [
+            {'S3BucketName': 'bucket', 'S3KeyPrefix': 'logs'}]}
+        self.session = mock.Mock()
+        self.session.emit_first_non_none_response.return_value = None
+        self.session.create_client.side_effect = \
+            lambda name, **kwargs: getattr(self, name)
+        self.parsed_globals = mock.Mock(region='us-east-1', verify_ssl=None,
+                                        endpoint_url=None)
+        self.command = CloudTrailSearch(self.session)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def list(self, Bucket, Prefix, Delimiter=None):
+        self.assertEqual(Bucket, 'bucket')
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        if Delimiter is None:
+            return [{'Contents': [{'Key': k, 'ETag': '"%s"' % k}
+                                  for k in keys]}]
+        prefixes = sorted(set(
+            Prefix + k[len(Prefix):].split(Delimiter)[0] + Delimiter
+            for k in keys))
+        return [{'CommonPrefixes': [{'Prefix': p} for p in prefixes]}]
+
+    def run_search(self, *args):
+        rc = self.command(list(args), self.parsed_globals)
+        self.assertEqual(rc, 0)
+        lines = self.stdout.getvalue().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_search_logs(self):
+        self.objects[log_file_key('2015/03/01', '1205')] = gzip_records([
+            record('RunInstances', '2015-03-01T12:01:00Z'),
+            record('DescribeInstances', '2015-03-01T12:02:00Z'),
+        ])
+        self.objects[log_file_key('2015/03/01', '2355')] = gzip_records([
+            record('RunInstances', '2015-03-01T23:50:00Z'),
+        ])
+        self.objects[log_file_key('2015/03/02', '0010')] = gzip_records([
+            record('RunInstances', '2015-03-01T23:59:00Z'),
+            record('RunInstances', '2015-03-02T00:05:00Z'),
+        ])
+        # Delivered long after the end of the window, so it isn't read.
+        self.objects[log_file_key('2015/03/02', '0100')] = b'not gzip'
+        records = self.run_search(
+            '--name', 'trail', '--start-time', '2015-03-01T12:00:00Z',
+            '--end-time', '2015-03-02T00:00:00Z',
+            '--event-name', 'RunInstances')
+        self.assertEqual([r['eventTime'] for r in records], [
+            '2015-03-01T12:01:00Z', '2015-03-01T23:50:00Z',
+            '2015-03-01T23:59:00Z'])
+        self.cloudtrail.describe_trails.assert_called_with(
+            trailNameList=['trail'])
+
+    def test_log_files_are_downloaded_once(self):
+        self.objects[log_file_key('2015/03/01', '1205')] = gzip_records([
+            record('RunInstances', '2015-03-01T12:01:00Z')])
+        for _ in range(2):
+            self.run_search('--s3-bucket', 'bucket', '--s3-prefix', 'logs/',
+                            '--start-time', '2015-03-01T12:00:00',
+                            '--end-time', '2015-03-01T13:00:00')
+        self.assertEqual(self.s3.get_object.call_count, 1)
+        self.assertFalse(self.cloudtrail.describe_trails.called)
+
+    def test_name_or_bucket_is_required(self):
+        with self.assertRaises(ValueError):
+            self.command(['--start-time', '2015-03-01'], self.parsed_globals)
+        with self.assertRaises(ValueError):
+            self.command(['--name', 'trail', '--s3-bucket', 'bucket',
+                          '--start-time', '2015-03-01'], self.parsed_globals)
+
+    def test_start_time_must_be_before_end_time(self):
+        with self.assertRaises(ValueError):
+            self.command(['--name', 'trail', '--start-time', '2015-03-02',
+                          '--end-time', '2015-03-01'], self.parsed_globals)
+
+
+if __name__ == "__main__":
+    unittest.main()
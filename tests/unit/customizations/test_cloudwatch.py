@@ -17,6 +17,7 @@ from awscli.testutils import unittest
 import mock
 
 from awscli.customizations import putmetricdata
+from awscli.errorhandler import ClientError
 
 
 class TestPutMetricArgument(unittest.TestCase):
@@ -79,3 +80,92 @@ class TestPutMetricArgument(unittest.TestCase):
         parameters = {}
         arg.add_to_params(parameters, None)
         self.assertEqual(parameters, {})
+
+
+class TestPackMetricData(unittest.TestCase):
+    def datum(self, i, dimensions=0):
+        return {'MetricName': 'Metric', 'Value': i,
+                'Dimensions': [{'Name': 'Name%s' % j, 'Value': 'x' * 200}
+                               for j in range(dimensions)]}
+
+    def test_batches_are_limited_by_count(self):
+        data = [(i, self.datum(i)) for i in range(1, 42)]
+        batches = list(putmetricdata.pack_metric_data(data, 'Namespace'))
+        self.assertEqual([len(b.metric_data) for b in batches], [20, 20, 1])
+        self.assertEqual([b.lines for b in batches],
+                         [[1, 20], [21, 40], [41, 41]])
+
+    def test_batches_are_limited_by_size(self):
+        data = [(i, self.datum(i, dimensions=10)) for i in range(1, 41)]
+        batches = list(putmetricdata.pack_metric_data(
+            data, 'Namespace', max_size=10000))
+        self.assertTrue(len(batches) > 2)
+        for batch in batches:
+            size = putmetricdata.estimate_request_size(
+                {'MetricData': batch.metric_data, 'Namespace': 'Namespace',
+                 'Action': 'PutMetricData', 'Version': '2010-08-01'}, '')
+            self.assertLessEqual(size, 10000)
+        self.assertEqual(
+            sum(len(b.metric_data) for b in batches), len(data))
+
+    def test_oversized_data_point_is_an_error(self):
+        data = [(1, self.datum(1)), (2, self.datum(2, dimensions=10)),
+                (3, self.datum(3))]
+        batches = list(putmetricdata.pack_metric_data(
+            data, 'Namespace', max_size=1000))
+        self.assertEqual(batches[0].lines, [2, 2])
+        self.assertIn('larger than', batches[0].error)
+        self.assertEqual(batches[1].lines, [1, 3])
+        self.assertEqual(len(batches[1].metric_data), 2)
+
+    def test_parse_errors_are_passed_through(self):
+        batches = list(putmetricdata.pack_metric_data(
+            [(1, ValueError('bad line'))], 'Namespace'))
+        self.assertEqual(batches[0].error, 'bad line')
+
+
+class TestSendMetricDataBatch(unittest.TestCase):
+    def setUp(self):
+        self.operation = mock.Mock()
+        self.argument = putmetricdata.MetricDataFileArgument(self.operation)
+        self.batch = putmetricdata.MetricDataBatch(
+            [1, 2], [{'MetricName': 'Metric', 'Value': 1}])
+        self.sleep_patch = mock.patch('time.sleep')
+        self.sleep = self.sleep_patch.start()
+        self.addCleanup(self.sleep_patch.stop)
+
+    def error(self, code, status=400):
+        return ClientError(error_code=code, error_message='message',
+                           error_type='client',
+                           operation_name='PutMetricData',
+                           http_status_code=status)
+
+    def test_throttled_requests_are_retried(self):
+        self.operation.call.side_effect = [
+            self.error('Throttling'), self.error('Throttling'),
+            (mock.Mock(), {})]
+        result = self.argument._send_batch(
+            mock.sentinel.endpoint, 'Namespace', self.batch)
+        self.assertIsNone(result)
+        self.assertEqual(self.operation.call.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        # The backoff grows with each attempt.
+        self.assertLessEqual(self.sleep.call_args_list[0][0][0], 0.5)
+        self.assertGreaterEqual(self.sleep.call_args_list[1][0][0], 0.5)
+
+    def test_client_errors_are_not_retried(self):
+        self.operation.call.side_effect = self.error('InvalidParameterValue')
+        result = self.argument._send_batch(
+            mock.sentinel.endpoint, 'Namespace', self.batch)
+        self.assertEqual(result['Lines'], [1, 2])
+        self.assertIn('InvalidParameterValue', result['Error'])
+        self.assertEqual(self.operation.call.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        self.operation.call.side_effect = self.error('Throttling')
+        result = self.argument._send_batch(
+            mock.sentinel.endpoint, 'Namespace', self.batch)
+        self.assertIn('Throttling', result['Error'])
+        self.assertEqual(self.operation.call.call_count,
+                         putmetricdata.MAX_SEND_ATTEMPTS)
+
@@ -12,6 +12,12 @@
 # language governing permissions and limitations under the License.
 
 import argparse
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
 
 from mock import Mock, ANY, patch, MagicMock
 from awscli.compat import six
@@ -21,6 +27,8 @@ from awscli.customizations.codedeploy import S3Client
 from awscli.customizations.codedeploy import CodeDeployClient
 from awscli.customizations.codedeploy import CodeDeployBase
 from awscli.customizations.codedeploy import CodeDeployPush
+from awscli.customizations.codedeploy import ZipBundle
+from awscli.customizations.codedeploy import CompressedEntryCache
 from tests.unit.test_clidriver import FakeSession
 from awscli.testutils import unittest
 from awscli.testutils import BaseAWSCommandParamsTest
@@ -631,6 +639,242 @@ class TestS3Client(CodeDeployTestCase):
             upload_id=self.upload_id
         )
 
+    def test_upload_to_s3_retries_failed_part(self):
+        self.args.bucket = self.bucket
+        self.args.key = self.key
+        self.bundle_mock.tell.return_value = (6 << 20)
+        self.bundle_mock.read.return_value = b'a' * (6 << 20)
+        self.s3client.s3.UploadPart.side_effect = [
+            RuntimeError('error'), {'ETag': self.eTag}]
+
+        response = self.s3client.upload_to_s3(self.args, self.bundle_mock)
+
+        self.assertDictEqual(self.upload_response, response)
+        self.assertEqual(self.s3client.s3.UploadPart.call_count, 2)
+        self.s3client.s3.CompleteMultipartUpload.assert_called_with(
+            bucket=self.bucket,
+            key=self.key,
+            upload_id=self.upload_id,
+            multipart_upload={'Parts': [{'PartNumber': 1, 'ETag': self.eTag}]}
+        )
+        self.assertFalse(self.s3client.s3.AbortMultipartUpload.called)
+
+    def test_upload_to_s3_uploads_zip_bundle_parts_in_order(self):
+        self.args.bucket = self.bucket
+        self.args.key = self.key
+        uploaded = {}
+
+        def upload_part(part_number, body, **kwargs):
+            uploaded[part_number] = body.read()
+            return {'ETag': '"etag-%s"' % part_number}
+        self.s3client.s3.UploadPart.side_effect = upload_part
+
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        members = []
+        for i in range(4):
+            filename = os.path.join(source, 'file%s' % i)
+            with open(filename, 'wb') as f:
+                # Random data doesn't compress, so the zip file spans
+                # several parts.
+                f.write(os.urandom(3 << 20))
+            members.append((filename, 'file%s' % i))
+        entry_cache = CompressedEntryCache(os.path.join(source, 'cache'))
+        with tempfile.TemporaryFile('w+b') as tf:
+            bundle = ZipBundle(tf, members, entry_cache)
+            self.s3client.upload_to_s3(self.args, bundle)
+            tf.seek(0)
+            contents = tf.read()
+
+        parts = self.s3client.s3.CompleteMultipartUpload.call_args[1][
+            'multipart_upload']['Parts']
+        self.assertEqual(
+            [part['PartNumber'] for part in parts],
+            list(range(1, len(uploaded) + 1)))
+        self.assertEqual(parts[0]['ETag'], '"etag-1"')
+        self.assertEqual(
+            b''.join(uploaded[i] for i in sorted(uploaded)), contents)
+        self.assertFalse(self.s3client.s3.PutObject.called)
+
+
+class TestZipBundle(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.members = []
+        for name in ['appspec.yml', 'a.txt', 'b.txt']:
+            filename = os.path.join(self.source, name)
+            with open(filename, 'wb') as f:
+                f.write(os.urandom(1000))
+            self.members.append((filename, name))
+        self.fileobj = tempfile.TemporaryFile('w+b')
+        self.addCleanup(self.fileobj.close)
+        self.cache_dir = os.path.join(self.source, 'cache')
+        self.entry_cache = CompressedEntryCache(self.cache_dir)
+        self.bundle = ZipBundle(self.fileobj, self.members, self.entry_cache)
+
+    def read_zip_file(self):
+        self.bundle.seek(0)
+        return zipfile.ZipFile(six.BytesIO(self.bundle.read()))
+
+    def test_parts_make_up_zip_file(self):
+        parts = list(self.bundle.iter_parts(512))
+        self.assertTrue(all(len(part) == 512 for part in parts[:-1]))
+        self.assertTrue(0 < len(parts[-1]) <= 512)
+        zf = zipfile.ZipFile(six.BytesIO(b''.join(parts)))
+        self.assertEqual(
+            sorted(zf.namelist()), ['a.txt', 'appspec.yml', 'b.txt'])
+        self.assertIsNone(zf.testzip())
+
+    def test_parts_are_yielded_before_all_members_are_written(self):
+        parts = self.bundle.iter_parts(512)
+        next(parts)
+        position = self.fileobj.tell()
+        list(parts)
+        self.assertLess(position, self.fileobj.tell())
+
+    def test_reading_writes_whole_zip_file(self):
+        zf = self.read_zip_file()
+        self.assertEqual(zf.namelist(), ['appspec.yml', 'a.txt', 'b.txt'])
+
+    def test_members_are_deflated(self):
+        filename = os.path.join(self.source, 'compressible.txt')
+        with open(filename, 'wb') as f:
+            f.write(b'a' * 100000)
+        self.members.append((filename, 'dir/compressible.txt'))
+        zf = self.read_zip_file()
+        info = zf.getinfo('dir/compressible.txt')
+        self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(info.compress_size, 1000)
+        self.assertEqual(zf.read(info), b'a' * 100000)
+
+    def test_member_metadata_is_preserved(self):
+        filename, arcname = self.members[0]
+        os.chmod(filename, 0o750)
+        os.utime(filename, (1420070400, 1420070400))
+        info = self.read_zip_file().getinfo(arcname)
+        self.assertEqual((info.external_attr >> 16) & 0o777, 0o750)
+        self.assertEqual(info.date_time,
+                         time.localtime(1420070400)[0:6])
+
+    def test_non_ascii_names(self):
+        filename = os.path.join(self.source, 'a.txt')
+        self.members.append((filename, u'caf\u00e9.txt'))
+        zf = self.read_zip_file()
+        self.assertIn(u'caf\u00e9.txt', zf.namelist())
+
+    def test_parts_can_only_be_written_once(self):
+        list(self.bundle.iter_parts(512))
+        with self.assertRaises(RuntimeError):
+            list(self.bundle.iter_parts(512))
+
+    def test_identical_to_bundle_built_from_cache(self):
+        self.bundle.seek(0)
+        first = self.bundle.read()
+        with patch.object(self.entry_cache, '_deflate') as deflate:
+            fileobj = tempfile.TemporaryFile('w+b')
+            self.addCleanup(fileobj.close)
+            bundle = ZipBundle(fileobj, self.members, self.entry_cache)
+            bundle.seek(0)
+            self.assertEqual(bundle.read(), first)
+        self.assertFalse(deflate.called)
+
+    def test_bundle_larger_than_cache_is_kept(self):
+        self.entry_cache._max_size = 1
+        list(self.bundle.iter_parts(512))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+        with patch.object(self.entry_cache, '_deflate') as deflate:
+            fileobj = tempfile.TemporaryFile('w+b')
+            self.addCleanup(fileobj.close)
+            list(ZipBundle(fileobj, self.members,
+                           self.entry_cache).iter_parts(512))
+        self.assertFalse(deflate.called)
+
+
+class TestCompressedEntryCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.cache_dir = os.path.join(self.tempdir, 'cache')
+        self.cache = CompressedEntryCache(self.cache_dir)
+        self.filename = os.path.join(self.tempdir, 'file.txt')
+        with open(self.filename, 'wb') as f:
+            f.write(b'contents')
+
+    def read_data(self, entry):
+        with open(entry.data_filename, 'rb') as f:
+            f.seek(entry.data_offset)
+            data = f.read()
+        self.assertEqual(len(data), entry.compress_size)
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+    def test_compress(self):
+        entry = self.cache.compress((self.filename, 'file.txt'))
+        self.assertEqual(entry.arcname, 'file.txt')
+        self.assertEqual(entry.file_size, 8)
+        self.assertEqual(entry.crc, zlib.crc32(b'contents') & 0xffffffff)
+        self.assertFalse(entry.temporary)
+        self.assertEqual(self.read_data(entry), b'contents')
+
+    def test_unchanged_file_is_not_compressed_again(self):
+        first = self.cache.compress((self.filename, 'file.txt'))
+        with patch.object(self.cache, '_deflate') as deflate:
+            second = self.cache.compress((self.filename, 'other.txt'))
+        self.assertFalse(deflate.called)
+        self.assertEqual(second.data_filename, first.data_filename)
+        self.assertEqual(second.arcname, 'other.txt')
+        self.assertEqual(second.crc, first.crc)
+
+    def test_changed_file_is_compressed_again(self):
+        first = self.cache.compress((self.filename, 'file.txt'))
+        with open(self.filename, 'wb') as f:
+            f.write(b'new contents')
+        second = self.cache.compress((self.filename, 'file.txt'))
+        self.assertNotEqual(second.data_filename, first.data_filename)
+        self.assertEqual(self.read_data(second), b'new contents')
+
+    def test_truncated_entry_is_replaced(self):
+        entry = self.cache.compress((self.filename, 'file.txt'))
+        with open(entry.data_filename, 'r+b') as f:
+            f.truncate(entry.data_offset + 1)
+        entry = self.cache.compress((self.filename, 'file.txt'))
+        self.assertEqual(self.read_data(entry), b'contents')
+
+    def test_temporary_file_used_when_cache_dir_unusable(self):
+        # The cache directory can't be created under a regular file.
+        cache = CompressedEntryCache(os.path.join(self.filename, 'cache'))
+        entry = cache.compress((self.filename, 'file.txt'))
+        self.addCleanup(os.remove, entry.data_filename)
+        self.assertTrue(entry.temporary)
+        self.assertEqual(self.read_data(entry), b'contents')
+
+    def test_prune_removes_least_recently_used_entries(self):
+        filenames = []
+        for i in range(3):
+            filename = os.path.join(self.tempdir, 'file%s' % i)
+            with open(filename, 'wb') as f:
+                f.write(os.urandom(1000))
+            filenames.append(filename)
+        entries = []
+        for i, filename in enumerate(filenames):
+            entry = self.cache.compress((filename, filename))
+            os.utime(entry.data_filename, (i, i))
+            entries.append(entry)
+        entry_size = os.path.getsize(entries[0].data_filename)
+        self.cache._max_size = entry_size * 2
+        self.cache.prune()
+        self.assertFalse(os.path.exists(entries[0].data_filename))
+        self.assertTrue(os.path.exists(entries[1].data_filename))
+        self.assertTrue(os.path.exists(entries[2].data_filename))
+
+    def test_prune_does_not_remove_kept_entries(self):
+        entry = self.cache.compress((self.filename, 'file.txt'))
+        self.cache._max_size = 0
+        self.cache.prune(keep=[entry.data_filename])
+        self.assertTrue(os.path.exists(entry.data_filename))
+        self.cache.prune()
+        self.assertFalse(os.path.exists(entry.data_filename))
+
 
 class TestCodeDeployClient(CodeDeployTestCase):
     def setUp(self):
@@ -765,26 +1009,43 @@ class TestCodeDeployPush(CodeDeployTestCase):
             ) as bundle:
                 pass
 
-    @patch('zipfile.ZipFile')
+    @patch('awscli.customizations.codedeploy.ZipBundle')
     @patch('tempfile.TemporaryFile')
     @patch('os.path')
     @patch('os.walk')
-    def test_compress_writes_to_zip_file(self, walk, path, tf, zf):
+    def test_compress_writes_to_zip_file(self, walk, path, tf, zip_bundle):
         walk.return_value = [(self.source, [], [self.appspec])]
         path.join.return_value = self.appspec_path
         path.sep = '/'
         path.abspath.side_effect = [self.source, self.appspec_path]
         tf.return_value = self.bundle_mock
-        zf.return_value = self.zipfile_mock
         with self.codedeploypush._compress(
                 self.args.source,
                 self.args.ignore_hidden_files
         ) as bundle:
-            zf().write.assert_called_with(
-                '/tmp/appspec.yml',
-                self.appspec
+            zip_bundle.assert_called_with(
+                self.bundle_mock,
+                [('/tmp/appspec.yml', self.appspec)]
             )
-
+            self.assertEqual(bundle, zip_bundle.return_value)
+
+    @patch('awscli.customizations.codedeploy.get_bundle_cache')
+    def test_compress_ignores_hidden_files(self, get_bundle_cache):
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        get_bundle_cache.return_value = CompressedEntryCache(
+            os.path.join(source, '.cache'))
+        os.mkdir(os.path.join(source, '.git'))
+        os.mkdir(os.path.join(source, 'scripts'))
+        for name in ['appspec.yml', '.hidden', os.path.join('.git', 'HEAD'),
+                     os.path.join('scripts', 'start.sh')]:
+            with open(os.path.join(source, name), 'wb') as f:
+                f.write(b'contents')
+        with self.codedeploypush._compress(source, True) as bundle:
+            bundle.seek(0)
+            zf = zipfile.ZipFile(six.BytesIO(bundle.read()))
+            self.assertEqual(
+                sorted(zf.namelist()), ['appspec.yml', 'scripts/start.sh'])
 
 if __name__ == "__main__":
     unittest.main()
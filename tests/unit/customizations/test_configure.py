@@ -272,8 +272,12 @@ class TestConfigFileWriter(unittest.TestCase):
         self.dirname = tempfile.mkdtemp()
         self.config_filename = os.path.join(self.dirname, 'config')
         self.writer = configure.ConfigFileWriter()
+        self.snapshot_cache_patch = mock.patch(
+            'awscli.customizations.configure.get_config_snapshot_cache')
+        self.snapshot_cache = self.snapshot_cache_patch.start().return_value
 
     def tearDown(self):
+        self.snapshot_cache_patch.stop()
         shutil.rmtree(self.dirname)
 
     def assert_update_config(self, original_config_contents, updated_data,
@@ -292,6 +296,15 @@ class TestConfigFileWriter(unittest.TestCase):
                       "Actual Contents:\n"
                       "%s\n" % (updated_config_contents, new_contents))
 
+    def test_update_config_clears_config_snapshots(self):
+        self.assert_update_config(
+            '[default]\nfoo = 1\n', {'foo': '2'}, '[default]\nfoo = 2\n')
+        self.assertEqual(self.snapshot_cache.clear.call_count, 1)
+
+    def test_new_config_file_clears_config_snapshots(self):
+        self.writer.update_config({'foo': 'value'}, self.config_filename)
+        self.assertEqual(self.snapshot_cache.clear.call_count, 1)
+
     def test_update_single_existing_value(self):
         original = '[default]\nfoo = 1\nbar = 1'
         updated = '[default]\nfoo = newvalue\nbar = 1'
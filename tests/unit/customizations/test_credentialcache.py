@@ -0,0 +1,143 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import mock
+from botocore.credentials import CredentialResolver
+from botocore.credentials import InstanceMetadataProvider
+from botocore.hooks import HierarchicalEmitter
+from dateutil.tz import tzlocal
+
+from awscli.testutils import unittest
+from awscli.customizations import credentialcache
+from awscli.customizations.assumerole import JSONFileCache
+
+
+def create_metadata(expires_in=timedelta(hours=6), access_key='foo'):
+    expiry_time = datetime.now(tzlocal()) + expires_in
+    return {
+        'role_name': 'myrole',
+        'access_key': access_key,
+        'secret_key': 'bar',
+        'token': 'baz',
+        'expiry_time': expiry_time.isoformat(),
+    }
+
+
+class TestCredentialCachePlugin(unittest.TestCase):
+    def test_registration(self):
+        event_handlers = HierarchicalEmitter()
+        credentialcache.register_credential_cache(event_handlers)
+        session = mock.Mock()
+        event_handlers.emit('session-initialized', session=session)
+        session.get_component.assert_called_with('credential_provider')
+
+    def test_replaces_instance_metadata_provider(self):
+        original = InstanceMetadataProvider(iam_role_fetcher=mock.Mock())
+        env_provider = mock.Mock(METHOD='env')
+        resolver = CredentialResolver(providers=[env_provider, original])
+        session = mock.Mock()
+        session.get_component.return_value = resolver
+        credentialcache.inject_instance_metadata_cache(session)
+        self.assertEqual(len(resolver.providers), 2)
+        self.assertIs(resolver.providers[0], env_provider)
+        self.assertIsInstance(resolver.providers[1],
+                              credentialcache.CachedCredentialProvider)
+        self.assertEqual(resolver.providers[1].METHOD, 'iam-role')
+
+    def test_cache_key_is_per_host(self):
+        with mock.patch('socket.gethostname', return_value='ip-10-0-0-1/a'):
+            self.assertEqual(
+                credentialcache._create_instance_metadata_cache_key(),
+                'iam-role--ip-10-0-0-1_a')
+
+
+class TestCachedCredentialProvider(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = JSONFileCache(self.tempdir)
+        self.fetch_metadata = mock.Mock(return_value=create_metadata())
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def create_provider(self):
+        return credentialcache.CachedCredentialProvider(
+            method='iam-role', fetch_metadata=self.fetch_metadata,
+            cache=self.cache, cache_key='mykey')
+
+    def test_fetched_credentials_are_cached(self):
+        creds = self.create_provider().load()
+        self.assertEqual(creds.access_key, 'foo')
+        self.assertEqual(creds.method, 'iam-role')
+        self.assertEqual(self.cache['mykey'],
+                         self.fetch_metadata.return_value)
+
+    def test_cached_credentials_are_used(self):
+        self.cache['mykey'] = create_metadata(access_key='cached')
+        creds = self.create_provider().load()
+        self.assertEqual(creds.access_key, 'cached')
+        self.assertFalse(self.fetch_metadata.called)
+
+    def test_credentials_close_to_expiring_are_refreshed(self):
+        self.cache['mykey'] = create_metadata(
+            expires_in=timedelta(minutes=5), access_key='cached')
+        creds = self.create_provider().load()
+        self.assertEqual(creds.access_key, 'foo')
+        self.assertEqual(self.cache['mykey']['access_key'], 'foo')
+
+    def test_refresh_uses_credentials_written_by_another_process(self):
+        self.cache['mykey'] = create_metadata(expires_in=timedelta(0))
+        other_metadata = create_metadata(access_key='other')
+
+        def acquire_lock(lock):
+            # Another process refreshed the cache while we were
+            # waiting for the lock.
+            self.cache['mykey'] = other_metadata
+            lock.acquired = True
+            return True
+
+        with mock.patch('awscli.utils.FileLock.acquire', acquire_lock):
+            creds = self.create_provider().load()
+        self.assertEqual(creds.access_key, 'other')
+        self.assertFalse(self.fetch_metadata.called)
+
+    def test_lock_is_released_after_refresh(self):
+        self.create_provider().load()
+        self.assertFalse(os.path.exists(
+            os.path.join(self.tempdir, 'mykey.lock')))
+
+    def test_no_credentials_available(self):
+        self.fetch_metadata.return_value = {}
+        self.assertIsNone(self.create_provider().load())
+        self.assertNotIn('mykey', self.cache)
+
+    def test_credentials_refresh_through_cache(self):
+        self.fetch_metadata.return_value = create_metadata(
+            expires_in=timedelta(minutes=1))
+        creds = self.create_provider().load()
+        self.fetch_metadata.return_value = create_metadata(
+            access_key='refreshed')
+        self.assertEqual(creds.access_key, 'refreshed')
+        self.assertEqual(self.cache['mykey']['access_key'], 'refreshed')
+
+    def test_cache_write_failure_is_not_an_error(self):
+        cache = mock.MagicMock()
+        cache.__getitem__.side_effect = KeyError('mykey')
+        cache.__setitem__.side_effect = OSError()
+        self.cache = cache
+        creds = self.create_provider().load()
+        self.assertEqual(creds.access_key, 'foo')
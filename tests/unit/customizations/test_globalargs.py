@@ -94,3 +94,23 @@ class TestGlobalArgsCustomization(unittest.TestCase):
         globalargs.resolve_types(parsed_args)
         self.assertEqual(parsed_args.endpoint_url,
                          'http://custom-endpoint.com')
+
+    def test_parse_regions(self):
+        parsed_args = FakeParsedArgs(regions='us-east-1, eu-west-1,')
+        globalargs.resolve_types(parsed_args)
+        self.assertEqual(parsed_args.regions, ['us-east-1', 'eu-west-1'])
+
+    def test_parse_empty_regions(self):
+        parsed_args = FakeParsedArgs(regions=',')
+        with self.assertRaises(ValueError):
+            globalargs.resolve_types(parsed_args)
+
+    def test_all_regions(self):
+        parsed_args = FakeParsedArgs(all_regions=True)
+        globalargs.resolve_all_regions(parsed_args)
+        self.assertEqual(parsed_args.regions, globalargs.PUBLIC_REGIONS)
+
+    def test_all_regions_and_regions_are_mutually_exclusive(self):
+        parsed_args = FakeParsedArgs(all_regions=True, regions=['us-east-1'])
+        with self.assertRaises(ValueError):
+            globalargs.resolve_all_regions(parsed_args)
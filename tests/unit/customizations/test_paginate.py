@@ -13,6 +13,7 @@
 from awscli.testutils import unittest
 
 import mock
+from botocore.hooks import HierarchicalEmitter
 
 from awscli.customizations import paginate
 
@@ -62,6 +63,17 @@ class TestArgumentTableModifications(TestPaginateBase):
         self.assertIsInstance(argument_table['page-size'],
                               paginate.PageArgument)
 
+    def test_pagination_check_registered_once(self):
+        emitter = HierarchicalEmitter()
+        self.operation.session.register = emitter.register
+        for _ in range(3):
+            argument_table = {'foo': mock.Mock(), 'bar': mock.Mock()}
+            paginate.unify_paging_params(argument_table, self.operation,
+                                         'building-argument-table.foo.bar')
+        handlers = list(emitter._handlers.prefix_search(
+            'operation-args-parsed.foo.bar'))
+        self.assertEqual(len(handlers), 1)
+
     def test_operation_with_no_paginate(self):
         # Operations that don't paginate are left alone.
         self.operation.can_paginate = False
@@ -10,16 +10,22 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import json
+from collections import OrderedDict
+
 import mock
 
 from botocore.waiter import WaiterModel
 from botocore.exceptions import DataNotFoundError
 
+from awscli.argprocess import ParamError
+from awscli.compat import six
 from awscli.testutils import unittest, BaseAWSHelpOutputTest, \
     BaseAWSCommandParamsTest
 from awscli.customizations.waiters import add_waiters, WaitCommand, \
     get_waiter_model_from_service_object, WaiterStateCommand, WaiterCaller, \
-    WaiterStateDocBuilder, WaiterStateCommandBuilder
+    WaiterStateDocBuilder, WaiterStateCommandBuilder, MultiWaiter, \
+    parse_quorum
 
 
 class TestAddWaiters(unittest.TestCase):
@@ -192,6 +198,35 @@ class TestWait(BaseAWSCommandParamsTest):
         }
         self.assert_params_for_cmd(cmdline, result)
 
+    @mock.patch('time.sleep')
+    def test_ec2_instance_running_per_resource(self, sleep):
+        cmdline = 'ec2 wait instance-running'
+        cmdline += ' --instance-ids i-12345678 i-87654321'
+        cmdline += ' --wait-per-resource'
+
+        def instance(instance_id, state):
+            return {'InstanceId': instance_id, 'State': {'Name': state}}
+        self.parsed_responses = [
+            {'Reservations': [
+                {'Instances': [instance('i-12345678', 'running')]},
+                {'Instances': [instance('i-87654321', 'pending')]}]},
+            {'Reservations': [
+                {'Instances': [instance('i-87654321', 'running')]}]},
+        ]
+        stdout = self.run_cmd(cmdline, expected_rc=0)[0]
+        outcomes = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(
+            [(o['Parameters'], o['State']) for o in outcomes],
+            [({'InstanceIds': ['i-12345678']}, 'success'),
+             ({'InstanceIds': ['i-87654321']}, 'success')])
+        # The instances are described together, then only the one that
+        # wasn't running yet.
+        self.assertEqual(
+            [params for _, params in self.operations_called],
+            [{'InstanceIds': ['i-12345678', 'i-87654321']},
+             {'InstanceIds': ['i-87654321']}])
+        self.assertEqual(sleep.call_count, 1)
+
 
 class TestWaiterStateCommandBuilder(unittest.TestCase):
     def setUp(self):
@@ -359,6 +394,195 @@ class TestWaiterCaller(unittest.TestCase):
             Foo='bar', Baz='biz')
 
 
+class TestWaiterCallerForMany(unittest.TestCase):
+    def setUp(self):
+        self.waiter_caller = WaiterCaller('InstanceRunning')
+        self.stream = mock.Mock()
+        patcher = mock.patch(
+            'awscli.customizations.waiters.get_waiter_model_from_service_object')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('awscli.customizations.waiters.MultiWaiter')
+        self.multi_waiter = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def wait(self, parameters):
+        return self.waiter_caller._wait_for_many(
+            mock.Mock(), parameters, mock.Mock(), stream=self.stream)
+
+    def test_lines_are_merged_with_parameters(self):
+        input_lines = six.StringIO(
+            '{"InstanceIds": ["i-1"], "DryRun": false}\n\n'
+            '{"InstanceIds": ["i-2"]}\n')
+        self.waiter_caller.input_source = '-'
+        self.multi_waiter.wait.return_value = [{'State': 'success'}] * 2
+        with mock.patch('sys.stdin', input_lines):
+            rc = self.wait({'DryRun': True})
+        self.assertEqual(rc, 0)
+        self.multi_waiter.wait.assert_called_with(
+            [{'InstanceIds': ['i-1'], 'DryRun': True},
+             {'InstanceIds': ['i-2'], 'DryRun': True}], 2)
+
+    def test_quorum_not_reached(self):
+        self.waiter_caller.quorum = '50%'
+        self.waiter_caller.per_resource = True
+        self.multi_waiter.split.return_value = [{}, {}, {}]
+        self.multi_waiter.wait.return_value = [
+            {'State': 'success'}, {'State': 'failure'}, {'State': 'failure'}]
+        self.assertEqual(self.wait({'InstanceIds': ['i-1', 'i-2', 'i-3']}),
+                         255)
+        self.multi_waiter.wait.assert_called_with([{}, {}, {}], 2)
+        self.assertEqual(self.stream.write.call_count, 6)
+
+
+class TestParseQuorum(unittest.TestCase):
+    def test_count(self):
+        self.assertEqual(parse_quorum('3', 10), 3)
+        self.assertEqual(parse_quorum('30', 10), 10)
+
+    def test_percentage(self):
+        self.assertEqual(parse_quorum('90%', 10), 9)
+        self.assertEqual(parse_quorum('91%', 10), 10)
+        self.assertEqual(parse_quorum('0%', 10), 0)
+
+    def test_invalid(self):
+        for value in ('-1', 'all', '101%', '%'):
+            with self.assertRaises(ParamError):
+                parse_quorum(value, 10)
+
+
+class TestMultiWaiter(unittest.TestCase):
+    def setUp(self):
+        self.waiter_config = WaiterModel({
+            'version': 2,
+            'waiters': {
+                'InstanceRunning': {
+                    'delay': 10,
+                    'operation': 'DescribeInstances',
+                    'maxAttempts': 5,
+                    'acceptors': [
+                        {'expected': 'running', 'matcher': 'pathAll',
+                         'state': 'success',
+                         'argument': 'Reservations[].Instances[].State.Name'},
+                        {'expected': 'terminated', 'matcher': 'pathAny',
+                         'state': 'failure',
+                         'argument': 'Reservations[].Instances[].State.Name'},
+                    ],
+                },
+            },
+        }).get_waiter('InstanceRunning')
+        self.operation_object = mock.Mock()
+        self.operation_object.model.input_shape.members = OrderedDict([
+            ('DryRun', mock.Mock(type_name='boolean')),
+            ('InstanceIds', mock.Mock(type_name='list',
+                                      member=mock.Mock(type_name='string'))),
+        ])
+        self.operation_object.call.side_effect = self.describe_instances
+        self.states = {}
+        self.calls = []
+        self.multi_waiter = MultiWaiter(self.waiter_config,
+                                        self.operation_object, 'endpoint')
+        self.time = 0
+        # The delay between polls is the largest the jitter allows, so
+        # the number of polls before the timeout doesn't vary.
+        for name, side_effect in (('time.time', lambda: self.time),
+                                  ('time.sleep', self.sleep),
+                                  ('random.uniform', lambda a, b: b)):
+            patcher = mock.patch('awscli.customizations.waiters.' + name,
+                                 side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sleep(self, amount):
+        self.time += amount
+
+    def describe_instances(self, endpoint, InstanceIds, **kwargs):
+        self.calls.append(InstanceIds)
+        if any(i not in self.states for i in InstanceIds):
+            error = Exception()
+            error.error_code = 'InvalidInstanceID.NotFound'
+            error.error_message = 'Not found'
+            raise error
+        reservations = []
+        for instance_id in InstanceIds:
+            state = self.states[instance_id].pop(0)
+            if not self.states[instance_id]:
+                self.states[instance_id].append(state)
+            reservations.append({'Instances': [
+                {'InstanceId': instance_id, 'State': {'Name': state}}]})
+        return None, {'Reservations': reservations}
+
+    def test_parameter_sets_are_polled_together(self):
+        self.states = {'i-1': ['pending', 'running'], 'i-2': ['running'],
+                       'i-3': ['pending', 'terminated']}
+        outcomes = self.multi_waiter.wait([
+            {'InstanceIds': ['i-1']}, {'InstanceIds': ['i-2']},
+            {'InstanceIds': ['i-3']}])
+        self.assertEqual([o['State'] for o in outcomes],
+                         ['success', 'success', 'failure'])
+        self.assertEqual(self.calls,
+                         [['i-1', 'i-2', 'i-3'], ['i-1', 'i-3']])
+
+    def test_only_matching_parameters_are_polled_together(self):
+        self.states = {'i-1': ['running'], 'i-2': ['running']}
+        self.multi_waiter.wait([
+            {'InstanceIds': ['i-1'], 'DryRun': False},
+            {'InstanceIds': ['i-2'], 'DryRun': True}])
+        self.assertEqual(sorted(self.calls), [['i-1'], ['i-2']])
+
+    def test_error_polls_sets_separately(self):
+        self.states = {'i-1': ['running']}
+        outcomes = self.multi_waiter.wait(
+            [{'InstanceIds': ['i-1']}, {'InstanceIds': ['i-2']}])
+        self.assertEqual([o['State'] for o in outcomes], ['success', 'error'])
+        self.assertIn('InvalidInstanceID.NotFound', outcomes[1]['Reason'])
+
+    def test_batches_are_limited(self):
+        instance_ids = ['i-%s' % i for i in range(150)]
+        self.states = dict((i, ['running']) for i in instance_ids)
+        with mock.patch(
+                'awscli.customizations.waiters.MAX_COALESCED_RESOURCES', 100):
+            outcomes = self.multi_waiter.wait(
+                self.multi_waiter.split([{'InstanceIds': instance_ids}]))
+        self.assertEqual(len(outcomes), 150)
+        self.assertEqual(sorted(len(ids) for ids in self.calls), [50, 100])
+
+    def test_timeout(self):
+        self.states = {'i-1': ['pending'], 'i-2': ['running']}
+        outcomes = self.multi_waiter.wait(
+            [{'InstanceIds': ['i-1']}, {'InstanceIds': ['i-2']}])
+        self.assertEqual([o['State'] for o in outcomes],
+                         ['timeout', 'success'])
+        # The polls back off, so there are fewer of them than attempts.
+        self.assertLess(len(self.calls), 5)
+        self.assertLessEqual(self.time, 50)
+
+    def test_stops_at_quorum(self):
+        self.states = {'i-1': ['pending'], 'i-2': ['running'],
+                       'i-3': ['running']}
+        outcomes = self.multi_waiter.wait(
+            [{'InstanceIds': ['i-1']}, {'InstanceIds': ['i-2']},
+             {'InstanceIds': ['i-3']}], quorum=2)
+        self.assertEqual([o['State'] for o in outcomes],
+                         ['waiting', 'success', 'success'])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stops_when_quorum_cannot_be_reached(self):
+        self.states = {'i-1': ['pending'], 'i-2': ['terminated']}
+        outcomes = self.multi_waiter.wait(
+            [{'InstanceIds': ['i-1']}, {'InstanceIds': ['i-2']}])
+        self.assertEqual([o['State'] for o in outcomes],
+                         ['waiting', 'failure'])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_split_requires_resource_ids(self):
+        self.operation_object.model.input_shape.members = OrderedDict()
+        multi_waiter = MultiWaiter(self.waiter_config, self.operation_object,
+                                   'endpoint')
+        with self.assertRaises(ParamError):
+            multi_waiter.split([{'TableName': 'foo'}])
+
+
 class TestWaiterStateCommand(unittest.TestCase):
     def test_create_help_command(self):
         operation_object = mock.Mock()
@@ -426,3 +426,15 @@ class TestTableFormatter(unittest.TestCase):
     def test_jmespath_filtered_dict_response(self):
         self.assert_data_renders_to(data=JMESPATH_FILTERED_RESPONSE_DICT,
                                     table=JMESPATH_FILTERED_RESPONSE_DICT_TABLE)
+
+
+class TestSpooledTableFormatter(TestTableFormatter):
+    # Rendering from a spool that is rolled over to disk on the
+    # first row should give the exact same output.
+    def setUp(self):
+        super(TestSpooledTableFormatter, self).setUp()
+        self.table = MultiTable(initial_section=False,
+                                column_separator='|', styler=Styler(),
+                                auto_reformat=False, spool_max_size=1,
+                                spool_row_threshold=0)
+        self.formatter.table = self.table
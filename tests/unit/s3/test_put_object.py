@@ -60,6 +60,19 @@ class TestPutObject(BaseAWSCommandParamsTest):
         self.assert_params_for_cmd(cmdline, expected, ignore_params=['Body'])
         self.assertEqual(self.last_kwargs['Body'].name, self.file_path)
 
+    def test_body_from_fileb_reference(self):
+        cmdline = self.prefix
+        cmdline += ' --bucket mybucket'
+        cmdline += ' --key mykey'
+        cmdline += ' --body fileb://%s' % self.file_path
+        expected = {
+            'Bucket': 'mybucket',
+            'Key': 'mykey'
+        }
+        self.assert_params_for_cmd(cmdline, expected, ignore_params=['Body'])
+        self.assertIsInstance(self.last_kwargs['Body'], file_type)
+        self.assertEqual(self.last_kwargs['Body'].name, self.file_path)
+
     def test_headers(self):
         cmdline = self.prefix
         cmdline += ' --bucket mybucket'
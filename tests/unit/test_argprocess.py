@@ -11,6 +11,7 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 import json
+import mmap
 
 import mock
 from botocore import xform_name
@@ -86,6 +87,27 @@ class TestURIParams(BaseArgProcessTest):
             result = uri_param('event-name', p, 'file://%s' % f.name)
         self.assertEqual(result, None)
 
+    def test_uri_param_blob_is_memory_mapped(self):
+        p = self.get_param_model('kms.Encrypt.Plaintext')
+        with temporary_file('r+') as f:
+            f.write('plaintext')
+            f.flush()
+            result = uri_param('event-name', p, 'fileb://%s' % f.name)
+        self.addCleanup(result.close)
+        self.assertIsInstance(result, mmap.mmap)
+        self.assertEqual(result[:], b'plaintext')
+
+    def test_uri_param_streaming_blob_is_file(self):
+        p = self.get_param_model('s3.PutObject.Body')
+        with temporary_file('r+') as f:
+            f.write('body')
+            f.flush()
+            result = uri_param('event-name', p, 'fileb://%s' % f.name)
+            self.addCleanup(result.close)
+            self.assertEqual(result.name, f.name)
+            self.assertEqual(result.read(), b'body')
+            self.assertEqual(unpack_cli_arg(p, result), result)
+
 
 class TestArgShapeDetection(BaseArgProcessTest):
 
@@ -171,6 +193,16 @@ class TestArgShapeDetection(BaseArgProcessTest):
                                          shape_map=shapes))
         self.assertIn('recursive', detect_shape_structure(shape))
 
+    def test_shape_structure_is_cached_per_shape(self):
+        p = self.get_param_model('ec2.DescribeInstances.Filters')
+        shape = p.argument_model
+        self.assertEqual(detect_shape_structure(shape),
+                         'list-structure(list-scalar, scalar)')
+        with mock.patch('awscli.argprocess._detect_shape_structure') as d:
+            self.assertEqual(detect_shape_structure(shape),
+                             'list-structure(list-scalar, scalar)')
+            self.assertFalse(d.called)
+
 
 class TestParamShorthand(BaseArgProcessTest):
     maxDiff = None
@@ -188,6 +220,13 @@ class TestParamShorthand(BaseArgProcessTest):
         json_version = unpack_cli_arg(p, json_value)
         self.assertEqual(returned, json_version)
 
+    def test_simplify_large_map_scalar(self):
+        p = self.get_param_model('sqs.SetQueueAttributes.Attributes')
+        value = ','.join('Key%s=Value%s' % (i, i) for i in range(5000))
+        returned = self.simplify(p, value)
+        self.assertEqual(len(returned), 5000)
+        self.assertEqual(returned['Key4999'], 'Value4999')
+
     def test_parse_boolean_shorthand(self):
         bool_param = mock.Mock()
         bool_param.cli_type_name = 'boolean'
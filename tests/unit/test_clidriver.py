@@ -12,7 +12,10 @@
 # language governing permissions and limitations under the License.
 from awscli.testutils import unittest
 from awscli.testutils import BaseAWSCommandParamsTest
+import json
 import logging
+import shutil
+import tempfile
 
 import mock
 from awscli.compat import six
@@ -30,6 +33,8 @@ from awscli.clidriver import ServiceCommand
 from awscli.clidriver import ServiceOperation
 from awscli.customizations.commands import BasicCommand
 from awscli import formatter
+from awscli.customizations.globalargs import PUBLIC_REGIONS
+from awscli.responsecache import ResponseCache
 from botocore.hooks import HierarchicalEmitter
 from botocore.provider import Provider
 
@@ -103,8 +108,8 @@ class FakeSession(object):
         self.stream_logger_args = None
         self.credentials = 'fakecredentials'
 
-    def register(self, event_name, handler):
-        self.emitter.register(event_name, handler)
+    def register(self, event_name, handler, unique_id=None):
+        self.emitter.register(event_name, handler, unique_id=unique_id)
 
     def emit(self, event_name, **kwargs):
         return self.emitter.emit(event_name, **kwargs)
@@ -124,6 +129,9 @@ class FakeSession(object):
     def get_config_variable(self, name):
         return GET_VARIABLE[name]
 
+    def get_scoped_config(self):
+        return {}
+
     def get_service(self, name):
         # Get service returns a service object,
         # so we'll just return a Mock object with
@@ -253,7 +261,6 @@ class TestCliDriverHooks(unittest.TestCase):
             'operation-args-parsed.s3.list-objects',
             'load-cli-arg.s3.list-objects.bucket',
             'process-cli-arg.s3.list-objects',
-            'load-cli-arg.s3.list-objects.key',
             'calling-command.s3.list-objects'
         ])
 
@@ -409,6 +416,215 @@ class TestAWSCommand(BaseAWSCommandParamsTest):
                                     verify=None,
                                     endpoint_url=None)
 
+    def fake_regional_endpoint(self, region_name, **kwargs):
+        # The real get_endpoint() loads the endpoint resolver before any
+        # requests are sent from the worker threads.
+        self.driver.session.get_component('endpoint_resolver')
+        http_response = models.Response()
+        http_response.status_code = 200
+        endpoint = mock.Mock()
+        endpoint.host = 'https://ec2.%s.amazonaws.com' % region_name
+        endpoint.region_name = region_name
+        endpoint.make_request.return_value = (
+            http_response, {'Reservations': [{'ReservationId': region_name}]})
+        return endpoint
+
+    def test_aws_with_regions(self):
+        with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
+            endpoint.side_effect = self.fake_regional_endpoint
+            stdout = self.assert_params_for_cmd(
+                'ec2 describe-instances --regions us-east-1,eu-west-1',
+                expected_rc=0)[0]
+        self.assertEqual(
+            [call[1]['region_name'] for call in endpoint.call_args_list],
+            ['us-east-1', 'eu-west-1'])
+        parsed = json.loads(stdout, object_pairs_hook=OrderedDict)
+        self.assertEqual(list(parsed.keys()), ['us-east-1', 'eu-west-1'])
+        self.assertEqual(
+            parsed['eu-west-1'],
+            {'Reservations': [{'ReservationId': 'eu-west-1'}]})
+
+    def test_aws_with_regions_and_query(self):
+        with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
+            endpoint.side_effect = self.fake_regional_endpoint
+            stdout = self.assert_params_for_cmd(
+                ['ec2', 'describe-instances', '--regions',
+                 'us-east-1,eu-west-1', '--query',
+                 '*.Reservations[].ReservationId', '--output', 'text'],
+                expected_rc=0)[0]
+        self.assertEqual(stdout, 'us-east-1\teu-west-1\n')
+
+    def test_aws_with_all_regions(self):
+        with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
+            endpoint.side_effect = self.fake_regional_endpoint
+            stdout = self.assert_params_for_cmd(
+                'ec2 describe-instances --all-regions', expected_rc=0)[0]
+        self.assertEqual(sorted(json.loads(stdout).keys()),
+                         sorted(PUBLIC_REGIONS))
+
+    def test_aws_with_regions_rejects_non_read_only_operation(self):
+        self.assert_params_for_cmd(
+            'ec2 terminate-instances --instance-ids i-12345 '
+            '--regions us-east-1,eu-west-1', expected_rc=255,
+            stderr_contains='not a read-only operation')
+
+    def test_aws_with_regions_reports_failed_regions(self):
+        def fake_endpoint(region_name, **kwargs):
+            endpoint = self.fake_regional_endpoint(region_name)
+            if region_name == 'eu-west-1':
+                endpoint.make_request.side_effect = RuntimeError('oops')
+            return endpoint
+
+        with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
+            endpoint.side_effect = fake_endpoint
+            stdout = self.assert_params_for_cmd(
+                'ec2 describe-instances --regions us-east-1,eu-west-1',
+                expected_rc=255,
+                stderr_contains='Error in region eu-west-1: oops')[0]
+        self.assertEqual(list(json.loads(stdout).keys()), ['us-east-1'])
+
+    def test_aws_with_regions_queries_merged_document(self):
+        with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
+            endpoint.side_effect = self.fake_regional_endpoint
+            stdout = self.assert_params_for_cmd(
+                'ec2 describe-instances --regions us-east-1,eu-west-1 '
+                '--output text --query *.Reservations[].ReservationId',
+                expected_rc=0)[0]
+        self.assertEqual(stdout.split(), ['us-east-1', 'eu-west-1'])
+
+    def test_aws_with_cache_ttl_reuses_response(self):
+        endpoints = []
+
+        def fake_endpoint(region_name, **kwargs):
+            endpoints.append(self.fake_regional_endpoint(region_name))
+            return endpoints[-1]
+
+        cache = mock.Mock()
+        # Paginated operations cache the response of each page.
+        cached = [{'Reservations': [{'ReservationId': 'cached'}]}]
+        cache.get.side_effect = [None, cached]
+        cmd = 'ec2 describe-instances --region us-east-1 --cache-ttl 60'
+        with mock.patch('awscli.clidriver.get_response_cache',
+                        return_value=cache):
+            with mock.patch('botocore.service.Service.get_endpoint') as e:
+                e.side_effect = fake_endpoint
+                self.assert_params_for_cmd(cmd, expected_rc=0)
+                stdout = self.assert_params_for_cmd(cmd, expected_rc=0)[0]
+        self.assertEqual(endpoints[0].make_request.call_count, 1)
+        self.assertEqual(endpoints[1].make_request.call_count, 0)
+        cache.set.assert_called_once_with(
+            mock.ANY, [{'Reservations': [{'ReservationId': 'us-east-1'}]}])
+        # Both calls looked up the same key with the given TTL.
+        self.assertEqual(cache.get.call_args_list[0],
+                         cache.get.call_args_list[1])
+        self.assertEqual(cache.get.call_args[0][1], 60)
+        self.assertEqual(json.loads(stdout), cached[0])
+
+    def test_aws_with_cache_ttl_displays_pages_like_uncached_call(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        self.parsed_responses = [
+            {'Reservations': [{'ReservationId': 'r-1'},
+                              {'ReservationId': 'r-2'}]}
+            for _ in range(2)]
+        cmd = 'ec2 describe-instances --output text --max-items 1'
+        uncached = self.assert_params_for_cmd(cmd, expected_rc=0)[0]
+        self.assertIn('NEXTTOKEN', uncached)
+        cache = ResponseCache(tempdir)
+        with mock.patch('awscli.clidriver.get_response_cache',
+                        return_value=cache):
+            # The first call retrieves the pages, the second one only
+            # replays them.
+            for _ in range(2):
+                stdout = self.assert_params_for_cmd(
+                    cmd + ' --cache-ttl 60', expected_rc=0)[0]
+                self.assertEqual(stdout, uncached)
+        self.assertEqual(self.parsed_responses, [])
+
+    def test_aws_with_cache_ttl_from_config(self):
+        self.driver.session.get_scoped_config = mock.Mock(
+            return_value={'cli_cache_ttl': '60'})
+        cache = mock.Mock()
+        cache.get.return_value = [{'Reservations': []}]
+        with mock.patch('awscli.clidriver.get_response_cache',
+                        return_value=cache):
+            self.assert_params_for_cmd('ec2 describe-instances',
+                                       expected_rc=0)
+        self.assertEqual(cache.get.call_args[0][1], 60)
+
+    def test_aws_with_cache_ttl_skips_non_read_only_operation(self):
+        with mock.patch('awscli.clidriver.get_response_cache') as cache:
+            self.assert_params_for_cmd(
+                'ec2 terminate-instances --instance-ids i-12345 '
+                '--cache-ttl 60', expected_rc=0)
+        self.assertFalse(cache.called)
+
+    def test_aws_with_cache_ttl_skips_args_that_change_response(self):
+        # A CLI-only argument that changes the response after the call.
+        class AnnotateArgument(CustomArgument):
+            changes_response = True
+
+            def add_to_params(self, parameters, value):
+                if value:
+                    session.register('after-call.ec2.DescribeInstances',
+                                     self._annotate)
+
+            def _annotate(self, parsed, **kwargs):
+                parsed['Annotated'] = True
+
+        def add_argument(argument_table, **kwargs):
+            argument_table['annotate'] = AnnotateArgument(
+                'annotate', action='store_true')
+
+        session = self.driver.session
+        session.register('building-argument-table.ec2.describe-instances',
+                         add_argument)
+        cache = mock.Mock()
+        cache.get.return_value = None
+        cmd = 'ec2 describe-instances --cache-ttl 60'
+        with mock.patch('awscli.clidriver.get_response_cache',
+                        return_value=cache):
+            self.assert_params_for_cmd(cmd, expected_rc=0)
+            self.assert_params_for_cmd(cmd + ' --annotate', expected_rc=0)
+        # Only the call without the argument used the cache.
+        self.assertEqual(cache.get.call_count, 1)
+        self.assertEqual(cache.set.call_count, 1)
+        self.assertNotIn('Annotated', cache.set.call_args[0][1])
+
+    def test_aws_with_cache_ttl_caches_paging_args(self):
+        # Paging arguments are CLI-only, but they're part of the
+        # parameters the cache key is computed from.
+        cache = mock.Mock()
+        cache.get.return_value = None
+        cmd = 'ec2 describe-instances --cache-ttl 60 --max-items %s'
+        with mock.patch('awscli.clidriver.get_response_cache',
+                        return_value=cache):
+            self.assert_params_for_cmd(cmd % 5, expected_rc=0)
+            self.assert_params_for_cmd(cmd % 10, expected_rc=0)
+        self.assertEqual(cache.get.call_count, 2)
+        first_key = cache.get.call_args_list[0][0][0]
+        second_key = cache.get.call_args_list[1][0][0]
+        self.assertNotEqual(first_key, second_key)
+
+    def test_aws_with_cache_ttl_skips_credential_operations(self):
+        with mock.patch('awscli.clidriver.get_response_cache') as cache:
+            self.assert_params_for_cmd(
+                'ec2 get-password-data --instance-id i-12345 '
+                '--cache-ttl 60', expected_rc=0)
+        self.assertFalse(cache.called)
+
+    def test_aws_with_no_cache_ignores_cache_ttl(self):
+        with mock.patch('awscli.clidriver.get_response_cache') as cache:
+            self.assert_params_for_cmd(
+                'ec2 describe-instances --cache-ttl 60 --no-cache',
+                expected_rc=0)
+        self.assertFalse(cache.called)
+
+    def test_aws_with_bad_cache_ttl(self):
+        self.assert_params_for_cmd(
+            'ec2 describe-instances --cache-ttl soon', expected_rc=255,
+            stderr_contains='Bad value for --cache-ttl')
+
     def test_aws_with_verify_false(self):
         with mock.patch('botocore.service.Service.get_endpoint') as endpoint:
             http_response = models.Response()
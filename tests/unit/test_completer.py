@@ -10,22 +10,26 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-from awscli.testutils import create_clidriver
+from awscli.testutils import create_clidriver, unittest, FileCreator
 import os
+import json
 import pprint
 import logging
 import difflib
 
 import mock
+import botocore.session
 
-from awscli.completer import Completer
+from awscli import EnvironmentVariables
+from awscli.completer import Completer, CompletionIndex
 
 LOG = logging.getLogger(__name__)
 
 
-GLOBALOPTS = ['--debug', '--endpoint-url', '--no-verify-ssl', '--no-paginate',
-              '--output', '--profile', '--region', '--version', '--color',
-              '--query', '--no-sign-request']
+GLOBALOPTS = ['--debug', '--debug-timing', '--endpoint-url', '--no-verify-ssl',
+              '--no-paginate', '--output', '--profile', '--region',
+              '--version', '--color', '--query', '--no-sign-request',
+              '--regions', '--all-regions', '--cache-ttl', '--no-cache']
 
 COMPLETIONS = [
     ('aws ', -1, set(['autoscaling', 'cloudformation', 'cloudhsm',
@@ -45,28 +49,32 @@ COMPLETIONS = [
     ('aws cloudfr', -1, set([])),
     ('aws foobar', -1, set([])),
     ('aws  --', -1, set(GLOBALOPTS)),
-    ('aws  --re', -1, set(['--region'])),
+    ('aws  --re', -1, set(['--region', '--regions'])),
     ('aws sts ', -1, set(['assume-role', 'assume-role-with-saml',
                           'get-federation-token',
                           'decode-authorization-message',
                           'assume-role-with-web-identity',
                           'get-session-token'])),
-    ('aws sts --debug --de', -1, set([])),
+    ('aws sts --debug --de', -1, set(['--debug-timing'])),
     ('aws sts de', -1, set(['decode-authorization-message'])),
     ('aws sts --', -1, set(GLOBALOPTS)),
     ('aws sts decode-authorization-message', -1, set([])),
     ('aws sts decode-authorization-message --encoded-message --re', -1,
-     set(['--region'])),
+     set(['--region', '--regions'])),
     ('aws sts decode-authorization-message --encoded-message --enco', -1,
      set([])),
     ('aws ec2 --debug describe-instances --instance-ids ', -1,
      set([])),
     ('aws ec2 --debug describe-instances --instance-ids i-12345678 - ', -1,
      set(['--filters', '--dry-run', '--no-dry-run', '--endpoint-url',
+          '--debug-timing',
           '--no-verify-ssl', '--no-paginate', '--no-sign-request', '--output',
           '--profile', '--starting-token', '--max-items', '--page-size',
           '--region', '--version', '--color', '--query',
-          '--generate-cli-skeleton', '--cli-input-json'])),
+          '--generate-cli-skeleton', '--cli-input-json', '--regions',
+          '--all-regions', '--cache-ttl', '--no-cache',
+          '--cli-input-json-lines',
+          '--cli-input-json-lines-unordered'])),
     ('aws s3', -1, set(['cp', 'mv', 'rm', 'mb', 'rb', 'ls', 'sync', 'website'])),
     ('aws s3 m', -1, set(['mv', 'mb'])),
     ('aws s3 cp -', -1, set(['--no-guess-mime-type', '--dryrun',
@@ -148,3 +156,77 @@ def test_completions():
                 point = len(cmdline)
             results = set(completer.complete(cmdline, point))
             yield check_completer, cmdline, results, expected_results
+
+
+class TestCompletionIndex(unittest.TestCase):
+    def setUp(self):
+        self.environ = {
+            'AWS_DATA_PATH': os.environ['AWS_DATA_PATH'],
+            'AWS_DEFAULT_REGION': 'us-east-1',
+            'AWS_CONFIG_FILE': '',
+        }
+        self.environ_patch = mock.patch('os.environ', self.environ)
+        self.environ_patch.start()
+        self.files = FileCreator()
+        self.index_filename = os.path.join(
+            self.files.rootdir, 'cli', 'completion-index.json')
+        self.driver_factory = mock.Mock(side_effect=create_clidriver)
+
+    def tearDown(self):
+        self.environ_patch.stop()
+        self.files.remove_all()
+
+    def create_index(self):
+        session = botocore.session.Session(EnvironmentVariables)
+        return CompletionIndex(session, self.index_filename,
+                               driver_factory=self.driver_factory)
+
+    def test_index_is_saved_and_reused(self):
+        index = self.create_index()
+        self.assertIn('describe-instances', index.commands(['ec2']))
+        self.assertTrue(os.path.isfile(self.index_filename))
+        self.assertEqual(self.driver_factory.call_count, 1)
+
+        index = self.create_index()
+        self.assertIn('describe-instances', index.commands(['ec2']))
+        self.assertIn('region', index.options([]))
+        # Everything was answered from the saved index.
+        self.assertEqual(self.driver_factory.call_count, 1)
+
+    def test_unindexed_command_is_added_to_saved_index(self):
+        self.create_index().commands(['ec2'])
+        index = self.create_index()
+        self.assertIn('put-item', index.commands(['dynamodb']))
+        self.assertEqual(self.driver_factory.call_count, 2)
+        with open(self.index_filename) as f:
+            commands = json.load(f)['root']['commands']
+        self.assertIn('commands', commands['ec2'])
+        self.assertIn('commands', commands['dynamodb'])
+
+    def test_index_discarded_when_version_changes(self):
+        self.create_index().commands(['ec2'])
+        with mock.patch('awscli.completer.botocore_version', '0.0.0'):
+            index = self.create_index()
+            index.commands(['ec2'])
+        self.assertEqual(self.driver_factory.call_count, 2)
+
+    def test_corrupt_index_is_rebuilt(self):
+        self.files.create_file(
+            os.path.join('cli', 'completion-index.json'), '{"root": ')
+        index = self.create_index()
+        self.assertIn('ec2', index.commands([]))
+        with open(self.index_filename) as f:
+            self.assertIn('ec2', json.load(f)['root']['commands'])
+
+    def test_enum_choices(self):
+        index = self.create_index()
+        self.assertIn('m1.small', index.choices(['ec2', 'run-instances'],
+                                                '--instance-type'))
+        self.assertEqual(index.choices([], '--output'),
+                         ['json', 'text', 'table'])
+
+    def test_completer_uses_enum_choices(self):
+        completer = Completer()
+        results = completer.complete(
+            'aws ec2 run-instances --instance-type', None)
+        self.assertIn('m1.small', results)
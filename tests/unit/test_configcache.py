@@ -0,0 +1,175 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import os
+import time
+
+import mock
+from botocore.credentials import CredentialResolver
+from botocore.credentials import SharedCredentialProvider
+
+from awscli import EnvironmentVariables
+from awscli.testutils import unittest, FileCreator
+from awscli.configcache import CachedConfigSession
+from awscli.configcache import ConfigSnapshotCache
+from awscli.configcache import inject_cached_credentials_file_provider
+
+
+class TestConfigSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.files = FileCreator()
+        self.cache_dir = os.path.join(self.files.rootdir, 'config-cache')
+        self.cache = ConfigSnapshotCache(self.cache_dir)
+        self.config_filename = self.files.create_file('config', 'foo')
+        self.parse = mock.Mock(return_value={'profiles': {'foo': {}}})
+
+    def tearDown(self):
+        self.files.remove_all()
+
+    def test_parsed_config_is_saved(self):
+        self.assertEqual(self.cache.load([self.config_filename], self.parse),
+                         {'profiles': {'foo': {}}})
+        self.assertEqual(self.cache.load([self.config_filename], self.parse),
+                         {'profiles': {'foo': {}}})
+        self.assertEqual(self.parse.call_count, 1)
+
+    def test_config_is_parsed_again_when_file_changes(self):
+        self.cache.load([self.config_filename], self.parse)
+        self.files.create_file('config', 'foobar')
+        self.parse.return_value = {'profiles': {'bar': {}}}
+        self.assertEqual(self.cache.load([self.config_filename], self.parse),
+                         {'profiles': {'bar': {}}})
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_snapshots_are_per_set_of_files(self):
+        other_filename = self.files.create_file('other', 'bar')
+        self.cache.load([self.config_filename], self.parse)
+        self.cache.load([self.config_filename, other_filename], self.parse)
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_snapshots_of_removed_files_are_removed(self):
+        old_filename = self.files.create_file('old-credentials', 'secret')
+        self.cache.load([old_filename], self.parse)
+        os.remove(old_filename)
+        self.cache.load([self.config_filename], self.parse)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        # The remaining snapshot is still used.
+        self.cache.load([self.config_filename], self.parse)
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_snapshots_of_changed_files_are_removed(self):
+        other_filename = self.files.create_file('other', 'bar')
+        self.cache.load([other_filename], self.parse)
+        self.files.create_file('other', 'changed')
+        self.cache.load([self.config_filename], self.parse)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_missing_files_are_not_saved(self):
+        missing = os.path.join(self.files.rootdir, 'missing')
+        self.cache.load([missing], self.parse)
+        self.cache.load([missing], self.parse)
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_corrupt_snapshot_is_replaced(self):
+        self.cache.load([self.config_filename], self.parse)
+        snapshot = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        with open(snapshot, 'wb') as f:
+            f.write(b'\x80\x02garbage')
+        self.assertEqual(self.cache.load([self.config_filename], self.parse),
+                         {'profiles': {'foo': {}}})
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertEqual(self.cache.load([self.config_filename], self.parse),
+                         {'profiles': {'foo': {}}})
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_recently_modified_files_are_not_saved(self):
+        # Rewriting the file in place within the same second could keep
+        # its modification time, size and inode unchanged.
+        self.files.create_file('config', 'bar', mtime=time.time())
+        self.cache.load([self.config_filename], self.parse)
+        self.cache.load([self.config_filename], self.parse)
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_clear_removes_snapshots(self):
+        self.cache.load([self.config_filename], self.parse)
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.cache.load([self.config_filename], self.parse)
+        self.assertEqual(self.parse.call_count, 2)
+
+    def test_clear_without_snapshots(self):
+        self.cache.clear()
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+class TestCachedConfigSession(unittest.TestCase):
+    def setUp(self):
+        self.files = FileCreator()
+        self.environ = {
+            'AWS_CONFIG_FILE': self.files.create_file(
+                'config', '[profile dev]\nregion = us-west-2\n'),
+        }
+        self.credentials_filename = self.files.create_file(
+            'credentials', '[dev]\naws_access_key_id = foo\n')
+        self.environ_patch = mock.patch('os.environ', self.environ)
+        self.environ_patch.start()
+        self.cache = ConfigSnapshotCache(
+            os.path.join(self.files.rootdir, 'config-cache'))
+
+    def tearDown(self):
+        self.environ_patch.stop()
+        self.files.remove_all()
+
+    def create_session(self):
+        session = CachedConfigSession(EnvironmentVariables,
+                                      config_snapshot_cache=self.cache)
+        session.set_config_variable('credentials_file',
+                                    self.credentials_filename)
+        return session
+
+    def test_full_config_is_read_from_snapshot(self):
+        expected = {'region': 'us-west-2', 'aws_access_key_id': 'foo'}
+        self.assertEqual(self.create_session().full_config['profiles']['dev'],
+                         expected)
+        with mock.patch('botocore.config.load_config') as load_config:
+            session = self.create_session()
+            self.assertEqual(session.full_config['profiles']['dev'],
+                             expected)
+            self.assertEqual(session.get_scoped_config(), {})
+            session.profile = 'dev'
+            self.assertEqual(session.get_config_variable('region'),
+                             'us-west-2')
+        self.assertFalse(load_config.called)
+
+    def test_full_config_without_snapshot_cache(self):
+        session = CachedConfigSession(EnvironmentVariables)
+        self.assertEqual(session.full_config['profiles']['dev']['region'],
+                         'us-west-2')
+
+    def test_credentials_file_provider_uses_snapshot(self):
+        session = self.create_session()
+        resolver = CredentialResolver(providers=[
+            mock.Mock(METHOD='env'),
+            SharedCredentialProvider(creds_filename='foo')])
+        session.get_component = mock.Mock(return_value=resolver)
+        inject_cached_credentials_file_provider(session)
+        self.assertEqual(len(resolver.providers), 2)
+        provider = resolver.providers[1]
+        self.assertEqual(provider.METHOD, 'shared-credentials-file')
+        with mock.patch('botocore.config.raw_config_parse') as parse:
+            parse.return_value = {'default': {}}
+            provider._ini_parser(self.credentials_filename)
+            provider._ini_parser(self.credentials_filename)
+        self.assertEqual(parse.call_count, 1)
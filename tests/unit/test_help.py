@@ -10,13 +10,15 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-from awscli.testutils import unittest
+from awscli.testutils import unittest, FileCreator, BaseAWSHelpOutputTest
 import sys
 import os
 
 import mock
 
 from awscli.help import PosixHelpRenderer, ExecutableNotFoundError
+from awscli.help import HelpCache
+from awscli.help import MAX_HELP_CACHE_FINGERPRINTS
 
 
 class FakePosixHelpRenderer(PosixHelpRenderer):
@@ -29,7 +31,9 @@ class FakePosixHelpRenderer(PosixHelpRenderer):
 
     def _popen(self, *args, **kwargs):
         self.popen_calls.append((args, kwargs))
-        return mock.Mock()
+        process = mock.Mock()
+        process.communicate.return_value = (b'groff output', b'')
+        return process
 
 
 class TestHelpPager(unittest.TestCase):
@@ -92,3 +96,121 @@ class TestHelpPager(unittest.TestCase):
         os.environ['PAGER'] = pager_cmd
         self.assertEqual(self.renderer.get_pager_cmdline(),
                          ['/bin/sh', '-c', "col -bx | vim -c 'set ft=man' -"])
+
+
+class TestHelpCache(unittest.TestCase):
+    def setUp(self):
+        self.files = FileCreator()
+        self.session = mock.Mock()
+        self.session.get_config_variable.return_value = '/data/path'
+        self.session.full_config = {'plugins': {}}
+        self.cache = HelpCache(self.session, cache_dir=self.files.rootdir)
+
+    def tearDown(self):
+        self.files.remove_all()
+
+    def test_get_missing_entry(self):
+        self.assertIsNone(self.cache.get('ec2.rst'))
+
+    def test_set_and_get(self):
+        self.cache.set('ec2.rst', b'ec2 help')
+        self.assertEqual(self.cache.get('ec2.rst'), b'ec2 help')
+        self.assertEqual(
+            HelpCache(self.session, self.files.rootdir).get('ec2.rst'),
+            b'ec2 help')
+
+    def test_plugins_change_fingerprint(self):
+        self.cache.set('ec2.rst', b'ec2 help')
+        self.session.full_config = {'plugins': {'foo': 'foo.plugin'}}
+        cache = HelpCache(self.session, cache_dir=self.files.rootdir)
+        self.assertIsNone(cache.get('ec2.rst'))
+
+    def create_cache_for_version(self, version):
+        with mock.patch('awscli.help.botocore_version', version):
+            return HelpCache(self.session, cache_dir=self.files.rootdir)
+
+    def test_other_fingerprints_are_kept(self):
+        self.cache.set('ec2.rst', b'ec2 help')
+        cache = self.create_cache_for_version('0.0.0')
+        self.assertIsNone(cache.get('ec2.rst'))
+        cache.set('s3.rst', b's3 help')
+        self.assertEqual(len(os.listdir(self.files.rootdir)), 2)
+        self.assertEqual(self.cache.get('ec2.rst'), b'ec2 help')
+
+    def test_least_recently_used_fingerprints_removed(self):
+        self.cache.set('ec2.rst', b'ec2 help')
+        oldest = os.path.join(self.files.rootdir,
+                              os.listdir(self.files.rootdir)[0])
+        os.utime(oldest, (1, 1))
+        for i in range(MAX_HELP_CACHE_FINGERPRINTS):
+            self.create_cache_for_version('0.0.%s' % i).set(
+                's3.rst', b's3 help')
+        self.assertEqual(len(os.listdir(self.files.rootdir)),
+                         MAX_HELP_CACHE_FINGERPRINTS)
+        self.assertIsNone(self.cache.get('ec2.rst'))
+
+    def test_unwritable_cache_is_ignored(self):
+        self.files.create_file('not-a-dir', '')
+        cache = HelpCache(self.session, cache_dir=os.path.join(
+            self.files.rootdir, 'not-a-dir'))
+        cache.set('ec2.rst', b'ec2 help')
+        self.assertIsNone(cache.get('ec2.rst'))
+
+
+@unittest.skipIf(sys.platform.startswith('win'), "requires posix system")
+@mock.patch('sys.exit', mock.Mock())
+class TestPosixHelpRendererCache(unittest.TestCase):
+    def setUp(self):
+        self.renderer = FakePosixHelpRenderer()
+        self.renderer.exists_on_path['groff'] = True
+        self.renderer.cache = mock.Mock()
+
+    def test_groff_output_cached(self):
+        self.renderer.cache.get.return_value = None
+        self.renderer.render(b'foo')
+        self.assertEqual(self.renderer.popen_calls[0][0][0][0], 'groff')
+        name = self.renderer.cache.set.call_args[0][0]
+        self.renderer.cache.set.assert_called_with(name, b'groff output')
+
+    def test_cached_groff_output_used(self):
+        self.renderer.cache.get.return_value = b'cached output'
+        self.renderer.render(b'foo')
+        # Only the pager is run.
+        self.assertEqual(len(self.renderer.popen_calls), 1)
+        pager = self.renderer.popen_calls[0][0][0]
+        self.assertEqual(pager, self.renderer.get_pager_cmdline())
+
+
+class TestHelpCommandCache(BaseAWSHelpOutputTest):
+    def setUp(self):
+        super(TestHelpCommandCache, self).setUp()
+        self.files = FileCreator()
+        self.help_cache_patch.stop()
+        self.help_cache_patch = mock.patch(
+            'awscli.help.get_help_cache',
+            lambda session: HelpCache(session, self.files.rootdir))
+        self.help_cache_patch.start()
+
+    def tearDown(self):
+        super(TestHelpCommandCache, self).tearDown()
+        self.files.remove_all()
+
+    def test_rendered_contents_cached(self):
+        self.driver.main(['ec2', 'help'])
+        self.assert_contains('Amazon Elastic Compute Cloud')
+        cache = HelpCache(self.session, self.files.rootdir)
+        cache.set('ec2.rst', b'cached ec2 help')
+        self.driver.main(['ec2', 'help'])
+        self.assertEqual(self.renderer.rendered_contents, 'cached ec2 help')
+
+    def test_no_cache(self):
+        cache = HelpCache(self.session, self.files.rootdir)
+        cache.set('ec2.rst', b'cached ec2 help')
+        self.driver.main(['ec2', 'help', '--no-cache'])
+        self.assert_contains('Amazon Elastic Compute Cloud')
+
+    def test_operation_help_cached_by_lineage(self):
+        self.driver.main(['ec2', 'describe-instances', 'help'])
+        cache = HelpCache(self.session, self.files.rootdir)
+        self.assertIn(b'describe-instances',
+                      cache.get('ec2.describe-instances.rst'))
@@ -10,9 +10,16 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
+import mmap
+import os
+
+import mock
+
 from awscli.compat import six
 
 from awscli.paramfile import get_paramfile
+from awscli.paramfile import ResourceLoadingError
+from awscli.paramfile import URICache
 from awscli.testutils import unittest, FileCreator
 
 
@@ -38,3 +45,86 @@ class TestParamFile(unittest.TestCase):
         data = get_paramfile(prefixed_filename)
         self.assertEqual(data, b'This is a test')
         self.assertIsInstance(data, six.binary_type)
+
+    def test_blob_file_is_memory_mapped(self):
+        filename = self.files.create_file('foo', 'This is a test')
+        data = get_paramfile('fileb://' + filename,
+                             blob_shape=mock.Mock(serialization={}))
+        self.addCleanup(data.close)
+        self.assertIsInstance(data, mmap.mmap)
+        self.assertEqual(data[:], b'This is a test')
+
+    def test_empty_blob_file(self):
+        filename = self.files.create_file('foo', '')
+        data = get_paramfile('fileb://' + filename,
+                             blob_shape=mock.Mock(serialization={}))
+        self.assertEqual(data, b'')
+
+    def test_streaming_blob_file(self):
+        filename = self.files.create_file('foo', 'This is a test')
+        data = get_paramfile(
+            'fileb://' + filename,
+            blob_shape=mock.Mock(serialization={'streaming': True}))
+        self.addCleanup(data.close)
+        self.assertEqual(data.read(), b'This is a test')
+        data.seek(0)
+        self.assertEqual(data.read(), b'This is a test')
+
+    def test_missing_blob_file(self):
+        with self.assertRaises(ResourceLoadingError):
+            get_paramfile('fileb://' + os.path.join(self.files.rootdir, 'x'),
+                          blob_shape=mock.Mock(serialization={}))
+
+
+class TestURIParamFile(unittest.TestCase):
+    def setUp(self):
+        self.files = FileCreator()
+        self.cache = URICache(os.path.join(self.files.rootdir, 'cache'))
+        patcher = mock.patch('awscli.paramfile.get_uri_cache',
+                             return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('awscli.paramfile.requests.get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.files.remove_all()
+
+    def set_response(self, status_code, text='', headers=None):
+        self.get.return_value = mock.Mock(status_code=status_code, text=text,
+                                          headers=headers or {})
+
+    def test_response_is_revalidated(self):
+        self.set_response(200, 'contents', {'ETag': '"abc"'})
+        self.assertEqual(get_paramfile('https://example.com/a'), 'contents')
+        self.get.assert_called_with('https://example.com/a', headers={})
+        self.set_response(304)
+        self.assertEqual(get_paramfile('https://example.com/a'), 'contents')
+        self.get.assert_called_with('https://example.com/a',
+                                    headers={'If-None-Match': '"abc"'})
+
+    def test_changed_response_replaces_cached_copy(self):
+        headers = {'Last-Modified': 'Sun, 01 Mar 2015 00:00:00 GMT'}
+        self.set_response(200, 'old', headers)
+        get_paramfile('http://example.com/a')
+        self.set_response(200, 'new', {'ETag': '"new"'})
+        self.assertEqual(get_paramfile('http://example.com/a'), 'new')
+        self.get.assert_called_with('http://example.com/a', headers={
+            'If-Modified-Since': 'Sun, 01 Mar 2015 00:00:00 GMT'})
+        self.assertEqual(self.cache.get('http://example.com/a')['content'],
+                         'new')
+
+    def test_response_without_validators_is_not_cached(self):
+        self.set_response(200, 'contents')
+        get_paramfile('https://example.com/a')
+        self.assertIsNone(self.cache.get('https://example.com/a'))
+        self.set_response(200, 'contents', {'ETag': '"abc"',
+                                            'Cache-Control': 'no-store'})
+        get_paramfile('https://example.com/a')
+        self.assertIsNone(self.cache.get('https://example.com/a'))
+
+    def test_error_status_code(self):
+        self.set_response(404)
+        with self.assertRaises(ResourceLoadingError):
+            get_paramfile('https://example.com/a')
@@ -0,0 +1,171 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import datetime
+import os
+import shutil
+import tempfile
+
+import mock
+from dateutil.tz import tzutc
+
+from awscli.compat import six
+from awscli.testutils import unittest
+from awscli.responsecache import ResponseCache
+from awscli.responsecache import compute_cache_key
+from awscli.responsecache import is_cacheable_operation
+from awscli.responsecache import parse_cache_ttl
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tempdir, 'response-cache')
+        self.cache = ResponseCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_get_missing_entry(self):
+        self.assertIsNone(self.cache.get('foo', 60))
+
+    def test_set_and_get(self):
+        response = {'Reservations': [{'ReservationId': 'r-1'}]}
+        self.cache.set('foo', response)
+        self.assertEqual(self.cache.get('foo', 60), response)
+
+    def test_expired_entry_is_not_returned(self):
+        with mock.patch('time.time', return_value=1000):
+            self.cache.set('foo', {'Foo': 'bar'})
+        with mock.patch('time.time', return_value=1059):
+            self.assertEqual(self.cache.get('foo', 60), {'Foo': 'bar'})
+        with mock.patch('time.time', return_value=1060):
+            self.assertIsNone(self.cache.get('foo', 60))
+
+    def test_datetimes_are_preserved(self):
+        launched = datetime.datetime(2015, 3, 1, 12, 30, tzinfo=tzutc())
+        response = {'Reservations': [{'LaunchTime': launched}]}
+        self.cache.set('foo', response)
+        self.assertEqual(self.cache.get('foo', 60), response)
+
+    @unittest.skipIf(six.PY2, "Blobs are only distinct from str on py3.")
+    def test_bytes_are_preserved(self):
+        response = {'Plaintext': b'\x00\xff'}
+        self.cache.set('foo', response)
+        self.assertEqual(self.cache.get('foo', 60), response)
+
+    def test_corrupt_entry_is_ignored(self):
+        os.makedirs(self.cache_dir)
+        with open(os.path.join(self.cache_dir, 'foo.json'), 'w') as f:
+            f.write('{"created": ')
+        self.assertIsNone(self.cache.get('foo', 60))
+
+    def test_unserializable_response_is_not_cached(self):
+        self.cache.set('foo', {'Body': object()})
+        self.assertIsNone(self.cache.get('foo', 60))
+
+    def test_least_recently_used_entries_are_removed(self):
+        self.cache.set('first', {'Foo': 'a' * 100})
+        entry_size = os.path.getsize(
+            os.path.join(self.cache_dir, 'first.json'))
+        # Entry sizes vary slightly with the timestamp they're stored with.
+        self.cache = ResponseCache(self.cache_dir,
+                                   max_size=entry_size * 2 + 50)
+        self.cache.set('second', {'Foo': 'b' * 100})
+        # Make 'first' the most recently used entry.
+        os.utime(os.path.join(self.cache_dir, 'second.json'), (1, 1))
+        self.assertIsNotNone(self.cache.get('first', 60))
+        self.cache.set('third', {'Foo': 'c' * 100})
+        self.assertIsNotNone(self.cache.get('first', 60))
+        self.assertIsNone(self.cache.get('second', 60))
+        self.assertIsNotNone(self.cache.get('third', 60))
+
+
+class TestComputeCacheKey(unittest.TestCase):
+    def setUp(self):
+        self.operation = mock.Mock()
+        self.operation.name = 'DescribeInstances'
+        self.operation.service.endpoint_prefix = 'ec2'
+        self.endpoint = mock.Mock()
+        self.endpoint.region_name = 'us-east-1'
+        self.endpoint.host = 'https://ec2.us-east-1.amazonaws.com'
+
+    def compute_key(self, parameters=None, profile='default', **kwargs):
+        if parameters is None:
+            parameters = {}
+        return compute_cache_key(self.operation, self.endpoint, parameters,
+                                 profile, **kwargs)
+
+    def test_key_is_stable(self):
+        self.assertEqual(
+            self.compute_key({'Filters': [{'Name': 'a'}], 'DryRun': False}),
+            self.compute_key({'DryRun': False, 'Filters': [{'Name': 'a'}]}))
+
+    def test_key_depends_on_parameters(self):
+        self.assertNotEqual(self.compute_key({'InstanceIds': ['i-1']}),
+                            self.compute_key({'InstanceIds': ['i-2']}))
+
+    def test_key_depends_on_profile(self):
+        self.assertNotEqual(self.compute_key(profile='dev'),
+                            self.compute_key(profile='prod'))
+
+    def test_key_depends_on_region(self):
+        key = self.compute_key()
+        self.endpoint.region_name = 'eu-west-1'
+        self.assertNotEqual(key, self.compute_key())
+
+    def test_key_depends_on_credentials(self):
+        first = mock.Mock(access_key='foo')
+        second = mock.Mock(access_key='bar')
+        self.assertNotEqual(self.compute_key(credentials=first),
+                            self.compute_key(credentials=second))
+
+
+class TestIsCacheableOperation(unittest.TestCase):
+    def create_operation(self, service_name, name):
+        operation = mock.Mock()
+        operation.name = name
+        operation.service.endpoint_prefix = service_name
+        operation.is_streaming.return_value = False
+        return operation
+
+    def test_read_only_operations_are_cacheable(self):
+        self.assertTrue(is_cacheable_operation(
+            self.create_operation('ec2', 'DescribeInstances')))
+        self.assertFalse(is_cacheable_operation(
+            self.create_operation('ec2', 'TerminateInstances')))
+
+    def test_credentials_and_stream_reads_are_not_cacheable(self):
+        for service_name, name in [
+                ('sts', 'GetSessionToken'),
+                ('sts', 'GetFederationToken'),
+                ('cognito-identity', 'GetCredentialsForIdentity'),
+                ('cognito-identity', 'GetOpenIdToken'),
+                ('kinesis', 'GetRecords'),
+                ('kinesis', 'GetShardIterator'),
+                ('ec2', 'GetPasswordData'),
+                ('ecr', 'GetAuthorizationToken')]:
+            self.assertFalse(is_cacheable_operation(
+                self.create_operation(service_name, name)), name)
+
+
+class TestParseCacheTTL(unittest.TestCase):
+    def test_parse_seconds(self):
+        self.assertEqual(parse_cache_ttl('300'), 300)
+
+    def test_negative_value_is_rejected(self):
+        with self.assertRaisesRegexp(ValueError, '--cache-ttl'):
+            parse_cache_ttl('-1')
+
+    def test_error_names_config_variable(self):
+        with self.assertRaisesRegexp(ValueError, 'cli_cache_ttl'):
+            parse_cache_ttl('soon', 'cli_cache_ttl')
@@ -22,6 +22,7 @@
 import unittest
 
 from awscli.table import Section, MultiTable, convert_to_vertical_table
+from awscli.table import RowSpool
 
 
 class TestSection(unittest.TestCase):
@@ -123,5 +124,74 @@ class TestVerticalTableConversion(unittest.TestCase):
             [['key1', 'val1'], ['key2', 'val2'], ['key3', 'val3']])
 
 
+class TestRowSpool(unittest.TestCase):
+    def setUp(self):
+        # A row threshold of 0 and a max size of 1 means we roll over
+        # to disk on the first row.
+        self.spool = RowSpool(max_size=1, row_threshold=0)
+
+    def tearDown(self):
+        self.spool.close()
+
+    def test_rows_round_trip(self):
+        rows = self.spool.new_rows()
+        rows.append([u'one', u'two'])
+        rows.append([u'\u2713', u'line\nbreak'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(list(rows),
+                         [[u'one', u'two'], [u'\u2713', u'line\nbreak']])
+        self.assertEqual(rows[1], [u'\u2713', u'line\nbreak'])
+        self.assertEqual(rows[-2], [u'one', u'two'])
+
+    def test_rows_are_isolated_per_section(self):
+        first = self.spool.new_rows()
+        first.append([u'a'])
+        second = self.spool.new_rows()
+        second.append([u'b'])
+        second.append([u'c'])
+        self.assertEqual(list(first), [[u'a']])
+        self.assertEqual(list(second), [[u'b'], [u'c']])
+
+    def test_empty_rows(self):
+        rows = self.spool.new_rows()
+        self.assertEqual(len(rows), 0)
+        self.assertEqual(list(rows), [])
+        with self.assertRaises(IndexError):
+            rows[0]
+
+    def test_rows_below_threshold_are_kept_in_memory(self):
+        spool = RowSpool(max_size=1, row_threshold=2)
+        self.addCleanup(spool.close)
+        first = spool.new_rows()
+        first.append([u'a'])
+        second = spool.new_rows()
+        second.append([u'b'])
+        self.assertIsNone(spool._file)
+        # Going past the threshold moves the rows of the current
+        # section to the spool.
+        second.append([u'c'])
+        self.assertIsNotNone(spool._file)
+        self.assertEqual(list(first), [[u'a']])
+        self.assertEqual(list(second), [[u'b'], [u'c']])
+        self.assertEqual(second[0], [u'b'])
+        self.assertEqual(second[-1], [u'c'])
+
+    def test_indexing_out_of_range(self):
+        rows = self.spool.new_rows()
+        rows.append([u'a'])
+        with self.assertRaises(IndexError):
+            rows[1]
+
+    def test_spooled_table_converts_to_vertical(self):
+        table = MultiTable(spool_max_size=1, spool_row_threshold=0)
+        table.add_title('foo')
+        table.add_row_header(['key1', 'key2'])
+        table.add_row(['val1', 'val2'])
+        convert_to_vertical_table(table._sections)
+        self.assertEqual(list(table._sections[0].rows),
+                         [['key1', 'val1'], ['key2', 'val2']])
+        table.close()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -221,5 +221,35 @@ class TestSection(unittest.TestCase):
         )
 
 
+class TestBufferedTextStream(unittest.TestCase):
+    def test_writes_are_batched(self):
+        stream = mock.Mock()
+        buffered = text.BufferedTextStream(stream, max_size=10)
+        buffered.write('abc')
+        buffered.write('def')
+        self.assertFalse(stream.write.called)
+        buffered.write('ghijk')
+        stream.write.assert_called_once_with('abcdefghijk')
+
+    def test_flush_writes_remaining_data(self):
+        stream = six.StringIO()
+        buffered = text.BufferedTextStream(stream)
+        buffered.write('foo')
+        buffered.write('\n')
+        self.assertEqual(stream.getvalue(), '')
+        buffered.flush()
+        self.assertEqual(stream.getvalue(), 'foo\n')
+
+    def test_output_does_not_depend_on_buffer_size(self):
+        data = {'Items': [{'A': 'a%s' % i, 'B': i, 'C': [{'D': 'd'}]}
+                          for i in range(100)]}
+        expected = six.StringIO()
+        text.format_text(data, expected)
+        stream = six.StringIO()
+        with mock.patch('awscli.text.DEFAULT_BUFFER_SIZE', 1):
+            text.format_text(data, stream)
+        self.assertEqual(stream.getvalue(), expected.getvalue())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,191 @@
+# Copyright 2015 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You
+# may not use this file except in compliance with the License. A copy of
+# the License is located at
+#
+#     http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
+# ANY KIND, either express or implied. See the License for the specific
+# language governing permissions and limitations under the License.
+import functools
+import json
+import os
+import sys
+
+import mock
+
+from awscli.testutils import unittest
+from awscli.compat import six
+from awscli.clidriver import create_clidriver
+from awscli.tracing import create_tracer, phase, get_handler_name
+from awscli.tracing import EventTracer, TracingEmitter
+
+
+def handler(**kwargs):
+    pass
+
+
+class Handlers(object):
+    def method(self, **kwargs):
+        pass
+
+    def __call__(self, **kwargs):
+        pass
+
+
+class TestCreateTracer(unittest.TestCase):
+    def test_not_enabled(self):
+        self.assertIsNone(create_tracer(['ec2', 'describe-instances'], {}))
+
+    def test_debug_timing_option(self):
+        tracer = create_tracer(['ec2', 'describe-instances',
+                                '--debug-timing'], {})
+        self.assertIsInstance(tracer, EventTracer)
+
+    def test_env_var_report(self):
+        tracer = create_tracer([], {'AWS_CLI_TRACE_EVENTS': '1'})
+        self.assertIsNone(tracer._trace_filename)
+
+    def test_env_var_trace_file(self):
+        tracer = create_tracer([], {'AWS_CLI_TRACE_EVENTS': 'trace.json'})
+        self.assertEqual(tracer._trace_filename, 'trace.json')
+
+
+class TestHandlerName(unittest.TestCase):
+    def test_function(self):
+        self.assertEqual(get_handler_name(handler),
+                         'tests.unit.test_tracing.handler')
+
+    def test_partial(self):
+        self.assertEqual(get_handler_name(functools.partial(handler, a=1)),
+                         'tests.unit.test_tracing.handler')
+
+    def test_bound_method(self):
+        self.assertEqual(get_handler_name(Handlers().method),
+                         'tests.unit.test_tracing.Handlers.method')
+
+    def test_callable_object(self):
+        self.assertEqual(get_handler_name(Handlers()),
+                         'tests.unit.test_tracing.Handlers.__call__')
+
+
+class TestEventTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = EventTracer()
+        self.emitter = TracingEmitter(self.tracer)
+
+    def spans(self, category):
+        return [s for s in self.tracer.spans if s.category == category]
+
+    def test_records_events_and_handlers(self):
+        self.emitter.register('foo', handler)
+        self.emitter.register('foo.bar', lambda **kwargs: 'response')
+        responses = self.emitter.emit('foo.bar')
+        self.assertEqual([r[1] for r in responses], ['response', None])
+        self.assertEqual([s.name for s in self.spans('event')], ['foo.bar'])
+        self.assertEqual(len(self.spans('handler')), 2)
+
+    def test_emit_until_response(self):
+        self.emitter.register('foo', lambda **kwargs: 'first')
+        self.emitter.register('foo', handler)
+        self.assertEqual(self.emitter.emit_until_response('foo')[1], 'first')
+        self.assertEqual(len(self.spans('handler')), 1)
+
+    def test_event_without_handlers(self):
+        self.assertEqual(self.emitter.emit('foo'), [])
+        self.assertEqual(self.emitter.emit('foo'), [])
+        self.assertEqual(len(self.spans('event')), 2)
+
+    def test_self_time_excludes_nested_spans(self):
+        def nested_handler(**kwargs):
+            self.emitter.emit('nested')
+        self.emitter.register('nested', handler)
+        self.emitter.register('outer', nested_handler)
+        with mock.patch('time.time', side_effect=range(100)):
+            self.emitter.emit('outer')
+        outer = [s for s in self.spans('event') if s.name == 'outer'][0]
+        nested = [s for s in self.spans('event') if s.name == 'nested'][0]
+        outer_handler = [s for s in self.spans('handler')
+                         if s.name.endswith('nested_handler')][0]
+        self.assertEqual(outer.duration - outer.self_duration,
+                         outer_handler.duration)
+        self.assertEqual(outer_handler.duration - outer_handler.self_duration,
+                         nested.duration)
+
+    def test_phase(self):
+        with phase(self.tracer, 'parse'):
+            pass
+        self.assertEqual([s.name for s in self.spans('phase')], ['parse'])
+
+    def test_phase_without_tracer(self):
+        with phase(None, 'parse'):
+            pass
+
+    def test_import_hook(self):
+        sys.modules.pop('colorsys', None)
+        self.tracer.install_import_hook()
+        try:
+            import colorsys
+        finally:
+            self.tracer.uninstall_import_hook()
+        self.assertIn('colorsys', [s.name for s in self.spans('import')])
+        self.assertIsNot(six.moves.builtins.__import__,
+                         self.tracer._original_import)
+
+    def test_report(self):
+        self.emitter.register('foo', handler)
+        with phase(self.tracer, 'parse'):
+            self.emitter.emit('foo')
+        stream = six.StringIO()
+        self.tracer.write_report(stream)
+        report = stream.getvalue()
+        self.assertIn('Phases:', report)
+        self.assertIn('parse', report)
+        self.assertIn('tests.unit.test_tracing.handler', report)
+        self.assertIn('Events by total time:', report)
+
+    def test_chrome_trace(self):
+        self.emitter.register('foo', handler)
+        self.emitter.emit('foo')
+        stream = six.StringIO()
+        self.tracer.write_chrome_trace(stream)
+        trace = json.loads(stream.getvalue())
+        names = [e['name'] for e in trace['traceEvents']]
+        self.assertEqual(names, ['foo', 'tests.unit.test_tracing.handler'])
+        self.assertEqual(trace['traceEvents'][0]['ph'], 'X')
+
+    def test_finish_writes_trace_file(self):
+        filename = os.path.join(os.path.dirname(__file__), 'trace.json')
+        self.addCleanup(os.remove, filename)
+        tracer = EventTracer(trace_filename=filename)
+        tracer.finish()
+        with open(filename) as f:
+            self.assertEqual(json.load(f)['traceEvents'], [])
+
+
+class TestDriverTracing(unittest.TestCase):
+    def test_driver_phases_traced(self):
+        environ = {
+            'AWS_DATA_PATH': os.environ['AWS_DATA_PATH'],
+            'AWS_DEFAULT_REGION': 'us-east-1',
+            'AWS_ACCESS_KEY_ID': 'access_key',
+            'AWS_SECRET_ACCESS_KEY': 'secret_key',
+            'AWS_CONFIG_FILE': '',
+        }
+        tracer = EventTracer()
+        with mock.patch('os.environ', environ):
+            with mock.patch('sys.stdout', six.StringIO()):
+                driver = create_clidriver(tracer=tracer)
+                rc = driver.main(['ec2', 'describe-instances',
+                                  '--generate-cli-skeleton', '--debug-timing'])
+        self.assertEqual(rc, 0)
+        phases = [s.name for s in tracer.spans if s.category == 'phase']
+        self.assertEqual(phases, ['create-session', 'load-plugins',
+                                  'parse-global-args', 'handle-global-args',
+                                  'run-command'])
+        events = [s.name for s in tracer.spans if s.category == 'event']
+        self.assertIn('building-argument-table.ec2.describe-instances',
+                      events)
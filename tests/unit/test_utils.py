@@ -10,9 +10,22 @@
 # distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
-from awscli.testutils import unittest
+import os
+import shutil
+import tempfile
+import time
+
+import mock
 
+from awscli.testutils import unittest
 from awscli.utils import split_on_commas
+from awscli.utils import PrefetchingPageIterator
+from awscli.utils import concurrent_imap
+from awscli.utils import concurrent_map
+from awscli.utils import is_read_only_operation
+from awscli.utils import FileLock
+from awscli.utils import prune_lru_files
+from awscli.utils import external_sort
 
 
 class TestCSVSplit(unittest.TestCase):
@@ -86,3 +99,305 @@ class TestCSVSplit(unittest.TestCase):
     def test_end_bracket_in_value(self):
         self.assertEqual(split_on_commas('foo,bar=[foo,*[biz]*,baz]'),
                          ['foo', 'bar=foo,*[biz]*,baz'])
+
+    def test_many_quoted_values(self):
+        value = ','.join('Key=k%s,Value="v,%s"' % (i, i) for i in range(2000))
+        parts = split_on_commas(value)
+        self.assertEqual(len(parts), 4000)
+        self.assertEqual(parts[-2:], ['Key=k1999', 'Value=v,1999'])
+
+    def test_many_lists_with_one_closing_bracket(self):
+        value = ','.join('k%s=[a' % i for i in range(2000)) + ']'
+        parts = split_on_commas(value)
+        self.assertEqual(len(parts), 1)
+        self.assertTrue(parts[0].startswith('k0=a,k1=[a,'))
+
+
+class FakePageIterator(object):
+    def __init__(self, pages, resume_token=None, error=None):
+        self.pages = pages
+        self.resume_token = resume_token
+        self.result_keys = ['Contents']
+        self.non_aggregate_part = {'Name': 'bucket'}
+        self.error = error
+        self.fetched = 0
+
+    def __iter__(self):
+        for page in self.pages:
+            self.fetched += 1
+            yield None, page
+        if self.error is not None:
+            raise self.error
+
+
+class TestPrefetchingPageIterator(unittest.TestCase):
+    def test_yields_all_pages_in_order(self):
+        pages = [{'Contents': [i]} for i in range(10)]
+        iterator = PrefetchingPageIterator(FakePageIterator(pages))
+        self.assertEqual([page for _, page in iterator], pages)
+
+    def test_no_prefetching(self):
+        pages = [{'Contents': [i]} for i in range(3)]
+        iterator = PrefetchingPageIterator(FakePageIterator(pages),
+                                           max_prefetch=0)
+        self.assertEqual([page for _, page in iterator], pages)
+
+    def test_delegates_paging_attributes(self):
+        wrapped = FakePageIterator([], resume_token='foo___1')
+        iterator = PrefetchingPageIterator(wrapped)
+        self.assertEqual(list(iterator), [])
+        self.assertEqual(iterator.resume_token, 'foo___1')
+        self.assertEqual(iterator.result_keys, ['Contents'])
+        self.assertEqual(iterator.non_aggregate_part, {'Name': 'bucket'})
+
+    def test_build_full_result_uses_wrapped_iterator(self):
+        wrapped = mock.Mock()
+        wrapped.build_full_result.return_value = {'foo': 'bar'}
+        iterator = PrefetchingPageIterator(wrapped)
+        self.assertEqual(iterator.build_full_result(), {'foo': 'bar'})
+
+    def test_error_is_raised_to_consumer(self):
+        wrapped = FakePageIterator([{'Contents': [1]}],
+                                   error=ValueError('bad page'))
+        iterator = iter(PrefetchingPageIterator(wrapped))
+        self.assertEqual(next(iterator), (None, {'Contents': [1]}))
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_waits_for_slow_pages_with_timeout(self):
+        def slow_pages():
+            time.sleep(0.1)
+            yield None, {'Contents': [1]}
+
+        # The consumer wakes up several times while waiting for the page.
+        iterator = PrefetchingPageIterator(slow_pages())
+        iterator._GET_TIMEOUT = 0.01
+        self.assertEqual(list(iterator), [(None, {'Contents': [1]})])
+
+    def test_look_ahead_is_bounded(self):
+        wrapped = FakePageIterator([{'Contents': [i]} for i in range(10)])
+        iterator = iter(PrefetchingPageIterator(wrapped, max_prefetch=2))
+        next(iterator)
+        # Give the producer a chance to run ahead as far as it can.
+        time.sleep(0.3)
+        # One page consumed, two pages buffered and one page waiting
+        # to be put in the buffer.
+        self.assertLessEqual(wrapped.fetched, 4)
+        iterator.close()
+
+
+class TestConcurrentMap(unittest.TestCase):
+    def test_results_are_in_input_order(self):
+        def slow_for_small_numbers(x):
+            time.sleep((10 - x) * 0.001)
+            return x * 2
+        self.assertEqual(
+            concurrent_map(slow_for_small_numbers, range(10), max_workers=5),
+            [x * 2 for x in range(10)])
+
+    def test_exception_is_raised_for_failed_call(self):
+        def fail_on_three(x):
+            if x == 3:
+                raise ValueError(x)
+            return x
+        results = concurrent_imap(fail_on_three, range(5), max_workers=2)
+        self.assertEqual([next(results) for _ in range(3)], [0, 1, 2])
+        with self.assertRaises(ValueError):
+            next(results)
+
+    def test_unordered_results(self):
+        def slow_for_small_numbers(x):
+            time.sleep((10 - x) * 0.005)
+            return x
+        results = list(concurrent_imap(slow_for_small_numbers, range(10),
+                                       max_workers=10, ordered=False))
+        self.assertEqual(sorted(results), list(range(10)))
+        # The slowest call should not be the first one yielded.
+        self.assertNotEqual(results[0], 0)
+
+    def test_items_are_consumed_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        results = concurrent_imap(lambda x: x, items(), max_workers=2)
+        self.assertEqual(next(results), 0)
+        self.assertLess(len(consumed), 10)
+        results.close()
+
+
+class TestIsReadOnlyOperation(unittest.TestCase):
+    def create_operation(self, name, streaming=False):
+        operation = mock.Mock()
+        operation.name = name
+        operation.is_streaming.return_value = streaming
+        return operation
+
+    def test_read_only_operations(self):
+        for name in ['DescribeInstances', 'ListUsers', 'GetBucketPolicy']:
+            self.assertTrue(
+                is_read_only_operation(self.create_operation(name)))
+
+    def test_operations_that_modify_resources(self):
+        for name in ['TerminateInstances', 'PutObject', 'CreateUser']:
+            self.assertFalse(
+                is_read_only_operation(self.create_operation(name)))
+
+    def test_streaming_operations_are_not_read_only(self):
+        self.assertFalse(is_read_only_operation(
+            self.create_operation('GetObject', streaming=True)))
+
+
+class TestPruneLRUFiles(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filenames = []
+        for i in range(3):
+            filename = os.path.join(self.tempdir, 'file%s.cache' % i)
+            with open(filename, 'wb') as f:
+                f.write(b'a' * 10)
+            os.utime(filename, (i, i))
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def remaining(self):
+        return [os.path.exists(filename) for filename in self.filenames]
+
+    def test_least_recently_used_files_are_removed(self):
+        prune_lru_files(self.tempdir, 20, '.cache')
+        self.assertEqual(self.remaining(), [False, True, True])
+
+    def test_files_within_max_size_are_kept(self):
+        prune_lru_files(self.tempdir, 30, '.cache')
+        self.assertEqual(self.remaining(), [True, True, True])
+
+    def test_kept_files_are_not_removed(self):
+        prune_lru_files(self.tempdir, 0, '.cache', keep=self.filenames[:1])
+        self.assertEqual(self.remaining(), [True, False, False])
+
+    def test_other_files_are_ignored(self):
+        other = os.path.join(self.tempdir, 'other')
+        with open(other, 'wb') as f:
+            f.write(b'a' * 100)
+        prune_lru_files(self.tempdir, 30, '.cache')
+        self.assertTrue(os.path.exists(other))
+        self.assertEqual(self.remaining(), [True, True, True])
+
+    def test_missing_directory(self):
+        prune_lru_files(os.path.join(self.tempdir, 'missing'), 0, '.cache')
+
+
+class TestFileLock(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'locks', 'foo.lock')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_lock_is_acquired_and_released(self):
+        with FileLock(self.filename) as lock:
+            self.assertTrue(lock.acquired)
+            self.assertTrue(os.path.exists(self.filename))
+        self.assertFalse(lock.acquired)
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_held_lock_times_out(self):
+        with FileLock(self.filename):
+            lock = FileLock(self.filename, timeout=0.1, delay=0.01)
+            self.assertFalse(lock.acquire())
+        self.assertTrue(lock.acquire())
+        lock.release()
+
+    def test_timed_out_lock_does_not_remove_held_lock(self):
+        with FileLock(self.filename):
+            with FileLock(self.filename, timeout=0, delay=0.01) as lock:
+                self.assertFalse(lock.acquired)
+            self.assertTrue(os.path.exists(self.filename))
+
+    def test_stale_lock_is_broken(self):
+        FileLock(self.filename).acquire()
+        os.utime(self.filename, (1, 1))
+        lock = FileLock(self.filename, timeout=0, stale_after=60)
+        self.assertTrue(lock.acquire())
+        lock.release()
+
+    def test_lock_replaced_while_breaking_stale_lock_is_kept(self):
+        FileLock(self.filename).acquire()
+        os.utime(self.filename, (1, 1))
+        new_lock = FileLock(self.filename)
+        lock = FileLock(self.filename, timeout=0, stale_after=60)
+        stat_lock = lock._stat_lock
+
+        def replace_after_stat(filename):
+            # Another process breaks the stale lock and takes a new one
+            # right after this lock looked at the stale one.
+            observed = stat_lock(filename)
+            if not new_lock.acquired:
+                os.remove(self.filename)
+                new_lock.acquire()
+            return observed
+
+        with mock.patch.object(lock, '_stat_lock', replace_after_stat):
+            self.assertFalse(lock.acquire())
+        self.assertEqual(os.listdir(os.path.dirname(self.filename)),
+                         ['foo.lock'])
+        new_lock.release()
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_broken_lock_does_not_remove_new_lock(self):
+        stale = FileLock(self.filename)
+        stale.acquire()
+        os.utime(self.filename, (1, 1))
+        lock = FileLock(self.filename, timeout=0, stale_after=60)
+        self.assertTrue(lock.acquire())
+        stale.release()
+        self.assertTrue(os.path.exists(self.filename))
+        lock.release()
+        self.assertFalse(os.path.exists(self.filename))
+
+
+class TestExternalSort(unittest.TestCase):
+    def test_sorts_in_memory(self):
+        items = [{'n': 3}, {'n': 1}, {'n': 2}]
+        self.assertEqual(
+            list(external_sort(items, key=lambda x: x['n'])),
+            [{'n': 1}, {'n': 2}, {'n': 3}])
+
+    def test_merges_runs_written_to_disk(self):
+        items = [{'n': (i * 7919) % 1000} for i in range(1000)]
+        with mock.patch('tempfile.TemporaryFile',
+                        wraps=tempfile.TemporaryFile) as temporary_file:
+            result = list(external_sort(items, key=lambda x: x['n'],
+                                        run_size=64))
+        self.assertEqual(result, sorted(items, key=lambda x: x['n']))
+        self.assertEqual(temporary_file.call_count, 16)
+
+    def test_sort_is_stable(self):
+        items = [{'k': i % 3, 'i': i} for i in range(100)]
+        result = list(external_sort(items, key=lambda x: x['k'], run_size=7))
+        self.assertEqual(result, sorted(items, key=lambda x: x['k']))
+
+    def test_tuple_keys(self):
+        items = [{'a': 'x', 'b': '2'}, {'a': 'x', 'b': '1'}, {'a': 'w'}]
+        key = lambda x: (x['a'], x.get('b', ''))
+        self.assertEqual(list(external_sort(items, key=key, run_size=1)),
+                         [{'a': 'w'}, {'a': 'x', 'b': '1'},
+                          {'a': 'x', 'b': '2'}])
+
+    def test_items_are_consumed_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(10):
+                consumed.append(i)
+                yield i
+        sorted_items = external_sort(items(), key=lambda x: -x, run_size=3)
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(sorted_items), 9)
+